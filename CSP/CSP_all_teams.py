@@ -1,141 +1,163 @@
-import pandas as pd
-import json
-from ortools.sat.python import cp_model
-from itertools import combinations
-
-class LineupSolutionPrinter(cp_model.CpSolverSolutionCallback):
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from lineup_csp import METRICS, LineupCSP, load_constraint_profiles, load_player_stats
+import repo_root  # noqa: F401  (puts instrumentation.py on the import path)
+import instrumentation
+from instrumentation import span
+
+# Engine of each worker process, created once per process by init_worker()
+_engine = None
+
+def init_worker(stats):
     """
-    Custom callback to collect all feasible lineups found by the CP-SAT solver.
+    Builds the lineup CSP engine of a worker process from the already-loaded player stats.
     """
-    def __init__(self, variables):
-        cp_model.CpSolverSolutionCallback.__init__(self)
-        self.__variables = variables
-        self.lineups = []
-
-    def on_solution_callback(self):
-        lineup = [p for p in self.__variables if self.Value(self.__variables[p]) == 1]
-        self.lineups.append(lineup)
+    global _engine
+    _engine = LineupCSP(stats)
 
-def get_lineups_for_team(team_name, df):
+def solve_team(team_name, top_k=None, count_only=False, pareto=False):
+    """
+    Worker entry point: solves one team with the process's engine and reports how long it took.
+    Returns (team, {metric: [(lineup, value)]}, number of valid lineups or None with top_k,
+    Pareto front over all metrics or None, seconds).
+    """
+    start = time.perf_counter()
+    with span("solve team", team=team_name) as solve_span:
+        best, count = _engine.solve_team(team_name, top_k=top_k, count_only=count_only)
+        front = _engine.pareto_front(team_name) if pareto else None
+        solve_span.rows = count
+    return team_name, best, count, front, time.perf_counter() - start
+
+def sweep_team(team_name, profiles):
     """
-    Builds the constraint model and generates valid lineups for a given team.
-    Returns the list of valid lineups and player statistics.
+    Worker entry point for profile sweeps: solves one team under every constraint profile and
+    returns one row per profile (team, profile, lineup count, best value per metric, seconds).
     """
-    # Filter top 12 players by points and games played
-    top12 = (
-        df[(df["Tm"] == team_name) & (df["G"] > 10) & (df["PTS"] > 3)]
-        .sort_values(by="PTS", ascending=False).head(12)
-    )
-
-    # Map positions to integers for later use
-    pos_to_num = {"PG": 1, "SG": 2, "SF": 3, "PF": 4, "C": 5}
-    player_list = list(top12["Player"])
-
-    # Create a dictionary of relevant stats for each player
-    player_vars = {
-        row["Player"]: {
-            "Pos": pos_to_num.get(row["Pos"], -1),
-            "PTS": row["PTS"],
-            "AST": row["AST"],
-            "REB": row["TRB"],
-            "MPG": row["MP"],
-            "3PA": row["3PA"],
-            "3P%": row["3P%"],
-            "FT%": row["FT%"],
-            "STL": row["STL"],
-            "BLK": row["BLK"],
-            "eFG%": row["eFG%"],
-        }
-        for _, row in top12.iterrows()
-    }
-
-    # Define the model and player selection variables
-    model = cp_model.CpModel()
-    player_in = {player: model.NewBoolVar(player) for player in player_list}
-    model.Add(sum(player_in.values()) == 5)  # Select exactly 5 players
-
-    # Wings constraint: at least 2 wings (SG, SF, PF)
-    model.Add(sum(player_in[p] for p in player_list if player_vars[p]["Pos"] in [2, 3, 4]) >= 2)
-
-    # Shooting constraint: at least 2 decent shooters
-    model.Add(sum(player_in[p] for p in player_list if player_vars[p]["3P%"] >= 0.359) +
-              sum(player_in[p] for p in player_list if 0.34 < player_vars[p]["3P%"] < 0.359) >= 2)
-
-    # Rebounding constraint: at least 2 rebounders
-    model.Add(sum(player_in[p] for p in player_list if (player_vars[p]["REB"] / player_vars[p]["MPG"]) * 36 > 10) +
-              sum(player_in[p] for p in player_list if 7 < (player_vars[p]["REB"] / player_vars[p]["MPG"]) * 36 <= 10) >= 2)
-
-    # Playmaking constraint: at least 2 playmakers
-    model.Add(sum(player_in[p] for p in player_list if (player_vars[p]["AST"] / player_vars[p]["MPG"]) * 36 > 5) +
-              sum(player_in[p] for p in player_list if 3 < (player_vars[p]["AST"] / player_vars[p]["MPG"]) * 36 <= 5) >= 2)
-
-    # Defense constraint: at least 3 defenders (based on STL + BLK)
-    model.Add(sum(player_in[p] for p in player_list if ((player_vars[p]["STL"] + player_vars[p]["BLK"]) / player_vars[p]["MPG"]) * 36 > 2.3) +
-              sum(player_in[p] for p in player_list if 1.5 < ((player_vars[p]["STL"] + player_vars[p]["BLK"]) / player_vars[p]["MPG"]) * 36 <= 2.3) >= 3)
-
-    # Solve the model and collect all valid lineups
-    solver = cp_model.CpSolver()
-    solution_printer = LineupSolutionPrinter(player_in)
-    solver.parameters.enumerate_all_solutions = True
-    solver.Solve(model, solution_printer)
-
-    return solution_printer.lineups, player_vars
-
-def calculate_metric(lineup, player_vars, metric):
+    rows = []
+    for profile in profiles:
+        start = time.perf_counter()
+        with span("solve team", team=team_name, profile=profile["name"]) as solve_span:
+            best, count = _engine.solve_team(team_name, profile, k=1)
+            solve_span.rows = count
+        best_values = [f"{best[metric][0][1]:.2f}" if best[metric] else "" for metric in METRICS]
+        rows.append([team_name, profile["name"], count, *best_values, f"{time.perf_counter() - start:.4f}"])
+    return rows
+
+def run_profile_sweep(stats, teams, profiles_path, workers, output_path="CSP/profile_sweep.csv"):
     """
-    Calculates the total team stat (PTS, REB, AST, DEF) for a given lineup.
+    Solves every team under every profile of a profile file and writes the results as a CSV.
     """
-    if metric == 'DEF':
-        return sum(player_vars[p]['STL'] + player_vars[p]['BLK'] for p in lineup)
-    return sum(player_vars[p][metric] for p in lineup)
+    profiles = load_constraint_profiles(profiles_path)
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(stats,)) as executor:
+            results = list(executor.map(sweep_team, teams, [profiles] * len(teams)))
+    else:
+        init_worker(stats)
+        results = [sweep_team(team, profiles) for team in teams]
+    wall_time = time.perf_counter() - start
+
+    with span("write output", rows=sum(len(rows) for rows in results), path=output_path), \
+            open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Team", "Profile", "Lineups"] + [f"Best {metric}" for metric in METRICS] + ["Seconds"])
+        for rows in results:
+            writer.writerows(rows)
+    print(f"Swept {len(profiles)} profiles over {len(teams)} teams in {wall_time:.3f}s wall time "
+          f"with {workers} worker(s). Output written to {output_path}")
 
 # ---------------------------- Main Logic ----------------------------
 
-# Load NBA player stats CSV
-df = pd.read_csv("CSP/2021-2022 NBA Player Stats - Regular.csv", encoding="ISO-8859-1", delimiter=";")
-teams = df["Tm"].unique()
-
-lineup_counts = {}
-output_lines = []
-
-# Process each team one by one
-for team in teams:
-    print(f"Processing {team}...")
-    lineups, player_vars = get_lineups_for_team(team, df)
-    lineup_counts[team] = len(lineups)
-
-    # Store metric values for each lineup
-    metrics = {'PTS': [], 'REB': [], 'AST': [], 'DEF': []}
-    for lineup in lineups:
-        for metric in metrics.keys():
-            value = calculate_metric(lineup, player_vars, metric)
-            metrics[metric].append((lineup, value))
-
-    # Format the output for each team
-    output_lines.append("=" * 40)
-    output_lines.append(f"TEAM: {team}")
-    output_lines.append("=" * 40)
-    for metric, lineups_metric in metrics.items():
-        output_lines.append(f"\nTop 5 Lineups by {metric}:")
-        top5 = sorted(lineups_metric, key=lambda x: x[1], reverse=True)[:5]
-        for i, (lineup, value) in enumerate(top5, start=1):
-            output_lines.append(f"{i}. {lineup} - {value:.2f}")
-    output_lines.append(f"\nTotal Feasible Lineups Found: {len(lineups)}\n")
-
-# Summary statistics
-avg_lineups = sum(lineup_counts.values()) / len(lineup_counts)
-most_lineups_team = max(lineup_counts, key=lineup_counts.get)
-least_lineups_team = min(lineup_counts, key=lineup_counts.get)
-
-output_lines.append("=" * 40)
-output_lines.append("OVERALL RESULTS")
-output_lines.append("=" * 40)
-output_lines.append(f"Average number of lineups: {avg_lineups:.2f}")
-output_lines.append(f"Most lineups: {most_lineups_team} with {lineup_counts[most_lineups_team]}")
-output_lines.append(f"Least lineups: {least_lineups_team} with {lineup_counts[least_lineups_team]}")
-
-# Save results to file
-with open("CSP/lineup_results.txt", "w") as f:
-    f.write("\n".join(output_lines))
-
-print("Finished! Output written to lineup_results.txt")
+def main():
+    parser = argparse.ArgumentParser(description="Generate and rank feasible lineups for every team.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes solving teams in parallel (1 solves them in this process)")
+    parser.add_argument("--top-k", type=int, default=0, metavar="K",
+                        help="find only the K best lineups per metric with objective search instead of enumerating every lineup")
+    parser.add_argument("--count-only", action="store_true",
+                        help="only count the feasible lineups of each team, without ranking them")
+    parser.add_argument("--profiles", metavar="FILE",
+                        help="JSON/YAML constraint profiles to sweep over every team (writes profile_sweep.csv)")
+    parser.add_argument("--pareto", action="store_true",
+                        help="also list each team's Pareto front: lineups no other lineup beats on all of PTS, REB, AST and DEF")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.start_run("CSP_all_teams", args)
+
+    # Load NBA player stats CSV once; every worker builds its engine from this copy
+    with span("load CSV") as load_span:
+        stats = load_player_stats()
+        load_span.rows = len(stats)
+    teams = stats["Tm"].unique()
+
+    if args.profiles:
+        run_profile_sweep(stats, teams, args.profiles, args.workers)
+        return
+
+    lineup_counts = {}
+    solve_times = {}
+    output_lines = []
+
+    # Solve every team's model in a process pool; map() hands results back in team order
+    start = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(stats,)) as executor:
+            results = list(executor.map(solve_team, teams, [args.top_k] * len(teams), [args.count_only] * len(teams),
+                                        [args.pareto] * len(teams)))
+    else:
+        init_worker(stats)
+        results = [solve_team(team, args.top_k, args.count_only, args.pareto) for team in teams]
+    wall_time = time.perf_counter() - start
+    shown = args.top_k or 5
+
+    for team, best, count, front, solve_time in results:
+        print(f"Processed {team} in {solve_time:.3f}s")
+        solve_times[team] = solve_time
+        if count is not None:
+            lineup_counts[team] = count
+
+        # Format the output for each team
+        output_lines.append("=" * 40)
+        output_lines.append(f"TEAM: {team}")
+        output_lines.append("=" * 40)
+        for metric, lineups_metric in best.items():
+            output_lines.append(f"\nTop {shown} Lineups by {metric}:")
+            for i, (lineup, value) in enumerate(lineups_metric[:shown], start=1):
+                output_lines.append(f"{i}. {lineup} - {value:.2f}")
+        if front is not None:
+            output_lines.append(f"\nPareto Front over {'/'.join(METRICS)} ({len(front)} lineups):")
+            for i, (lineup, values) in enumerate(front, start=1):
+                output_lines.append(f"{i}. {lineup} - " + ", ".join(f"{metric} {value:.2f}" for metric, value in values.items()))
+        if count is None:
+            output_lines.append("")
+        else:
+            output_lines.append(f"\nTotal Feasible Lineups Found: {count}\n")
+
+    # Summary statistics (lineups are only counted when every one is enumerated)
+    if lineup_counts:
+        avg_lineups = sum(lineup_counts.values()) / len(lineup_counts)
+        most_lineups_team = max(lineup_counts, key=lineup_counts.get)
+        least_lineups_team = min(lineup_counts, key=lineup_counts.get)
+
+        output_lines.append("=" * 40)
+        output_lines.append("OVERALL RESULTS")
+        output_lines.append("=" * 40)
+        output_lines.append(f"Average number of lineups: {avg_lineups:.2f}")
+        output_lines.append(f"Most lineups: {most_lineups_team} with {lineup_counts[most_lineups_team]}")
+        output_lines.append(f"Least lineups: {least_lineups_team} with {lineup_counts[least_lineups_team]}")
+
+    # Save results to file
+    with span("write output", rows=len(output_lines), path="CSP/lineup_results.txt"), open("CSP/lineup_results.txt", "w") as f:
+        f.write("\n".join(output_lines))
+
+    slowest_team = max(solve_times, key=solve_times.get)
+    print(f"Solved {len(teams)} teams in {wall_time:.3f}s wall time with {args.workers} worker(s) "
+          f"(total solve time {sum(solve_times.values()):.3f}s, slowest {slowest_team} at {solve_times[slowest_team]:.3f}s)")
+    print("Finished! Output written to lineup_results.txt")
+
+
+if __name__ == "__main__":
+    main()
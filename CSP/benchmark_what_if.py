@@ -0,0 +1,84 @@
+"""
+benchmark_what_if.py
+
+Compares cold and warm latency of what-if lineup queries. For every team and metric it asks for the
+best lineup with each roster player ruled out in turn (an "injury") and with each player forced in.
+
+- cold: the roster model is rebuilt, the change is added as a constraint and a new solver runs it
+- warm: LineupCSP.what_if(), which keeps the model and solver alive and only changes assumptions
+
+Both paths must return the same best value for every query.
+
+Usage: python CSP/benchmark_what_if.py [--teams BOS MIA ...]
+"""
+
+import argparse
+import statistics
+import time
+from ortools.sat.python import cp_model
+from lineup_csp import METRICS, LineupCSP, build_model, calculate_metric, metric_coefficients, resolve_constraints
+
+
+def cold_what_if(engine, team, metric, exclude=(), include=()):
+    """
+    Answers a what-if query from scratch: new model, new objective, new solver.
+    """
+    roster, player_vars = engine.roster_table(team), engine.roster(team)
+    model, player_in = build_model(roster, resolve_constraints())
+    for p in exclude:
+        model.Add(player_in[p] == 0)
+    for p in include:
+        model.Add(player_in[p] == 1)
+    coefficients = metric_coefficients(list(player_in), player_vars)[metric]
+    model.Maximize(sum(c * var for c, var in zip(coefficients, player_in.values())))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = 1
+    if solver.Solve(model) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    lineup = [p for p in player_in if solver.Value(player_in[p]) == 1]
+    return lineup, calculate_metric(lineup, player_vars, metric)
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:>5}: {len(latencies)} queries, median {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p95 {p95 * 1000:.2f} ms, total {sum(latencies):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm what-if lineup queries.")
+    parser.add_argument("--teams", nargs="*", help="teams to query (default: all)")
+    args = parser.parse_args()
+
+    engine = LineupCSP()
+    teams = args.teams or engine.teams
+    queries = [
+        (team, metric, change)
+        for team in teams
+        for metric in METRICS
+        for player in engine.roster(team)
+        for change in ({"exclude": [player]}, {"include": [player]})
+    ]
+
+    cold, warm, mismatches = [], [], 0
+    for team, metric, change in queries:
+        start = time.perf_counter()
+        cold_answer = cold_what_if(engine, team, metric, **change)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        warm_answer = engine.what_if(team, metric, **change)
+        warm.append(time.perf_counter() - start)
+
+        if (cold_answer is None) != (warm_answer is None) or (cold_answer and abs(cold_answer[1] - warm_answer[1]) > 1e-9):
+            mismatches += 1
+            print(f"Mismatch for {team} {metric} {change}: cold {cold_answer}, warm {warm_answer}")
+
+    summarize("cold", cold)
+    summarize("warm", warm)
+    print(f"Speedup (median): {statistics.median(cold) / statistics.median(warm):.1f}x, {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
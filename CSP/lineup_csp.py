@@ -0,0 +1,465 @@
+"""
+lineup_csp.py
+
+Shared lineup CSP engine used by CSP_one_team.py and CSP_all_teams.py. LineupCSP loads the player
+stats CSV once, indexes it by team and caches the CP-SAT model built for each (team, constraints)
+pair, so a long-running process can answer many team queries without re-reading the CSV or
+rebuilding models.
+
+    engine = LineupCSP()
+    best, count = engine.solve_team("BOS")                   # top 5 lineups per metric + lineup count
+    best, _ = engine.solve_team("BOS", top_k=3)              # objective search, no enumeration
+    for profile in load_constraint_profiles("CSP/constraint_profiles.json"):
+        best, count = engine.solve_team("BOS", profile)
+
+Constraint profiles are plain dicts (see DEFAULT_CONSTRAINTS) and can be kept in JSON or YAML files.
+Their rules are evaluated with numpy over a per-player feature table that is computed once per season.
+"""
+
+import heapq
+import json
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+try:
+    import yaml
+except ImportError:  # YAML profiles are optional; JSON profiles always work
+    yaml = None
+
+STATS_PATH = "CSP/2021-2022 NBA Player Stats - Regular.csv"
+METRICS = ['PTS', 'REB', 'AST', 'DEF']
+METRIC_SCALE = 10  # Stats have one decimal place, so x10 turns them into exact integer coefficients
+POS_TO_NUM = {"PG": 1, "SG": 2, "SF": 3, "PF": 4, "C": 5}
+PLAYER_VAR_COLUMNS = ["Pos", "PTS", "AST", "REB", "MPG", "3PA", "3P%", "FT%", "STL", "BLK", "eFG%"]
+
+# Default constraint profile. Each rule counts the selected players whose feature passes a test
+# ("above", "at_least", "below", "at_most" a value, or "in" a list) and bounds that count with
+# "min" and/or "max". Features are the columns of player_features().
+DEFAULT_CONSTRAINTS = {
+    "name": "default",
+    "roster_size": 12,                                    # Top scorers considered for each team
+    "min_games": 10,                                      # Players need more than this many games...
+    "min_points": 3,                                      # ...and more than this many points per game
+    "lineup_size": 5,
+    "rules": [
+        {"name": "wings", "feature": "Pos", "in": ["SG", "SF", "PF"], "min": 2},
+        {"name": "shooters", "feature": "3P tier", "at_least": 1, "min": 2},
+        {"name": "rebounders", "feature": "REB/36", "above": 7, "min": 2},
+        {"name": "playmakers", "feature": "AST/36", "above": 3, "min": 2},
+        {"name": "defenders", "feature": "STOCKS/36", "above": 1.5, "min": 3},
+    ],
+}
+RULE_TESTS = {
+    "above": lambda values, x: values > x,
+    "at_least": lambda values, x: values >= x,
+    "below": lambda values, x: values < x,
+    "at_most": lambda values, x: values <= x,
+    "in": lambda values, x: np.isin(values, x),
+}
+
+# ---------------------- Data ----------------------
+
+def load_player_stats(path=STATS_PATH):
+    """
+    Reads the season player stats CSV.
+    """
+    return pd.read_csv(path, encoding="ISO-8859-1", delimiter=";")
+
+
+def player_features(stats):
+    """
+    Builds the per-player feature table for a season in one vectorized pass: the stats used by the
+    models plus per-36 rebounds, assists and steals + blocks, and a 3-point shooting tier
+    (2: 3P% >= .359, 1: above .340, 0: otherwise).
+    """
+    features = pd.DataFrame({
+        "Player": stats["Player"], "Tm": stats["Tm"], "Pos": stats["Pos"], "G": stats["G"],
+        "PTS": stats["PTS"], "AST": stats["AST"], "REB": stats["TRB"], "MPG": stats["MP"],
+        "3PA": stats["3PA"], "3P%": stats["3P%"], "FT%": stats["FT%"],
+        "STL": stats["STL"], "BLK": stats["BLK"], "eFG%": stats["eFG%"],
+    })
+    features["REB/36"] = (features["REB"] / features["MPG"]) * 36
+    features["AST/36"] = (features["AST"] / features["MPG"]) * 36
+    features["STOCKS/36"] = ((features["STL"] + features["BLK"]) / features["MPG"]) * 36
+    features["3P tier"] = np.select([features["3P%"] >= 0.359, features["3P%"] > 0.34], [2, 1], 0)
+    return features
+
+
+def resolve_constraints(constraints=None):
+    """
+    Merges a (partial) constraint profile over DEFAULT_CONSTRAINTS. A profile that gives "rules"
+    replaces the default rules entirely.
+    """
+    return {**DEFAULT_CONSTRAINTS, **(constraints or {})}
+
+
+def load_constraint_profiles(path):
+    """
+    Reads constraint profiles from a JSON or YAML file holding one profile, a list of profiles or a
+    {name: profile} mapping. Returns the resolved profiles, each with a "name".
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError(f"PyYAML is needed to read {path}; install it or use a JSON profile file")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if isinstance(data, dict) and ("rules" in data or "name" in data):
+        data = [data]
+    elif isinstance(data, dict):
+        data = [{"name": name, **profile} for name, profile in data.items()]
+    return [resolve_constraints({"name": f"profile-{i + 1}", **profile}) for i, profile in enumerate(data)]
+
+
+def select_roster(team_features, constraints):
+    """
+    Picks the top scorers of one team that pass the games/points filter, in descending points order.
+    """
+    return (
+        team_features[(team_features["G"] > constraints["min_games"]) & (team_features["PTS"] > constraints["min_points"])]
+        .sort_values(by="PTS", ascending=False).head(constraints["roster_size"])
+    )
+
+
+def roster_player_vars(roster):
+    """
+    The stats of a roster as a dict keyed by player name, with positions mapped to numbers.
+    """
+    player_vars = roster[PLAYER_VAR_COLUMNS].assign(Pos=roster["Pos"].map(POS_TO_NUM).fillna(-1).astype(int))
+    player_vars.index = roster["Player"]
+    return player_vars.to_dict("index")
+
+# ---------------------- Model ----------------------
+
+def calculate_metric(lineup, player_vars, metric):
+    """
+    Calculates the total team stat (PTS, REB, AST, DEF) for a given lineup.
+    """
+    if metric == 'DEF':
+        return sum(player_vars[p]['STL'] + player_vars[p]['BLK'] for p in lineup)
+    return sum(player_vars[p][metric] for p in lineup)
+
+
+def metric_coefficients(players, player_vars):
+    """
+    Per-player integer coefficients (stat x METRIC_SCALE) for every metric, in roster order.
+    """
+    return {metric: [round(calculate_metric([p], player_vars, metric) * METRIC_SCALE) for p in players]
+            for metric in METRICS}
+
+
+def rule_mask(roster, rule):
+    """
+    Boolean array marking the roster players that count towards a rule. The roster can be a
+    DataFrame or a dict of feature arrays.
+    """
+    values = np.asarray(roster[rule["feature"]])
+    mask = np.ones(len(values), dtype=bool)
+    for test, check in RULE_TESTS.items():
+        if test in rule:
+            mask &= check(values, rule[test])
+    return mask
+
+
+def build_model(roster, constraints):
+    """
+    Builds the lineup constraint model for a roster. Returns the model and the player selection
+    variables (player name -> BoolVar, in roster order).
+    """
+    model = cp_model.CpModel()
+    player_in = {player: model.NewBoolVar(player) for player in roster["Player"]}
+    variables = list(player_in.values())
+    model.Add(sum(variables) == constraints["lineup_size"])
+
+    # One counting constraint per rule, over the players the rule's feature test selects
+    for rule in constraints["rules"]:
+        counted = cp_model.LinearExpr.Sum([variables[i] for i in np.flatnonzero(rule_mask(roster, rule))])
+        if "min" in rule:
+            model.Add(counted >= rule["min"])
+        if "max" in rule:
+            model.Add(counted <= rule["max"])
+
+    return model, player_in
+
+# ---------------------- Solution Collection ----------------------
+
+class TopLineupCollector(cp_model.CpSolverSolutionCallback):
+    """
+    Streams every feasible lineup found by the CP-SAT solver into a bounded min-heap per metric, so
+    only the k best lineups per metric are ever kept. Each solution is read as a single bitmask
+    (bit i set when player i is in the lineup) and scored from per-player integer coefficients.
+    With count_only, solutions are only counted.
+    """
+    def __init__(self, variables, coefficients, k=5, count_only=False):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.__mask = sum((1 << i) * var for i, var in enumerate(variables))
+        self.__count_only = count_only
+        self.__k = k
+        # Score lookup tables for each byte of the mask: tables[metric][j][b] is the total of the
+        # players in bits 8j..8j+7 selected by b
+        self.__tables = {
+            metric: [[sum(c for i, c in enumerate(coefs[j:j + 8]) if b >> i & 1) for b in range(256)]
+                     for j in range(0, len(coefs), 8)]
+            for metric, coefs in coefficients.items()
+        }
+        self.__heaps = {metric: [] for metric in coefficients}
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        if self.__count_only:
+            return
+        mask = self.Value(self.__mask)
+        for metric, tables in self.__tables.items():
+            score = sum(table[mask >> (8 * j) & 255] for j, table in enumerate(tables))
+            # Ties keep the earlier solution: -solution_count is larger for earlier solutions
+            entry = (score, -self.solution_count, mask)
+            heap = self.__heaps[metric]
+            if len(heap) < self.__k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    def top(self, metric):
+        """
+        Returns [(mask, score)] for the best lineups of a metric, from best to worst.
+        """
+        return [(mask, score) for score, _, mask in sorted(self.__heaps[metric], reverse=True)]
+
+
+class LineupMaskCollector(cp_model.CpSolverSolutionCallback):
+    """
+    Records the bitmask (bit i set when player i is in the lineup) of every feasible lineup.
+    """
+    def __init__(self, variables):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.__mask = sum((1 << i) * var for i, var in enumerate(variables))
+        self.masks = []
+
+    def on_solution_callback(self):
+        self.masks.append(self.Value(self.__mask))
+
+
+def lineup_from_mask(mask, players):
+    """
+    Decodes a lineup bitmask into player names, in roster order.
+    """
+    return [player for i, player in enumerate(players) if mask >> i & 1]
+
+# ---------------------- Multi-objective ----------------------
+
+def non_dominated(values):
+    """
+    Boolean mask of the rows of an [N, M] array that no other row dominates, with every column
+    maximized. Two columns use a single sort-and-scan pass; more columns check each row only against
+    the front found so far, visiting rows by decreasing total (a dominating row always has a larger
+    total, so it is always visited first).
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=bool)
+    if values.shape[1] == 2:
+        x, y = values[:, 0], values[:, 1]
+        order = np.lexsort((-y, -x))
+        xs, ys = x[order], y[order].astype(np.float64)
+        new_group = np.r_[True, xs[1:] != xs[:-1]]
+        group_id = np.cumsum(new_group) - 1
+        group_best = ys[new_group]  # Rows are sorted by y descending within each x
+        best_with_more_x = np.r_[-np.inf, np.maximum.accumulate(group_best)[:-1]][group_id]
+        keep = np.zeros(len(values), dtype=bool)
+        keep[order] = (ys > best_with_more_x) & (ys == group_best[group_id])
+        return keep
+
+    order = np.argsort(-values.sum(axis=1), kind="stable")
+    front = np.empty((0, values.shape[1]), dtype=values.dtype)
+    keep = np.zeros(len(values), dtype=bool)
+    for i in order:
+        row = values[i]
+        if not np.any(np.all(front >= row, axis=1) & np.any(front > row, axis=1)):
+            front = np.vstack([front, row])
+            keep[i] = True
+    return keep
+
+# ---------------------- Engine ----------------------
+
+class LineupCSP:
+    """
+    Lineup CSP engine over one season of player stats. The CSV is read once and its feature table
+    is computed and split by team once. Rosters are cached per (team, roster filter) and models per
+    (team, constraint profile), so sweeping many profiles only builds the constraints themselves.
+    """
+    def __init__(self, stats=None, path=STATS_PATH):
+        self.stats = stats if stats is not None else load_player_stats(path)
+        self.features = player_features(self.stats)
+        self._team_features = {team: frame for team, frame in self.features.groupby("Tm", sort=False)}
+        self._rosters = {}
+        self._models = {}
+        self._what_if_models = {}
+
+    @property
+    def teams(self):
+        """
+        Team abbreviations in the order they first appear in the CSV.
+        """
+        return list(self._team_features)
+
+    def _roster(self, team, constraints):
+        """
+        Cached (roster feature rows, player_vars) for a team under a profile's roster filter.
+        """
+        key = (team, constraints["roster_size"], constraints["min_games"], constraints["min_points"])
+        if key not in self._rosters:
+            roster = select_roster(self._team_features.get(team, self.features.iloc[:0]), constraints)
+            self._rosters[key] = (roster, roster_player_vars(roster))
+        return self._rosters[key]
+
+    def team_model(self, team, constraints=None):
+        """
+        Returns the cached (model, player_in, player_vars) for a team, building it on first use.
+        The returned model must not be modified; solve_team() works on clones where it adds constraints.
+        """
+        constraints = resolve_constraints(constraints)
+        key = (team, json.dumps(constraints, sort_keys=True))
+        if key not in self._models:
+            roster, player_vars = self._roster(team, constraints)
+            model, player_in = build_model(roster, constraints)
+            self._models[key] = (model, player_in, player_vars)
+        return self._models[key]
+
+    def roster_table(self, team, constraints=None):
+        """
+        Feature rows (see player_features()) of the players considered for a team, in roster order.
+        """
+        return self._roster(team, resolve_constraints(constraints))[0]
+
+    def roster(self, team, constraints=None):
+        """
+        Stats of the players considered for a team (player name -> stats dict).
+        """
+        return self._roster(team, resolve_constraints(constraints))[1]
+
+    def top_k_lineups(self, team, metric, k=5, constraints=None):
+        """
+        Finds the k best lineups for one metric without enumerating the feasible set: a copy of the
+        team model maximizes the metric, and after each optimum a no-good cut forbids that exact
+        lineup before re-solving. Returns [(lineup, value)] from best to worst.
+        """
+        base_model, base_player_in, player_vars = self.team_model(team, constraints)
+        model = base_model.Clone()
+        player_in = {p: model.GetBoolVarFromProtoIndex(var.Index()) for p, var in base_player_in.items()}
+        coefficients = metric_coefficients(list(player_in), player_vars)[metric]
+        model.Maximize(sum(c * var for c, var in zip(coefficients, player_in.values())))
+
+        solver = cp_model.CpSolver()
+        results = []
+        for _ in range(k):
+            status = solver.Solve(model)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                break
+            lineup = [p for p in player_in if solver.Value(player_in[p]) == 1]
+            results.append((lineup, calculate_metric(lineup, player_vars, metric)))
+            # No-good cut: this exact lineup may not be picked again
+            model.Add(sum(player_in[p] for p in lineup) <= len(lineup) - 1)
+        return results
+
+    def what_if(self, team, metric="PTS", exclude=(), include=(), constraints=None):
+        """
+        Best lineup for one metric under roster changes, e.g. exclude=["Marcus Smart"] for an
+        injury or include=["Derrick White"] to force a player in. Returns (lineup, value), or None
+        when no valid lineup is left.
+
+        The first query per (team, profile, metric) clones the team model and adds the objective.
+        That model and its solver stay alive: exclusions and inclusions are passed as assumptions,
+        and the previous answer is the solution hint, so later queries only re-solve.
+        """
+        constraints = resolve_constraints(constraints)
+        key = (team, json.dumps(constraints, sort_keys=True), metric)
+        if key not in self._what_if_models:
+            base_model, base_player_in, player_vars = self.team_model(team, constraints)
+            model = base_model.Clone()
+            player_in = {p: model.GetBoolVarFromProtoIndex(var.Index()) for p, var in base_player_in.items()}
+            coefficients = metric_coefficients(list(player_in), player_vars)[metric]
+            model.Maximize(sum(c * var for c, var in zip(coefficients, player_in.values())))
+            solver = cp_model.CpSolver()
+            solver.parameters.num_workers = 1  # Tiny models: a single worker answers fastest
+            self._what_if_models[key] = {"model": model, "player_in": player_in, "player_vars": player_vars,
+                                         "solver": solver, "hint": None}
+        state = self._what_if_models[key]
+        model, player_in = state["model"], state["player_in"]
+
+        unknown = [p for p in (*exclude, *include) if p not in player_in]
+        if unknown:
+            raise KeyError(f"Not in the {team} roster: {', '.join(unknown)}")
+
+        model.ClearAssumptions()
+        model.AddAssumptions([player_in[p].Not() for p in exclude] + [player_in[p] for p in include])
+        model.ClearHints()
+        if state["hint"] is not None:
+            for p, var in player_in.items():
+                model.AddHint(var, p in state["hint"])
+
+        status = state["solver"].Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+        lineup = [p for p in player_in if state["solver"].Value(player_in[p]) == 1]
+        state["hint"] = set(lineup)
+        return lineup, calculate_metric(lineup, state["player_vars"], metric)
+
+    def enumerate_lineups(self, team, constraints=None):
+        """
+        Bitmasks over the team's roster order of every valid lineup, as an int64 array.
+        """
+        model, player_in, _ = self.team_model(team, constraints)
+        solver = cp_model.CpSolver()
+        collector = LineupMaskCollector(list(player_in.values()))
+        solver.parameters.enumerate_all_solutions = True
+        solver.Solve(model, collector)
+        return np.array(collector.masks, dtype=np.int64)
+
+    def pareto_front(self, team, metrics=METRICS, constraints=None):
+        """
+        The valid lineups of a team that no other valid lineup beats on every one of the metrics.
+        Lineups are enumerated once, scored for all metrics with one matrix product over their
+        bitmasks and passed through non_dominated(). Returns [(lineup, {metric: value})], sorted by
+        the first metric.
+        """
+        masks = self.enumerate_lineups(team, constraints)
+        players = list(self.roster(team, constraints))
+        coefficients = metric_coefficients(players, self.roster(team, constraints))
+        bits = (masks[:, None] >> np.arange(len(players))) & 1
+        values = bits @ np.array([coefficients[metric] for metric in metrics], dtype=np.int64).reshape(len(metrics), -1).T
+        front = np.flatnonzero(non_dominated(values))
+        front = front[np.argsort(-values[front, 0], kind="stable")]
+        return [
+            (lineup_from_mask(masks[i], players), {metric: float(values[i, m]) / METRIC_SCALE for m, metric in enumerate(metrics)})
+            for i in front
+        ]
+
+    def solve_team(self, team, constraints=None, k=5, top_k=None, count_only=False):
+        """
+        Solves one team. Returns ({metric: [(lineup, value)]}, number of valid lineups).
+
+        By default every valid lineup is enumerated and the k best per metric are kept. With top_k,
+        the top_k lineups per metric come from objective search and the count is None. With
+        count_only, lineups are only counted.
+        """
+        if top_k:
+            return {metric: self.top_k_lineups(team, metric, top_k, constraints) for metric in METRICS}, None
+
+        model, player_in, player_vars = self.team_model(team, constraints)
+        players = list(player_in)
+
+        # Solve the model, keeping only the best lineups per metric while enumerating
+        solver = cp_model.CpSolver()
+        collector = TopLineupCollector(list(player_in.values()), metric_coefficients(players, player_vars), k, count_only)
+        solver.parameters.enumerate_all_solutions = True
+        solver.Solve(model, collector)
+
+        best = {} if count_only else {
+            metric: [(lineup_from_mask(mask, players), score / METRIC_SCALE) for mask, score in collector.top(metric)]
+            for metric in METRICS
+        }
+        return best, collector.solution_count
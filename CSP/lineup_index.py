@@ -0,0 +1,228 @@
+"""
+lineup_index.py
+
+League-wide store of every feasible lineup, built once from the CSP engine so lineup questions can
+be answered without re-solving. Each lineup is stored as the row positions of its players in a
+player table, together with its PTS/REB/AST/DEF totals as integer columns (stat x METRIC_SCALE).
+Everything lives in one .npz file.
+
+Queries are numpy operations over these arrays:
+
+    index = LineupIndex.load()
+    index.top("PTS", n=5, player="Jayson Tatum")                                # top lineups with a player
+    index.top("DEF", n=1, where=[{"feature": "3P tier", "at_least": 1, "min": 2}])  # at least 2 shooters
+    index.pareto(["PTS", "DEF"], team="BOS")                                    # Pareto front of PTS vs DEF
+
+Usage:
+    python CSP/lineup_index.py build [--profile FILE]
+    python CSP/lineup_index.py top PTS --n 5 --team BOS --player "Jayson Tatum"
+    python CSP/lineup_index.py pareto PTS DEF --team BOS
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from lineup_csp import (METRICS, METRIC_SCALE, LineupCSP, load_constraint_profiles, metric_coefficients,
+                        non_dominated, resolve_constraints, rule_mask)
+
+INDEX_VERSION = 1
+DEFAULT_PATH = "CSP/lineup_index.npz"
+FEATURE_COLUMNS = ["G", "PTS", "AST", "REB", "MPG", "3PA", "3P%", "FT%", "STL", "BLK", "eFG%",
+                   "REB/36", "AST/36", "STOCKS/36", "3P tier"]
+
+
+class LineupIndex:
+    """
+    Feasible lineups of every team with their metric totals.
+
+    - players: DataFrame with one row per (team, player), holding Player, Tm, Pos and FEATURE_COLUMNS
+    - lineups: int32 [N, lineup size] row positions into players
+    - lineup_team: int16 [N] positions into teams; lineups of a team are stored contiguously
+    - metrics: int32 [N, len(METRICS)] totals x METRIC_SCALE
+    """
+    def __init__(self, teams, players, lineups, lineup_team, metrics, meta=None):
+        self.teams = list(teams)
+        self.players = players
+        self.lineups = lineups
+        self.lineup_team = lineup_team
+        self.metrics = metrics
+        self.meta = meta or {}
+        starts = np.searchsorted(lineup_team, np.arange(len(self.teams) + 1))
+        self._team_slices = {team: slice(starts[i], starts[i + 1]) for i, team in enumerate(self.teams)}
+        self._player_names = players["Player"].to_numpy()
+        self._features = {column: players[column].to_numpy() for column in players.columns}
+
+    @classmethod
+    def build(cls, engine, constraints=None):
+        """
+        Enumerates every team's feasible lineups under a constraint profile and indexes them.
+        """
+        constraints = resolve_constraints(constraints)
+        rosters, lineups, lineup_team, metrics = [], [], [], []
+        offset = 0
+        for t, team in enumerate(engine.teams):
+            roster = engine.roster_table(team, constraints)
+            masks = engine.enumerate_lineups(team, constraints)
+            players = list(roster["Player"])
+
+            # Expand the bitmasks into sorted roster positions: [N, lineup size]
+            bits = (masks[:, None] >> np.arange(len(players))) & 1
+            positions = np.nonzero(bits)[1].reshape(len(masks), -1) if len(masks) else np.zeros((0, constraints["lineup_size"]), dtype=np.int64)
+
+            coefficients = metric_coefficients(players, engine.roster(team, constraints))
+            table = np.array([coefficients[metric] for metric in METRICS], dtype=np.int32).T.reshape(len(players), len(METRICS))
+            rosters.append(roster)
+            lineups.append(positions + offset)
+            lineup_team.append(np.full(len(masks), t))
+            metrics.append(table[positions].sum(axis=1) if len(masks) else np.zeros((0, len(METRICS)), dtype=np.int32))
+            offset += len(roster)
+
+        players = pd.concat(rosters, ignore_index=True)[["Player", "Tm", "Pos"] + FEATURE_COLUMNS]
+        meta = {'index_version': INDEX_VERSION, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'constraints': constraints}
+        return cls(engine.teams, players, np.concatenate(lineups).astype(np.int32),
+                   np.concatenate(lineup_team).astype(np.int16), np.concatenate(metrics).astype(np.int32), meta)
+
+    def save(self, path=DEFAULT_PATH):
+        """
+        Writes the index to a single .npz file (atomically).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, meta=np.array(json.dumps(self.meta)), teams=np.array(self.teams),
+                 player_names=self.players["Player"].to_numpy(dtype=str), player_teams=self.players["Tm"].to_numpy(dtype=str),
+                 player_positions=self.players["Pos"].to_numpy(dtype=str),
+                 player_features=self.players[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+                 lineups=self.lineups, lineup_team=self.lineup_team, metrics=self.metrics)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """
+        Reads an index written by save().
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive['meta']))
+            if meta.get('index_version') != INDEX_VERSION:
+                raise ValueError(f"{path} has index version {meta.get('index_version')}, expected {INDEX_VERSION}")
+            players = pd.DataFrame(archive['player_features'], columns=FEATURE_COLUMNS)
+            players.insert(0, "Player", archive['player_names'].astype(object))
+            players.insert(1, "Tm", archive['player_teams'].astype(object))
+            players.insert(2, "Pos", archive['player_positions'].astype(object))
+            return cls(archive['teams'].tolist(), players, archive['lineups'], archive['lineup_team'],
+                       archive['metrics'], meta)
+
+    # ---------------------- Queries ----------------------
+
+    def select(self, team=None, player=None, where=None):
+        """
+        Positions of the lineups of a team (or all teams) that contain a player (by name) and satisfy
+        every rule of where, a list of constraint-profile rules (see lineup_csp.DEFAULT_CONSTRAINTS).
+        """
+        if team is not None and team not in self._team_slices:
+            raise ValueError(f"Unknown team {team!r}; the index holds {', '.join(self.teams)}")
+        rows = self._team_slices[team] if team is not None else slice(0, len(self.lineups))
+        positions = np.arange(len(self.lineups))[rows]
+        lineups = self.lineups[rows]
+        keep = np.ones(len(lineups), dtype=bool)
+        if player is not None:
+            keep &= (self._player_names == player)[lineups].any(axis=1)
+        for rule in where or []:
+            counts = rule_mask(self._features, rule)[lineups].sum(axis=1)
+            if "min" in rule:
+                keep &= counts >= rule["min"]
+            if "max" in rule:
+                keep &= counts <= rule["max"]
+        return positions[keep]
+
+    def describe(self, positions):
+        """
+        Lineups at the given positions as (team, [player names], {metric: value}).
+        """
+        return [
+            (self.teams[self.lineup_team[i]], list(self._player_names[self.lineups[i]]),
+             {metric: float(self.metrics[i, m]) / METRIC_SCALE for m, metric in enumerate(METRICS)})
+            for i in positions
+        ]
+
+    def top(self, metric, n=5, team=None, player=None, where=None):
+        """
+        The n lineups with the highest total for a metric among the selected ones. Ties are broken
+        by index position, so the same query always returns the same lineups.
+        """
+        positions = self.select(team, player, where)
+        values = self.metrics[positions, METRICS.index(metric)]
+        if 0 < n < len(positions):
+            # Keep every lineup tied with the n-th best, then let the sort pick among them
+            cutoff = -np.partition(-values, n - 1)[n - 1]
+            candidates = np.flatnonzero(values >= cutoff)
+        else:
+            candidates = np.arange(len(positions))
+        best = candidates[np.lexsort((positions[candidates], -values[candidates]))][:max(n, 0)]
+        return self.describe(positions[best])
+
+    def pareto(self, metrics=("PTS", "DEF"), team=None, player=None, where=None):
+        """
+        The selected lineups that no other selected lineup beats on every one of the given metrics,
+        sorted by the first metric.
+        """
+        positions = self.select(team, player, where)
+        values = self.metrics[positions][:, [METRICS.index(metric) for metric in metrics]]
+        front = positions[non_dominated(values)]
+        front = front[np.argsort(-self.metrics[front, METRICS.index(metrics[0])], kind="stable")]
+        return self.describe(front)
+
+# ---------------------- CLI ----------------------
+
+def print_lineups(results):
+    for i, (team, lineup, values) in enumerate(results, start=1):
+        stats = ", ".join(f"{metric} {value:.1f}" for metric, value in values.items())
+        print(f"{i}. {team}: {', '.join(lineup)} - {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the league-wide lineup index.")
+    parser.add_argument("--index", default=DEFAULT_PATH, help="index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="enumerate every team's lineups and write the index")
+    build.add_argument("--profile", help="JSON/YAML constraint profile file (first profile is used)")
+
+    for name in ("top", "pareto"):
+        command = commands.add_parser(name)
+        if name == "top":
+            command.add_argument("metric", choices=METRICS)
+            command.add_argument("--n", type=int, default=5)
+        else:
+            command.add_argument("metrics", nargs="+", choices=METRICS)
+        command.add_argument("--team")
+        command.add_argument("--player")
+        command.add_argument("--where", type=json.loads, help='JSON list of rules, e.g. \'[{"feature": "3P tier", "at_least": 1, "min": 2}]\'')
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        constraints = load_constraint_profiles(args.profile)[0] if args.profile else None
+        index = LineupIndex.build(LineupCSP(), constraints)
+        index.save(args.index)
+        print(f"Indexed {len(index.lineups)} lineups of {len(index.teams)} teams in {time.perf_counter() - start:.2f}s. "
+              f"Output written to {args.index}")
+        return
+
+    index = LineupIndex.load(args.index)
+    start = time.perf_counter()
+    if args.command == "top":
+        results = index.top(args.metric, args.n, args.team, args.player, args.where)
+    else:
+        results = index.pareto(args.metrics, args.team, args.player, args.where)
+    elapsed = time.perf_counter() - start
+    print_lineups(results)
+    print(f"{len(results)} lineups in {elapsed * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+repo_root.py
+
+Puts the repository root on the import path so the scripts in this folder can import the shared
+instrumentation.py, whichever folder they are started from. Import it before instrumentation.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
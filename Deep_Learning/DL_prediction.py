@@ -10,150 +10,100 @@ Techniques used:
 - Embedding layer to encode player identities
 - Home/Away flag as input feature
 - MSE loss with adjusted per-36-minute scaling
+- Batched inference over every unique lineup at once (lineup_model.py)
+- Per-lineup totals (starts, games, minutes) read from the lineup store when it is up to date,
+  otherwise counted with array operations over integer lineup codes
+- Mini-batch training with a by-game validation split, early stopping and resumable checkpoints (training.py)
 - Output includes best/worst starting lineups and top-performing non-starting lineups
 """
 
-import torch
-import torch.nn as nn
-import torch.optim as optim
+import argparse
+import numpy as np
 import pandas as pd
-import ast
-from torch.nn.utils.rnn import pad_sequence
-from collections import defaultdict, Counter
+import torch
+from collections import defaultdict
+from columnar_cache import load_lineup_performance, LINEUP_COLUMNS
+from lineup_model import Net, predict_impact, adjusted_impact, save_model_artifact, load_model_artifact
+from lineup_store import starting_rows, stored_aggregates
+from model_artifact import DEFAULT_PATH as ARTIFACT_PATH
+from player_ids import PlayerIds
+from training import DEFAULT_CONFIG, train_model
+import repo_root  # noqa: F401  (puts instrumentation.py on the import path)
+import instrumentation
+from instrumentation import span
 
-# ---------------------- Constants & Data Preprocessing ----------------------
+# ---------------------- Constants ----------------------
 
+LINEUP_PATH = 'Deep_Learning/lineup_performance.csv'
 epsilon = 1e-6
 abbrs = ["ATL", "BOS", "BRK", "CHO", "CHI", "CLE", "DAL", "DEN", "DET", "GSW", "HOU", "IND",
          "LAC", "LAL", "MEM", "MIA", "MIL", "MIN", "NOP", "NYK", "OKC", "ORL", "PHI", "PHO",
          "POR", "SAC", "SAS", "TOR", "UTA", "WAS"]
 
-# Load data
-data = pd.read_csv('Deep_Learning/lineup_performance.csv')
-data['Impact per 36'] = (data['Net Impact'] / (data['Minutes Played'] + epsilon)) * 36
-data['Impact per 36'] = data['Impact per 36'].clip(-40, 40)
+# ---------------------- Lineup Ingestion ----------------------
+
+def ingest_lineups(data, player_ids):
+    """
+    Encodes every lineup once into a contiguous int32 [N, 5] array of model indices, where the
+    players that appear are numbered 1..K in name order (0 is reserved for padding, and stands for
+    a missing player), plus an int32 home/away vector. Returns (lineups, is_home, index_to_player).
+    """
+    dictionary_ids = data[LINEUP_COLUMNS].to_numpy(dtype=np.int32)
+    used = np.unique(dictionary_ids)
+    used = used[used > 0]  # Player ID 0 is "no player"
+    names = player_ids.decode(used)
+    order = np.argsort(names, kind='stable')
+    to_index = np.zeros(dictionary_ids.max() + 1, dtype=np.int32)
+    to_index[used[order]] = np.arange(1, len(used) + 1, dtype=np.int32)
+    lineups = np.ascontiguousarray(to_index[dictionary_ids])
+    is_home = (data['Team'] == 'Home').to_numpy(dtype=np.int32)
+    index_to_player = np.concatenate([[None], names[order]])
+    return lineups, is_home, index_to_player
 
-# ---------------------- Model Definition ----------------------
 
-class Net(nn.Module):
+def encode_lineup_keys(lineups):
     """
-    Simple feedforward neural network with an embedding layer for player IDs
-    and a flag for home/away.
+    Numbers the distinct lineups of an [N, 5] index array 0..L-1 in order of first appearance.
+    Each row is packed into one int64 key (five digits in base max index + 1) and the keys are
+    hashed, so no per-row tuples are built. Returns (codes per row, first row of each lineup).
     """
-    def __init__(self, num_players, embedding_dim, hidden_size, output_size):
-        super(Net, self).__init__()
-        self.embeddings = nn.Embedding(num_players, embedding_dim, padding_idx=0)
-        self.fc1 = nn.Linear(embedding_dim + 1, hidden_size)
-        self.relu = nn.ReLU()
-        self.fc2 = nn.Linear(hidden_size, output_size)
-
-    def forward(self, lineup):
-        embedded_lineup = self.embeddings(lineup[:, :-1])
-        home_away_info = lineup[:, -1].float().unsqueeze(-1)
-        embedded_lineup = embedded_lineup.sum(dim=1)
-        combined = torch.cat((embedded_lineup, home_away_info), dim=-1)
-        x = self.fc1(combined)
-        x = self.relu(x)
-        return self.fc2(x)
-
-def lineup_to_indices(lineup, player_to_index, is_home):
+    base = int(lineups.max()) + 1
+    if base ** lineups.shape[1] < 2 ** 63:
+        packed = np.zeros(len(lineups), dtype=np.int64)
+        for column in lineups.T:
+            packed = packed * base + column
+        keys = pd.Index(packed)
+    else:  # Too many players to pack a lineup into an int64
+        keys = pd.MultiIndex.from_arrays(list(lineups.T))
+    codes, _ = keys.factorize()
+    first_rows = np.flatnonzero(~keys.duplicated())
+    return codes, first_rows
+
+def lineup_totals(data, lineup_codes, num_lineups):
     """
-    Converts a lineup and team info into player indices + home/away flag.
+    Distinct games and total minutes of every lineup code, with the minutes summed in row order.
+    Returns (total_games, total_minutes).
     """
-    lineup_indices = [player_to_index[player] for player in lineup]
-    home_away_info = [1 if is_home else 0]
-    return lineup_indices + home_away_info
-
-# ---------------------- Starting Lineup Detection ----------------------
-
-# Extract starting lineups (first home and away entries for each game)
-starting_lineups = []
-for game_id, game_data in data.groupby('GameID'):
-    home_lineup, away_lineup = None, None
-    for _, row in game_data.iterrows():
-        lineup = ast.literal_eval(row['Lineup'])
-        if row['Team'] == 'Away' and away_lineup is None:
-            away_lineup = lineup
-        if row['Team'] == 'Home' and home_lineup is None:
-            home_lineup = lineup
-        if home_lineup and away_lineup:
-            break
-    if home_lineup and away_lineup:
-        starting_lineups.append((game_id, 'Home', home_lineup))
-        starting_lineups.append((game_id, 'Away', away_lineup))
-
-# Filter starting lineups with at least 3 appearances
-lineup_counts = Counter(tuple(sorted(lineup)) for _, _, lineup in starting_lineups)
-lineup_threshold = 3
-valid_lineups = [lineup for lineup, count in lineup_counts.items() if count >= lineup_threshold]
-filtered_starting_lineups = [
-    (game_id, team, lineup)
-    for game_id, team, lineup in starting_lineups
-    if tuple(sorted(lineup)) in valid_lineups
-]
-
-# ---------------------- Prepare Training Data ----------------------
-
-all_players = sorted(set(player for lineup_str in data['Lineup'] for player in ast.literal_eval(lineup_str)))
-player_to_index = {player: idx + 1 for idx, player in enumerate(all_players)}  # reserve 0 for padding
-
-X_train = [
-    torch.tensor(lineup_to_indices(ast.literal_eval(row['Lineup']), player_to_index, row['Team'] == 'Home'), dtype=torch.long)
-    for _, row in data.iterrows()
-]
-X_train = pad_sequence(X_train, batch_first=True, padding_value=0)
-y_train = torch.tensor(list(data['Impact per 36']), dtype=torch.float32).reshape(-1, 1)
-
-# ---------------------- Train the Model ----------------------
-
-input_size = len(all_players) + 1
-embedding_dim, hidden_size, output_size = 16, 32, 1
-
-model = Net(input_size, embedding_dim, hidden_size, output_size)
-criterion = nn.MSELoss()
-optimizer = optim.Adam(model.parameters(), lr=0.01)
-
-for epoch in range(500):
-    y_pred = model(X_train)
-    loss = criterion(y_pred, y_train)
-    optimizer.zero_grad()
-    loss.backward()
-    optimizer.step()
-    if (epoch + 1) % 20 == 0:
-        print(f'Epoch [{epoch + 1}/500], Loss: {loss.item():.4f}')
-
-# ---------------------- Lineup Prediction ----------------------
-
-lineup_to_rows = defaultdict(list)
-for _, row in data.iterrows():
-    lineup = tuple(sorted(ast.literal_eval(row['Lineup'])))
-    lineup_to_rows[lineup].append(row)
-
-unique_predictions = []
-with torch.no_grad():
-    for lineup_tuple, rows in lineup_to_rows.items():
-        total_games = len(set(row['GameID'] for row in rows))
-        total_minutes = sum(row['Minutes Played'] for row in rows)
-        abbr = rows[0]['Abbr']
-        is_home = rows[0]['Team'] == 'Home'
-        lineup = list(lineup_tuple)
-        lineup_vector = lineup_to_indices(lineup, player_to_index, is_home)
-        lineup_tensor = torch.tensor([lineup_vector], dtype=torch.long)
-        lineup_tensor = pad_sequence(lineup_tensor, batch_first=True, padding_value=0)
-        predicted_impact_per_36 = model(lineup_tensor).item()
-        adjusted_impact = predicted_impact_per_36 * (total_minutes / (total_minutes + 100))
-        unique_predictions.append((lineup, adjusted_impact, abbr, total_games, total_minutes, predicted_impact_per_36))
-
-valid_lineup_set = set(tuple(sorted(lineup)) for _, _, lineup in filtered_starting_lineups)
-filtered_predictions = [p for p in unique_predictions if tuple(sorted(p[0])) in valid_lineup_set]
-filtered_predictions.sort(key=lambda x: x[1], reverse=True)
-
-non_starting_predictions = [
-    p for p in unique_predictions
-    if tuple(sorted(p[0])) not in valid_lineup_set and p[3] >= 5
-]
-non_starting_predictions.sort(key=lambda x: x[1], reverse=True)
+    game_pairs = pd.DataFrame({'lineup': lineup_codes, 'game': data['GameID'].cat.codes.to_numpy()}).drop_duplicates()
+    total_games = np.bincount(game_pairs['lineup'].to_numpy(), minlength=num_lineups)
+    total_minutes = np.bincount(lineup_codes, weights=data['Minutes Played'].to_numpy(dtype=np.float64),
+                                minlength=num_lineups)
+    return total_games, total_minutes
 
+def stored_totals(aggregates, data, first_rows):
+    """
+    Looks up the starts, distinct games and total minutes of every lineup (by the P1..P5 IDs of its
+    first row) in a lineup store's aggregates. Returns None without aggregates, or when a lineup is
+    missing from them.
+    """
+    if aggregates is None:
+        return None
+    keys = pd.MultiIndex.from_frame(data[LINEUP_COLUMNS].iloc[first_rows].astype(np.int64))
+    found = aggregates.reindex(keys)
+    if found['games'].isna().any():
+        return None
+    return (found['starts'].to_numpy(dtype=np.int64), found['games'].to_numpy(dtype=np.int64),
+            found['total_minutes'].to_numpy(dtype=np.float64))
 
 # ---------------------- Output Formatting ----------------------
 
@@ -188,5 +138,143 @@ def write_team_lineups_for_abbrs(filtered_predictions, non_starting_predictions,
                 f.write(f"Adjusted Impact: {impact:.2f} |  Per 36: {per36:.2f} | Games: {games} | Minutes: {minutes:.1f} | Lineup: {', '.join(lineup)}\n")
             f.write("\n\n")
 
-write_team_lineups_for_abbrs(filtered_predictions, non_starting_predictions, abbrs, output_filename='Deep_Learning/lineup_predictions.txt')
-print("Finished! Info output to lineup_predictions.txt.")
\ No newline at end of file
+# ---------------------- Main ----------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the lineup impact model and write lineup_predictions.txt.")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_CONFIG['epochs'])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_CONFIG['batch_size'])
+    parser.add_argument("--lr", type=float, default=DEFAULT_CONFIG['lr'])
+    parser.add_argument("--val-fraction", type=float, default=DEFAULT_CONFIG['val_fraction'],
+                        help="fraction of games held out for validation")
+    parser.add_argument("--patience", type=int, default=DEFAULT_CONFIG['patience'],
+                        help="epochs without validation improvement before stopping")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CONFIG['num_workers'], help="DataLoader worker processes")
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG['seed'])
+    parser.add_argument("--checkpoint", default="Deep_Learning/checkpoints/net.pt", help="resumable checkpoint path")
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint if it exists")
+    parser.add_argument("--artifact", default=ARTIFACT_PATH,
+                        help="where the trained model, its player vocabulary and hyperparameters are saved")
+    parser.add_argument("--predict-only", action="store_true",
+                        help="skip training and score lineups with the model saved at --artifact")
+    parser.add_argument("--inference-batch-size", type=int, default=65536, help="lineups scored per forward pass")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    instrumentation.start_run("DL_prediction", args)
+
+    # Load data (through the columnar cache, with the lineup stored as player ID columns)
+    with span("load CSV") as load_span:
+        player_ids = PlayerIds.load()
+        data = load_lineup_performance(LINEUP_PATH, player_ids)
+        load_span.rows = len(data)
+
+    with span("encode lineups", rows=len(data)):
+        lineups, is_home, index_to_player = ingest_lineups(data, player_ids)
+        # Rows of the lineup array are already in name order, so its five indices identify a lineup
+        lineup_codes, first_rows = encode_lineup_keys(lineups)
+        num_lineups = len(first_rows)
+
+    # ---------------------- Lineup Totals ----------------------
+
+    with span("lineup totals", rows=len(data)) as totals_span:
+        # The lineup store kept next to the CSV by from_sorted_filtered_to_lineups.py already has
+        # every lineup's totals; they are only counted from the stints when it is missing or stale
+        totals = stored_totals(stored_aggregates(LINEUP_PATH, player_ids, len(data)), data, first_rows)
+        totals_span.fields['stored'] = totals is not None
+        if totals is not None:
+            starts, total_games, total_minutes = totals
+        else:
+            # Starting lineups are the first home and away stints of each game that has both; count
+            # the games each lineup started, whichever side it was on
+            starts = np.bincount(lineup_codes[starting_rows(data)], minlength=num_lineups)
+            total_games, total_minutes = lineup_totals(data, lineup_codes, num_lineups)
+
+    # ---------------------- Starting Lineup Detection ----------------------
+
+    with span("detect starters", rows=num_lineups) as starters_span:
+        # Keep starting lineups with at least 3 appearances
+        lineup_threshold = 3
+        is_starter = starts >= lineup_threshold
+        starters_span.fields['starters'] = int(is_starter.sum())
+
+    # ---------------------- Train the Model ----------------------
+
+    all_players = list(index_to_player[1:])
+    input_size = len(all_players) + 1
+    embedding_dim, hidden_size, output_size = 16, 32, 1
+
+    # Maps this data's player indices to the model's embedding indices
+    to_model_index = np.arange(input_size)
+    unknown_player = np.zeros(input_size, dtype=bool)
+
+    if args.predict_only:
+        model, meta = load_model_artifact(args.artifact)
+        artifact_index = {player: i + 1 for i, player in enumerate(meta['players'])}
+        to_model_index = np.array([0] + [artifact_index.get(player, 0) for player in all_players])
+        # Players the model has no embedding for would be scored as the padding slot, so their
+        # lineups are left out of the predictions (like LineupScorer.encode refusing them)
+        unknown_player[1:] = to_model_index[1:] == 0
+        print(f"Loaded model from {args.artifact} (created {meta['created']}, {int(unknown_player.sum())} players unknown to it)")
+    else:
+        # Five player indices followed by the home/away flag for every row, and the clipped impact
+        # per 36 minutes to learn (only built when training)
+        with span("build tensors", rows=len(data)):
+            data['Impact per 36'] = (data['Net Impact'] / (data['Minutes Played'] + epsilon)) * 36
+            data['Impact per 36'] = data['Impact per 36'].clip(-40, 40)
+            X_train = torch.from_numpy(np.column_stack([lineups, is_home]).astype(np.int64))
+            y_train = torch.from_numpy(data['Impact per 36'].to_numpy(dtype=np.float32)).reshape(-1, 1)
+        model = Net(input_size, embedding_dim, hidden_size, output_size)
+        config = {'epochs': args.epochs, 'batch_size': args.batch_size, 'lr': args.lr,
+                  'val_fraction': args.val_fraction, 'patience': args.patience,
+                  'num_workers': args.workers, 'seed': args.seed}
+        with span("train", rows=len(X_train)) as train_span:
+            model, history = train_model(model, X_train, y_train, data['GameID'].cat.codes.to_numpy(), config,
+                                         checkpoint_path=args.checkpoint, resume=args.resume)
+            train_span.fields['epochs'] = len(history)
+        hyperparameters = {'embedding_dim': embedding_dim, 'hidden_size': hidden_size, 'output_size': output_size}
+        with span("write model"):
+            save_model_artifact(model, all_players, hyperparameters, args.artifact, config)
+        print(f"Model artifact saved to {args.artifact}")
+
+    # ---------------------- Lineup Prediction ----------------------
+
+    with span("group lineups", rows=num_lineups):
+        # One [N, 6] tensor holding every unique lineup, using the home/away flag of its first stint
+        unique_lineups = np.column_stack([to_model_index[lineups[first_rows]], is_home[first_rows]]).astype(np.int64)
+
+    with span("inference", rows=num_lineups):
+        predicted_per_36 = predict_impact(model, torch.from_numpy(unique_lineups), args.inference_batch_size)
+        adjusted = adjusted_impact(predicted_per_36, total_minutes)
+
+    with span("rank lineups", rows=num_lineups):
+        # Highest adjusted impact first (stable, so ties keep first-appearance order); only the
+        # lineups that can be written out are turned into prediction tuples. Lineups with a missing
+        # player are trained on but not ranked, and lineups with unknown players are not ranked
+        order = np.argsort(-adjusted, kind='stable')
+        rankable = (lineups[first_rows] > 0).all(axis=1)
+        unscorable = unknown_player[lineups[first_rows]].any(axis=1)
+        if unscorable.any():
+            print(f"Skipping {int(unscorable.sum())} lineups with players unknown to the model")
+        order = order[(rankable & ~unscorable)[order]]
+        starting_order = order[is_starter[order]]
+        non_starting_order = order[~is_starter[order] & (total_games[order] >= 5)]
+        team_abbrs = data['Abbr'].to_numpy(dtype=object)
+
+        def predictions(rows):
+            return [(list(index_to_player[lineups[first_rows[i]]]), adjusted[i], team_abbrs[first_rows[i]],
+                     total_games[i], total_minutes[i], predicted_per_36[i]) for i in rows]
+
+        filtered_predictions = predictions(starting_order)
+        non_starting_predictions = predictions(non_starting_order)
+
+    with span("write output", rows=len(filtered_predictions) + len(non_starting_predictions)):
+        write_team_lineups_for_abbrs(filtered_predictions, non_starting_predictions, abbrs, output_filename='Deep_Learning/lineup_predictions.txt')
+    print("Finished! Info output to lineup_predictions.txt.")
+
+
+if __name__ == "__main__":
+    main()
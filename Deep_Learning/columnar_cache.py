@@ -0,0 +1,201 @@
+"""
+columnar_cache.py
+
+Shared on-disk columnar cache for the CSV files passed between the Deep_Learning stages. The first
+load of a CSV parses it once into schema-typed columns and writes them to Deep_Learning/.cache/ as
+Feather (or pickle when pyarrow is not installed). Later loads read the binary copy directly:
+- team abbreviations and GameIDs are categorical
+- player columns hold integer IDs from player_ids.json (0 = no player)
+- the lineup_performance Lineup tuple is stored as five int columns P1..P5
+- play-by-play rows get a GameSeconds column (elapsed game seconds, from Period and Time), so the
+  clock strings are parsed once per cache entry
+
+A cache entry is keyed on the SHA-256 of its source CSV, so editing or regenerating the CSV
+invalidates it. The hash is only recomputed when the file's size or modification time changes.
+An entry also records a hash of the player names its IDs were assigned from, and is rebuilt when
+player_ids.json no longer starts with those names (e.g. after it was regenerated).
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from lineup_stints import game_seconds
+from player_ids import PlayerIds, DEFAULT_PATH as PLAYER_IDS_PATH
+
+try:
+    import pyarrow  # noqa: F401  (only needed for Feather)
+    CACHE_FORMAT = "feather"
+except ImportError:
+    CACHE_FORMAT = "pickle"
+
+CACHE_DIR = os.path.dirname(PLAYER_IDS_PATH)
+SCHEMA_VERSION = 3
+
+AWAY_COLS = ['A1', 'A2', 'A3', 'A4', 'A5']
+HOME_COLS = ['H1', 'H2', 'H3', 'H4', 'H5']
+PLAYER_COLUMNS = AWAY_COLS + HOME_COLS + ['AwayIn', 'AwayOut', 'HomeIn', 'HomeOut']
+LINEUP_COLUMNS = ['P1', 'P2', 'P3', 'P4', 'P5']
+
+# ---------------------- Source Hashing ----------------------
+
+def file_hash(path, block_size=1 << 22):
+    """
+    SHA-256 of a file's contents, read in 4 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_signature(path, meta):
+    """
+    Returns (size, mtime_ns, sha256) for path, reusing the hash stored in meta when the size and
+    modification time have not changed.
+    """
+    stat = os.stat(path)
+    if meta and meta.get('source_size') == stat.st_size and meta.get('source_mtime_ns') == stat.st_mtime_ns:
+        return stat.st_size, stat.st_mtime_ns, meta['source_sha256']
+    return stat.st_size, stat.st_mtime_ns, file_hash(path)
+
+def _entry_paths(source_path, kind):
+    """
+    Data and metadata paths of the cache entry for a source file.
+    """
+    source = os.path.abspath(source_path)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    key = hashlib.sha1(source.encode()).hexdigest()[:8]
+    base = os.path.join(CACHE_DIR, f"{kind}-{stem}-{key}")
+    return base + ('.feather' if CACHE_FORMAT == 'feather' else '.pkl'), base + '.json'
+
+# ---------------------- Reading & Writing Entries ----------------------
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+def _write_entry(df, source_path, kind, ids, signature=None):
+    data_path, meta_path = _entry_paths(source_path, kind)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if CACHE_FORMAT == 'feather':
+        df.reset_index(drop=True).to_feather(data_path)
+    else:
+        df.to_pickle(data_path)
+    size, mtime_ns, sha256 = signature or _source_signature(source_path, None)
+    with open(meta_path, 'w') as f:
+        json.dump({'schema_version': SCHEMA_VERSION, 'kind': kind, 'format': CACHE_FORMAT,
+                   'source_size': size, 'source_mtime_ns': mtime_ns, 'source_sha256': sha256,
+                   'player_ids': len(ids), 'player_ids_sha256': ids.names_hash()}, f)
+
+def _load(source_path, kind, read_csv, ids):
+    """
+    Returns the typed frame for source_path from the cache, rebuilding the entry with read_csv when
+    it is missing or stale.
+    """
+    data_path, meta_path = _entry_paths(source_path, kind)
+    meta = _read_meta(meta_path)
+    signature = _source_signature(source_path, meta)
+    if (meta and os.path.exists(data_path)
+            and meta['schema_version'] == SCHEMA_VERSION and meta['format'] == CACHE_FORMAT
+            and meta['source_sha256'] == signature[2] and meta['player_ids'] <= len(ids)
+            and meta['player_ids_sha256'] == ids.names_hash(meta['player_ids'])):
+        return pd.read_feather(data_path) if CACHE_FORMAT == 'feather' else pd.read_pickle(data_path)
+
+    df = read_csv(source_path, ids)
+    ids.save()
+    _write_entry(df, source_path, kind, ids, signature)
+    return df
+
+# ---------------------- Play-by-Play ----------------------
+
+def _type_play_by_play(df, ids):
+    """
+    Converts a sorted play-by-play frame into the cached schema.
+    """
+    df = df.copy()
+    if 'Date' in df:
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+    for col in ('GameID', 'AwayName', 'HomeName'):
+        if col in df:
+            df[col] = df[col].astype('category')
+    for col in PLAYER_COLUMNS:
+        if col in df:
+            df[col] = ids.encode(df[col])
+    if 'Period' in df and 'Time' in df:
+        df['GameSeconds'] = game_seconds(df['Period'], df['Time'])
+    return df
+
+def _read_play_by_play_csv(path, ids):
+    return _type_play_by_play(pd.read_csv(path, encoding="ISO-8859-1", delimiter=","), ids)
+
+def load_play_by_play(path, ids=None):
+    """
+    Loads a sorted play-by-play CSV (e.g. sorted_filtered_2021_22_season.csv) through the cache.
+    Player columns come back as integer IDs; use decode_players() to get names.
+    """
+    return _load(path, 'play_by_play', _read_play_by_play_csv, ids if ids is not None else PlayerIds.load())
+
+def decode_players(df, ids):
+    """
+    Returns a copy of a cached play-by-play frame with the player ID columns turned back into names.
+    """
+    df = df.copy()
+    for col in PLAYER_COLUMNS:
+        if col in df:
+            df[col] = ids.decode(df[col].to_numpy())
+    return df
+
+# ---------------------- Lineup Performance ----------------------
+
+def _type_lineup_performance(df, ids):
+    """
+    Converts lineup_performance rows into the cached schema, with the Lineup column (tuples or their
+    string form) replaced by the five player ID columns P1..P5.
+    """
+    lineups = df['Lineup']
+    if len(lineups) and isinstance(lineups.iloc[0], str):
+        encoded = ids.encode_lineup_strings(lineups)
+    else:
+        encoded = ids.encode(np.array(list(lineups), dtype=object).ravel()).reshape(len(lineups), 5)
+
+    position = df.columns.get_loc('Lineup')
+    df = df.drop(columns='Lineup')
+    for i, col in enumerate(LINEUP_COLUMNS):
+        df.insert(position + i, col, encoded[:, i])
+    for col in ('GameID', 'Team', 'Abbr'):
+        df[col] = df[col].astype('category')
+    return df
+
+def _read_lineup_performance_csv(path, ids):
+    return _type_lineup_performance(pd.read_csv(path), ids)
+
+def load_lineup_performance(path, ids=None):
+    """
+    Loads lineup_performance.csv through the cache, with the lineup as player ID columns P1..P5.
+    """
+    return _load(path, 'lineup_performance', _read_lineup_performance_csv, ids if ids is not None else PlayerIds.load())
+
+def store_lineup_performance(stints, path, ids=None):
+    """
+    Writes stints (as returned by lineup_stints.extract_stints) to the lineup_performance CSV at path
+    and stores the typed copy in the cache, so the next stage does not have to parse the CSV.
+    """
+    ids = ids if ids is not None else PlayerIds.load()
+    stints.to_csv(path, index=False)
+    typed = _type_lineup_performance(stints, ids)
+    ids.save()
+    _write_entry(typed, path, 'lineup_performance', ids)
+    return typed
+
+def lineup_tuples(df, ids):
+    """
+    Decodes the P1..P5 columns of a cached lineup_performance frame into an array of name tuples.
+    """
+    names = ids.decode(df[LINEUP_COLUMNS].to_numpy())
+    result = np.empty(len(names), dtype=object)
+    result[:] = [tuple(row) for row in names]
+    return result
@@ -1,27 +1,58 @@
+import argparse
 import pandas as pd
+from columnar_cache import load_play_by_play
+from season_filter import season_bounds, filter_season
+import repo_root  # noqa: F401  (puts instrumentation.py on the import path)
+import instrumentation
+from instrumentation import span
 
 """
-Takes all_games.csv, filters it donw to the 2021-22 NBA season and outputs that in sorted
-chronological order to sorted_filtered_2021-22_season.csv.
+Takes all_games.csv, filters it down to one NBA season (2021-22 by default) and outputs that in sorted
+chronological order to sorted_filtered_2021_22_season.csv.
+
+The input is streamed in chunks and sorted with an external merge sort (see season_filter.py), so memory
+stays under --memory-limit-mb no matter how big all_games.csv is. Use --season or --start/--end to
+extract a different season the same way. The output is also loaded into the columnar cache
+(columnar_cache.py) so from_sorted_filtered_to_lineups.py can read it without parsing the CSV.
 """
 
-# Load the original CSV file
-df = pd.read_csv("Deep_Learning/all_games.csv", encoding="ISO-8859-1", delimiter=",", on_bad_lines='skip')
 
-# Convert 'Date' column to datetime format
-df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y')
+def main():
+    parser = argparse.ArgumentParser(description="Filter all_games.csv down to one season, sorted by Date, GameID and PlayNum.")
+    parser.add_argument("--input", default="Deep_Learning/all_games.csv")
+    parser.add_argument("--output", default="Deep_Learning/sorted_filtered_2021_22_season.csv")
+    parser.add_argument("--season", default="2021-22", help="season to extract, e.g. 2021-22 (September to June)")
+    parser.add_argument("--start", help="first date to keep (YYYY-MM-DD), overrides --season")
+    parser.add_argument("--end", help="last date to keep (YYYY-MM-DD), overrides --season")
+    parser.add_argument("--chunksize", type=int, default=200_000,
+                        help="most rows read from the input at a time (fewer when a chunk would not fit in a quarter of --memory-limit-mb)")
+    parser.add_argument("--memory-limit-mb", type=int, default=512,
+                        help="cap on the data held while filtering and sorting (parsed chunk plus buffered rows); "
+                             "parser and interpreter overhead come on top")
+    parser.add_argument("--tmp-dir", help="directory for spilled runs (defaults to the system temp dir)")
+    parser.add_argument("--no-cache", action="store_true", help="skip building the columnar cache for the output")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.start_run("filter_to_2021-22", args)
+
+    start, end = season_bounds(args.season)
+    if args.start:
+        start = pd.Timestamp(args.start)
+    if args.end:
+        end = pd.Timestamp(args.end)
 
-# Filter the data for the 2021-2022 season (after August 2021 and before July 2022)
-df_2021_22 = df[((df['Date'].dt.year == 2021) & (df['Date'].dt.month >= 9)) |  # After August 2021
-                ((df['Date'].dt.year == 2022) & (df['Date'].dt.month <= 6))]  # Before July 2022
+    # Reads, filters and sorts all_games.csv and writes the season, in one streaming pass
+    with span("filter season", path=args.input) as filter_span:
+        rows = filter_season(args.input, args.output, start, end, chunksize=args.chunksize,
+                             memory_limit_mb=args.memory_limit_mb, tmp_dir=args.tmp_dir)
+        filter_span.rows = rows
+    print(f"Filtered and sorted {rows} plays from {start.date()} to {end.date()} saved to '{args.output}'")
 
-# Sort the data:
-# 1. By 'Date' (game start time) in ascending order (earliest dates first)
-# 2. By 'GameID' (to group all plays of the same game together) in ascending order
-# 3. By 'PlayNum' in ascending order (to keep plays in correct order within each game)
-df_sorted = df_2021_22.sort_values(by=['Date', 'GameID', 'PlayNum'], ascending=[True, True, True])
+    if not args.no_cache:
+        with span("build cache", rows=rows, path=args.output):
+            load_play_by_play(args.output)
+        print("Columnar cache updated.")
 
-# Save the sorted data to a new CSV file
-df_sorted.to_csv('Deep_Learning/sorted_filtered_2021_22_season.csv', index=False)
 
-print("Filtered and sorted data saved to 'sorted_filtered_2021_22_season.csv'")
+if __name__ == "__main__":
+    main()
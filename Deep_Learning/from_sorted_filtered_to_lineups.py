@@ -1,271 +1,120 @@
+import argparse
+import time
 import pandas as pd
-from datetime import datetime
+from columnar_cache import load_play_by_play, decode_players
+from lineup_stints import check_parity, extract_stints
+from lineup_store import last_play_date, read_new_plays, update_lineup_store, write_lineup_store
+from parallel_stints import extract_files
+from player_ids import PlayerIds
+import repo_root  # noqa: F401  (puts instrumentation.py on the import path)
+import instrumentation
+from instrumentation import span
 
 """
-This script tracks the net ratings and minutes played of each lineup on the court during the 2021-2022 NBA season. 
+This script tracks the net ratings and minutes played of each lineup on the court during the 2021-2022 NBA season.
 The net rating is calculated as the difference between points scored and points allowed by each lineup.
 Takes sorted_filtered_2021_22_season.csv and gets every lineup for both teams in every game, piping
 it into lineup_performance.csv.
-"""
 
-df = pd.read_csv("Deep_Learning/sorted_filtered_2021_22_season.csv", encoding="ISO-8859-1", delimiter=",")
+The stint boundaries are found with columnar operations in lineup_stints.py. Pass --check-parity N to
+compare the result against the original row-by-row loop on a random sample of N games first.
+Both the input and the output go through the columnar cache (columnar_cache.py).
+
+In-season, pass --incremental to only process the games that are not in lineup_performance.csv yet:
+their stints are appended and the per-lineup totals updated in place (lineup_store.py).
 
-# Convert 'Date' column to datetime format for easy comparison
-df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+With --workers N the games are split into shards that are extracted across N processes
+(parallel_stints.py). Several seasons can be passed at once (--input a.csv b.csv --output
+a_lineups.csv b_lineups.csv) and share the same pool. --incremental, --workers and --check-parity
+are separate modes and cannot be combined.
 
-lineup_stats = []
+Minutes are measured on the game clock (elapsed game seconds, with overtime periods of 5 minutes),
+and every game's last lineups are closed at the end of its final period. --legacy-clock reproduces
+the rows and minutes of the original script, which only closed the last game's final lineups; the
+parity check always uses it.
+"""
 
-previous_game_id = None
-previous_period = None
+INPUT_PATH = "Deep_Learning/sorted_filtered_2021_22_season.csv"
+OUTPUT_PATH = "Deep_Learning/lineup_performance.csv"
 
-# Tracking variables (reset at the start of each game/quarter)
-current_away_lineup = None
-current_home_lineup = None
-away_score_at_entry_for_away = None
-home_score_at_entry_for_away = None
-home_score_at_entry_for_home = None
-away_score_at_entry_for_home = None
-away_entry_time_for_away = None
-home_entry_time_for_home = None
 
-def calculate_minutes_played(start_time, end_time):
+def run_single(input_path, output_path, ids, check_parity_games, clock):
     """
-    Gets the start and end time for each lineup and gets the total 
-    minutes played in that shift.
+    Extracts one season in this process, through the play-by-play cache.
     """
-    if start_time is None or end_time is None:
-        return 0  # No time data available yet
-    try:
-        start = datetime.strptime(start_time.split(".")[0], "%M:%S")
-        end = datetime.strptime(end_time.split(".")[0], "%M:%S")
-        return abs((start - end).total_seconds() / 60)
-    except Exception as e:
-        print(f"Error calculating minutes played between {start_time} and {end_time}: {e}")
-        return 0
-
-
-
-for index, row in df.iterrows():
-    game_id = row['GameID']
-    current_period = row['Period']
-
-    # If new game starts, reset all tracking variables
-    if game_id != previous_game_id:
-        away_entry_time_for_away = "12:00"
-        home_entry_time_for_home = "12:00"
-
-        print(f"Processing new game: {game_id}")
-    
-        first_row = df[df["GameID"] == game_id].iloc[0]
-        current_away_lineup = tuple(sorted([first_row['A1'], first_row['A2'], first_row['A3'], first_row['A4'], first_row['A5']]))
-        current_home_lineup = tuple(sorted([first_row['H1'], first_row['H2'], first_row['H3'], first_row['H4'], first_row['H5']]))
-
-        # Reset score tracking
-        away_score_at_entry_for_away = first_row['AwayScore']
-        home_score_at_entry_for_away = first_row['HomeScore']
-        home_score_at_entry_for_home = first_row['HomeScore']
-        away_score_at_entry_for_home = first_row['AwayScore']
-
-        previous_game_id = game_id
-        previous_period = current_period
-    
-    # If new quarter starts in the same game, capture the previous lineups' performance and reset
-    elif current_period != previous_period:
-        away_entry_time_for_away = "12:00"
-        home_entry_time_for_home = "12:00"
-
-        print(f"Processing new period: {current_period} in game: {game_id}")
-        
-        # Record performance of the previous lineups before the quarter break
-        points_scored_away = row['AwayScore'] - away_score_at_entry_for_away
-        points_allowed_away = row['HomeScore'] - home_score_at_entry_for_away
-        net_impact_away = points_scored_away - points_allowed_away
-
-        lineup_stats.append({
-            'GameID': row['GameID'],
-            'Period': previous_period,  # Use previous period since this is for end of that period
-            'Time': "00:00",  # End of quarter
-            'Team': 'Away',
-            'Abbr': row['AwayName'],
-            'Lineup': current_away_lineup,
-            'Points Scored': points_scored_away,
-            'Points Allowed': points_allowed_away,
-            'Net Impact': net_impact_away,
-            'Minutes Played': calculate_minutes_played(away_entry_time_for_away, row['Time'])
-        })
-        
-        away_entry_time_for_away = row['Time']
-
-        points_scored_home = row['HomeScore'] - home_score_at_entry_for_home
-        points_allowed_home = row['AwayScore'] - away_score_at_entry_for_home
-        net_impact_home = points_scored_home - points_allowed_home
-
-        lineup_stats.append({
-            'GameID': row['GameID'],
-            'Period': previous_period,  # Use previous period since this is for end of that period
-            'Time': "00:00",  # End of quarter
-            'Team': 'Home',
-            'Abbr': row['HomeName'],
-            'Lineup': current_home_lineup,
-            'Points Scored': points_scored_home,
-            'Points Allowed': points_allowed_home,
-            'Net Impact': net_impact_home,
-            'Minutes Played': calculate_minutes_played(home_entry_time_for_home, row['Time'])
-
-        })
-        
-        home_entry_time_for_home = row['Time']
-
-        # Get the lineups for the new quarter
-        # Find the first row of the new period
-        first_row_of_period = df[(df["GameID"] == game_id) & (df["Period"] == current_period)].iloc[0]
-        current_away_lineup = tuple(sorted([first_row_of_period['A1'], first_row_of_period['A2'], 
-                                           first_row_of_period['A3'], first_row_of_period['A4'], 
-                                           first_row_of_period['A5']]))
-        current_home_lineup = tuple(sorted([first_row_of_period['H1'], first_row_of_period['H2'], 
-                                           first_row_of_period['H3'], first_row_of_period['H4'], 
-                                           first_row_of_period['H5']]))
-
-        # Reset score tracking for the new period
-        away_score_at_entry_for_away = row['AwayScore']
-        home_score_at_entry_for_away = row['HomeScore']
-        home_score_at_entry_for_home = row['HomeScore']
-        away_score_at_entry_for_home = row['AwayScore']
-        
-        previous_period = current_period
-
-    # Check if away sub occurred
-    away_sub = not pd.isna(row['AwayIn']) or not pd.isna(row['AwayOut'])
-    home_sub = not pd.isna(row['HomeIn']) or not pd.isna(row['HomeOut'])
-
-    if away_sub:
-        points_scored_away = row['AwayScore'] - away_score_at_entry_for_away
-        points_allowed_away = row['HomeScore'] - home_score_at_entry_for_away
-        net_impact_away = points_scored_away - points_allowed_away
-
-        lineup_stats.append({
-            'GameID': row['GameID'],
-            'Period': row['Period'],
-            'Time': row['Time'],
-            'Team': 'Away',
-            'Abbr': row['AwayName'],
-            'Lineup': current_away_lineup,
-            'Points Scored': points_scored_away,
-            'Points Allowed': points_allowed_away,
-            'Net Impact': net_impact_away,
-            'Minutes Played': calculate_minutes_played(away_entry_time_for_away, row['Time'])
-
-        })
-
-        away_entry_time_for_away = row['Time']
-
-        # Update the lineup for Away using the current row's data
-        if not pd.isna(row['AwayIn']):
-            # Get the current on-court players
-            current_players = []
-            for i in range(1, 6):
-                player_col = f'A{i}'
-                if player_col in row and not pd.isna(row[player_col]):
-                    current_players.append(row[player_col])
-            
-            # If we have 5 players, update the lineup
-            if len(current_players) == 5:
-                current_away_lineup = tuple(sorted(current_players))
-            else:
-                print(f"Warning: Incomplete away lineup data at row {index}")
-
-        # Update score tracking **only for the away lineup**
-        away_score_at_entry_for_away = row['AwayScore']
-        home_score_at_entry_for_away = row['HomeScore']
-
-    if home_sub:
-        points_scored_home = row['HomeScore'] - home_score_at_entry_for_home
-        points_allowed_home = row['AwayScore'] - away_score_at_entry_for_home
-        net_impact_home = points_scored_home - points_allowed_home
-
-        lineup_stats.append({
-            'GameID': row['GameID'],
-            'Period': row['Period'],
-            'Time': row['Time'],
-            'Team': 'Home',
-            'Abbr': row['HomeName'],
-            'Lineup': current_home_lineup,
-            'Points Scored': points_scored_home,
-            'Points Allowed': points_allowed_home,
-            'Net Impact': net_impact_home,
-            'Minutes Played': calculate_minutes_played(home_entry_time_for_home, row['Time'])
-
-        })
-
-        home_entry_time_for_home = row['Time']
-
-        # Update the lineup for Home using the current row's data
-        if not pd.isna(row['HomeIn']):
-            # Get the current on-court players
-            current_players = []
-            for i in range(1, 6):
-                player_col = f'H{i}'
-                if player_col in row and not pd.isna(row[player_col]):
-                    current_players.append(row[player_col])
-            
-            # If we have 5 players, update the lineup
-            if len(current_players) == 5:
-                current_home_lineup = tuple(sorted(current_players))
-            else:
-                print(f"Warning: Incomplete home lineup data at row {index}")
-
-        # Update score tracking **only for the home lineup**
-        home_score_at_entry_for_home = row['HomeScore']
-        away_score_at_entry_for_home = row['AwayScore']
-
-# Handle the final lineups of the last game/period
-if previous_game_id is not None:
-    # Use the last row of the dataset
-    last_row = df.iloc[-1]
-    
-    # Record performance of the final lineups
-    points_scored_away = last_row['AwayScore'] - away_score_at_entry_for_away
-    points_allowed_away = last_row['HomeScore'] - home_score_at_entry_for_away
-    net_impact_away = points_scored_away - points_allowed_away
-
-    lineup_stats.append({
-        'GameID': last_row['GameID'],
-        'Period': last_row['Period'],
-        'Time': "00:00",  # End of game/period
-        'Team': 'Away',
-        'Abbr': row['AwayName'],
-        'Lineup': current_away_lineup,
-        'Points Scored': points_scored_away,
-        'Points Allowed': points_allowed_away,
-        'Net Impact': net_impact_away,
-        'Minutes Played': calculate_minutes_played(away_entry_time_for_away, row['Time'])
-
-    })
-    
-    away_entry_time_for_away = row['Time']
-
-    points_scored_home = last_row['HomeScore'] - home_score_at_entry_for_home
-    points_allowed_home = last_row['AwayScore'] - away_score_at_entry_for_home
-    net_impact_home = points_scored_home - points_allowed_home
-
-    lineup_stats.append({
-        'GameID': last_row['GameID'],
-        'Period': last_row['Period'],
-        'Time': "00:00",  # End of game/period
-        'Team': 'Home',
-        'Abbr': row['HomeName'],
-        'Lineup': current_home_lineup,
-        'Points Scored': points_scored_home,
-        'Points Allowed': points_allowed_home,
-        'Net Impact': net_impact_home,
-        'Minutes Played': calculate_minutes_played(home_entry_time_for_home, row['Time'])
-
-    })
-    
-    home_entry_time_for_home = row['Time']
-
-# Convert lineup stats into a DataFrame
-lineup_df = pd.DataFrame(lineup_stats)
-# Save the DataFrame to a CSV file (overwrites previous file)
-lineup_df.to_csv("Deep_Learning/lineup_performance.csv", index=False)
-print("Lineup performance data saved to 'Deep Learning/lineup_performance.csv'.")
\ No newline at end of file
+    with span("load CSV", path=input_path) as load_span:
+        df = decode_players(load_play_by_play(input_path, ids), ids)
+        load_span.rows = len(df)
+    print(f"Loaded {len(df)} plays from {df['GameID'].nunique()} games")
+
+    if check_parity_games:
+        with span("parity check", games=check_parity_games) as parity_span:
+            compared = check_parity(df, num_games=check_parity_games)
+            parity_span.rows = compared
+        print(f"Parity check passed: {compared} stints identical across {check_parity_games} sampled games")
+
+    with span("extract stints", rows=len(df)):
+        stints = extract_stints(df, clock)
+
+    # Save the stints to a CSV file (overwrites previous file), its typed copy to the cache, and the
+    # processed games and per-lineup totals used by --incremental
+    with span("write output", rows=len(stints), path=output_path):
+        write_lineup_store(stints, pd.unique(df['GameID'].astype(str)), last_play_date(df), output_path, ids, clock)
+    print(f"Lineup performance data saved to '{output_path}'.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build lineup_performance.csv from the sorted play-by-play data.")
+    parser.add_argument("--input", nargs="+", default=[INPUT_PATH], help="sorted play-by-play CSV(s), one per season")
+    parser.add_argument("--output", nargs="+", default=[OUTPUT_PATH], help="lineup_performance CSV(s), one per --input")
+    parser.add_argument("--check-parity", type=int, default=0, metavar="N",
+                        help="check the vectorized extractor against the original loop on N sampled games")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only extract the games not processed yet and append them to --output")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="extract shards of games across this many processes (0 = one pass in this process)")
+    parser.add_argument("--legacy-clock", action="store_true",
+                        help="measure minutes like the original script (whole seconds, every period from 12:00, "
+                             "final stints for the last game only)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    if len(args.input) != len(args.output):
+        parser.error("--input and --output need the same number of paths")
+    # Each extraction mode runs on its own, so options another mode would ignore are refused
+    if args.incremental and (args.workers or args.check_parity):
+        parser.error("--incremental cannot be combined with --workers or --check-parity")
+    if args.workers and args.check_parity:
+        parser.error("--workers cannot be combined with --check-parity, which runs in a single process")
+    instrumentation.start_run("from_sorted_filtered_to_lineups", args)
+
+    ids = PlayerIds.load()
+    clock = 'legacy' if args.legacy_clock else 'game'
+    start = time.perf_counter()
+    if args.incremental:
+        for input_path, output_path in zip(args.input, args.output):
+            with span("load CSV", path=input_path) as load_span:
+                plays = read_new_plays(input_path, output_path, clock=clock, ids=ids)
+                load_span.rows = len(plays)
+            with span("update store", rows=len(plays), path=output_path) as update_span:
+                new_games, rows = update_lineup_store(plays, output_path, ids, clock)
+                update_span.fields['games'] = new_games
+            print(f"Added {new_games} new games to '{output_path}' ({rows} stints) in {time.perf_counter() - start:.2f}s")
+        return
+
+    if args.workers:
+        with span("extract stints", workers=args.workers) as extract_span:
+            results = extract_files(args.input, args.workers, clock=clock)
+            extract_span.rows = sum(len(stints) for stints, _, _ in results)
+        for (stints, game_ids, last_date), output_path in zip(results, args.output):
+            with span("write output", rows=len(stints), path=output_path):
+                write_lineup_store(stints, game_ids, last_date, output_path, ids, clock)
+            print(f"{len(game_ids)} games, {len(stints)} stints saved to '{output_path}'.")
+        print(f"Extracted {len(args.input)} file(s) with {args.workers} workers in {time.perf_counter() - start:.2f}s")
+        return
+
+    for input_path, output_path in zip(args.input, args.output):
+        run_single(input_path, output_path, ids, args.check_parity, clock)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+lineup_model.py
+
+The lineup impact network and its batch inference helpers. Lineups are scored as an [N, 6] tensor
+(five player indices followed by the home/away flag) in large chunks under a single
+torch.inference_mode() pass. A model can be rebuilt from a training checkpoint or from the
+versioned artifact written by save_model_artifact() (see model_artifact.py).
+"""
+
+import numpy as np
+import torch
+import torch.nn as nn
+from model_artifact import adjusted_impact, load_artifact, save_artifact  # noqa: F401  (adjusted_impact is re-exported)
+
+
+class Net(nn.Module):
+    """
+    Simple feedforward neural network with an embedding layer for player IDs
+    and a flag for home/away.
+    """
+    def __init__(self, num_players, embedding_dim, hidden_size, output_size):
+        super(Net, self).__init__()
+        self.embeddings = nn.Embedding(num_players, embedding_dim, padding_idx=0)
+        self.fc1 = nn.Linear(embedding_dim + 1, hidden_size)
+        self.relu = nn.ReLU()
+        self.fc2 = nn.Linear(hidden_size, output_size)
+
+    def forward(self, lineup):
+        embedded_lineup = self.embeddings(lineup[:, :-1])
+        home_away_info = lineup[:, -1].float().unsqueeze(-1)
+        embedded_lineup = embedded_lineup.sum(dim=1)
+        combined = torch.cat((embedded_lineup, home_away_info), dim=-1)
+        x = self.fc1(combined)
+        x = self.relu(x)
+        return self.fc2(x)
+
+
+def load_model(path):
+    """
+    Rebuilds a Net from a training checkpoint (see training.py), preferring the best validation
+    weights. The layer sizes are read from the saved weights.
+    """
+    checkpoint = torch.load(path, map_location='cpu')
+    state = checkpoint.get('best_model_state') or checkpoint['model_state']
+    num_players, embedding_dim = state['embeddings.weight'].shape
+    hidden_size = state['fc1.weight'].shape[0]
+    output_size = state['fc2.weight'].shape[0]
+    model = Net(num_players, embedding_dim, hidden_size, output_size)
+    model.load_state_dict(state)
+    model.eval()
+    return model
+
+
+def save_model_artifact(model, players, hyperparameters, path, training_config=None):
+    """
+    Saves the weights of a trained Net with its player vocabulary and hyperparameters as an artifact.
+    """
+    weights = {name: tensor.detach().cpu().numpy() for name, tensor in model.state_dict().items()}
+    save_artifact(path, weights, players, hyperparameters, training_config)
+
+
+def load_model_artifact(path):
+    """
+    Rebuilds a Net from an artifact. Returns (model, meta), where meta['players'] is the vocabulary.
+    """
+    weights, meta = load_artifact(path)
+    hp = meta['hyperparameters']
+    model = Net(len(meta['players']) + 1, hp['embedding_dim'], hp['hidden_size'], hp['output_size'])
+    model.load_state_dict({name: torch.from_numpy(array) for name, array in weights.items()})
+    model.eval()
+    return model, meta
+
+
+def predict_impact(model, lineups, batch_size=65536):
+    """
+    Predicts the impact per 36 minutes of every row of an [N, 6] lineup tensor, batch_size rows per
+    forward pass. Returns a float64 numpy array of length N.
+    """
+    model.eval()
+    predictions = torch.empty(len(lineups), dtype=torch.float32)
+    with torch.inference_mode():
+        for start in range(0, len(lineups), batch_size):
+            predictions[start:start + batch_size] = model(lineups[start:start + batch_size]).squeeze(-1)
+    return predictions.numpy().astype(np.float64)
+
@@ -0,0 +1,379 @@
+"""
+lineup_stints.py
+
+Stint extraction engine for the play-by-play data. A stint is a stretch of play where one team's
+five-man lineup stays on the court; every stint becomes one row of lineup_performance.csv.
+
+extract_stints() finds the game, period and substitution boundaries with columnar shift/accumulate
+operations instead of walking the frame row by row, so a full season is processed in one linear pass.
+extract_stints_iterative() is the original row-by-row algorithm from from_sorted_filtered_to_lineups.py,
+kept as the reference implementation for parity checks.
+
+Stint minutes are measured on the game clock by default: every play's Time is converted once into
+elapsed game seconds (tenths kept, 12-minute quarters and 5-minute overtimes), and a stint's minutes
+are the difference between its start and end. Every game's last lineups are closed at the end of
+its final period. clock='legacy' reproduces the original rows and minutes instead: whole seconds
+left in the period, "12:00" as the start of every period (overtime too), the first play of a period
+as the end of the previous period's last stints, and final stints only for the last game of the
+data (the original loop closes the lineups on the court once, when the data ends).
+
+A lineup taken from a game or period start with a player missing (NaN) keeps the players that are
+there in sorted order, followed by None for each missing one, e.g. ('a', 'b', 'c', 'd', None).
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+AWAY_COLS = ['A1', 'A2', 'A3', 'A4', 'A5']
+HOME_COLS = ['H1', 'H2', 'H3', 'H4', 'H5']
+
+OUTPUT_COLUMNS = ['GameID', 'Period', 'Time', 'Team', 'Abbr', 'Lineup',
+                  'Points Scored', 'Points Allowed', 'Net Impact', 'Minutes Played']
+
+PERIOD_START_CLOCK = 12 * 60  # Entry clock ("12:00") used when a game starts
+REGULATION_PERIODS = 4
+PERIOD_SECONDS = 12 * 60
+OVERTIME_SECONDS = 5 * 60
+CLOCKS = ('game', 'legacy')
+
+# Emission order within a single play, matching the order of the original loop
+_PERIOD_AWAY, _PERIOD_HOME, _SUB_AWAY, _SUB_HOME, _END_AWAY, _END_HOME = range(6)
+_KINDS = 6
+
+# ---------------------- Clock Parsing ----------------------
+
+def clock_to_seconds(times):
+    """
+    Converts game clock strings ("M:SS.s") into whole seconds left in the period.
+    Fractions of a second are dropped and anything unparseable becomes NaN.
+    """
+    parts = times.astype(str).str.split('.', n=1).str[0].str.extract(r'^(\d{1,2}):(\d{1,2})$')
+    minutes = pd.to_numeric(parts[0])
+    seconds = pd.to_numeric(parts[1])
+    valid = (minutes <= 59) & (seconds <= 61)
+    return (minutes * 60 + seconds).where(valid).to_numpy(dtype=float)
+
+def period_bounds(periods):
+    """
+    Elapsed game seconds at the start and end of each period number (quarters are 12 minutes,
+    overtime periods 5).
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    regulation = np.minimum(periods - 1, REGULATION_PERIODS)
+    overtime = np.maximum(periods - 1 - REGULATION_PERIODS, 0)
+    start = regulation * PERIOD_SECONDS + overtime * OVERTIME_SECONDS
+    length = np.where(periods > REGULATION_PERIODS, OVERTIME_SECONDS, PERIOD_SECONDS)
+    return start.astype(float), (start + length).astype(float)
+
+def game_seconds(periods, times):
+    """
+    Converts Period and game clock ("M:SS.s", time left in the period) columns into elapsed game
+    seconds, keeping tenths. Clocks past the period length count as its start, and anything
+    unparseable becomes NaN.
+    """
+    parts = pd.Series(times).astype(str).str.extract(r'^(\d{1,2}):(\d{1,2}(?:\.\d+)?)$')
+    minutes = pd.to_numeric(parts[0]).to_numpy(dtype=float)
+    seconds = pd.to_numeric(parts[1]).to_numpy(dtype=float)
+    left = np.where((minutes <= 59) & (seconds < 62), minutes * 60 + seconds, np.nan)
+    start, end = period_bounds(periods)
+    return np.clip(end - left, start, end)
+
+def sort_lineup(players):
+    """
+    Sorted lineup tuple of the players on the court, with None in place of missing (NaN) players
+    at the end.
+    """
+    present = sorted(p for p in players if not pd.isna(p))
+    return tuple(present) + (None,) * (len(players) - len(present))
+
+def _last_true(mask):
+    """
+    For every position, returns the index of the last True value at or before it (-1 if none).
+    """
+    return np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+
+# ---------------------- Vectorized Extraction ----------------------
+
+def _side_stints(df, side, game_start, period_start, game_end, elapsed=None, clock_left=None):
+    """
+    Finds every stint emitted for one side ('Away' or 'Home') and returns the columns as a dict
+    of arrays plus the row index each stint's lineup is read from. The lineups on the court are
+    closed after every game_end row. Minutes come from elapsed game seconds when given, otherwise
+    from the legacy clock (clock_left, whole seconds left in the period).
+    """
+    if side == 'Away':
+        cols, in_col, out_col, name_col = AWAY_COLS, 'AwayIn', 'AwayOut', 'AwayName'
+        own, opp = df['AwayScore'].to_numpy(), df['HomeScore'].to_numpy()
+        period_kind, sub_kind, end_kind = _PERIOD_AWAY, _SUB_AWAY, _END_AWAY
+    else:
+        cols, in_col, out_col, name_col = HOME_COLS, 'HomeIn', 'HomeOut', 'HomeName'
+        own, opp = df['HomeScore'].to_numpy(), df['AwayScore'].to_numpy()
+        period_kind, sub_kind, end_kind = _PERIOD_HOME, _SUB_HOME, _END_HOME
+
+    sub_in = df[in_col].notna().to_numpy()
+    sub = sub_in | df[out_col].notna().to_numpy()
+    full_lineup = df[cols].notna().all(axis=1).to_numpy()
+
+    # Rows that reset the entry scores/clock, and rows that (re)define the lineup on the court
+    boundary = game_start | period_start
+    last_reset = _last_true(boundary | sub)
+    last_lineup = _last_true(boundary | (sub_in & full_lineup))
+
+    # Substitutions: on a game/period start row the state was just reset by that same row
+    sub_rows = np.flatnonzero(sub)
+    prev = np.maximum(sub_rows - 1, 0)
+    on_boundary = boundary[sub_rows]
+    sub_state = np.where(on_boundary, sub_rows, last_reset[prev])
+    sub_lineup = np.where(on_boundary, sub_rows, last_lineup[prev])
+
+    # End of period: the previous lineups are closed on the new period's first row
+    period_rows = np.flatnonzero(period_start)
+    period_state = last_reset[period_rows - 1]
+    period_lineup = last_lineup[period_rows - 1]
+
+    # End of game: the lineups still on the court after a game's last row
+    end_rows = np.flatnonzero(game_end)
+    end_state = last_reset[end_rows]
+
+    rows = np.concatenate([period_rows, sub_rows, end_rows])
+    state = np.concatenate([period_state, sub_state, end_state])
+    lineup_rows = np.concatenate([period_lineup, sub_lineup, last_lineup[end_rows]])
+
+    if elapsed is None:
+        # Legacy clock: every period-end stint is measured from "12:00" to the new period's first play.
+        # The entry clock once a row has been processed is "12:00" after a game start without a sub,
+        # otherwise the clock of the row itself
+        entry_clock_after = np.where(game_start & ~sub, PERIOD_START_CLOCK, clock_left)
+        sub_entry = np.where(game_start[sub_rows], PERIOD_START_CLOCK,
+                             np.where(period_start[sub_rows], clock_left[sub_rows], entry_clock_after[sub_state]))
+        entry = np.concatenate([np.full(len(period_rows), PERIOD_START_CLOCK, dtype=float), sub_entry,
+                                entry_clock_after[end_state]])
+        minutes = np.abs(entry - clock_left[rows]) / 60
+    else:
+        # Game clock: stints start at the start of the period or at the substitution, and end at the
+        # substitution or the end of the period
+        period_begin, period_end = period_bounds(df['Period'].to_numpy())
+        entry_after = np.where(sub, elapsed, period_begin)
+        sub_entry = np.where(on_boundary, period_begin[sub_rows], entry_after[sub_state])
+        entry = np.concatenate([entry_after[period_state], sub_entry, entry_after[end_state]])
+        end = np.concatenate([period_end[period_rows - 1], elapsed[sub_rows], period_end[end_rows]])
+        minutes = (end - entry) / 60
+    scored = own[rows] - own[state]
+    allowed = opp[rows] - opp[state]
+
+    periods = df['Period'].to_numpy()
+    times = df['Time'].to_numpy(dtype=object)
+    period_col = np.concatenate([periods[period_rows - 1], periods[sub_rows], periods[end_rows]])
+    time_col = np.concatenate([np.full(len(period_rows), "00:00", dtype=object), times[sub_rows],
+                               np.full(len(end_rows), "00:00", dtype=object)])
+
+    order = np.concatenate([period_rows * _KINDS + period_kind, sub_rows * _KINDS + sub_kind,
+                            end_rows * _KINDS + end_kind])
+    return {
+        'order': order,
+        'GameID': df['GameID'].to_numpy()[rows],
+        'Period': period_col,
+        'Time': time_col,
+        'Team': np.full(len(rows), side, dtype=object),
+        'Abbr': df[name_col].to_numpy(dtype=object)[rows],
+        'Points Scored': scored,
+        'Points Allowed': allowed,
+        'Net Impact': scored - allowed,
+        'Minutes Played': np.nan_to_num(minutes, nan=0.0),
+    }, df[cols].to_numpy(dtype=object), lineup_rows
+
+def _lineup_tuples(players, lineup_rows):
+    """
+    Builds the sorted lineup tuple for every stint, sorting each distinct source row only once.
+    """
+    unique_rows, inverse = np.unique(lineup_rows, return_inverse=True)
+    lineups = [sort_lineup(players[r]) for r in unique_rows]
+    result = np.empty(len(lineup_rows), dtype=object)
+    result[:] = [lineups[i] for i in inverse]
+    return result
+
+def extract_stints(df, clock='game'):
+    """
+    Extracts every lineup stint from a play-by-play frame sorted by Date, GameID and PlayNum.
+    With clock='legacy' it returns the same rows, in the same order and with the same minutes, as
+    the original row-by-row loop; on the game clock every game also gets its final Away and Home
+    stints. The GameSeconds column is used when the frame has one.
+    """
+    if clock not in CLOCKS:
+        raise ValueError(f"clock must be one of {CLOCKS}, got {clock!r}")
+    if len(df) == 0:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    df = df.reset_index(drop=True)
+
+    game_ids = df['GameID'].to_numpy()
+    periods = df['Period'].to_numpy()
+    game_start = np.ones(len(df), dtype=bool)
+    game_start[1:] = game_ids[1:] != game_ids[:-1]
+    period_start = np.zeros(len(df), dtype=bool)
+    period_start[1:] = periods[1:] != periods[:-1]
+    period_start &= ~game_start
+    game_end = np.zeros(len(df), dtype=bool)
+    game_end[-1] = True
+    if clock == 'game':
+        game_end[:-1] = game_start[1:]
+    # Only one clock is parsed: the game clock reuses a cached GameSeconds column when there is one
+    elapsed = clock_left = None
+    if clock == 'game':
+        elapsed = df['GameSeconds'].to_numpy(dtype=float) if 'GameSeconds' in df else game_seconds(periods, df['Time'])
+    else:
+        clock_left = clock_to_seconds(df['Time'])
+
+    parts = []
+    for side in ('Away', 'Home'):
+        columns, players, lineup_rows = _side_stints(df, side, game_start, period_start, game_end, elapsed, clock_left)
+        columns['Lineup'] = _lineup_tuples(players, lineup_rows)
+        parts.append(columns)
+
+    order = np.argsort(np.concatenate([p['order'] for p in parts]), kind='stable')
+    return pd.DataFrame({col: np.concatenate([p[col] for p in parts])[order] for col in OUTPUT_COLUMNS})
+
+# ---------------------- Reference Implementation ----------------------
+
+def calculate_minutes_played(start_time, end_time):
+    """
+    Gets the start and end time for each lineup and gets the total
+    minutes played in that shift.
+    """
+    if start_time is None or end_time is None:
+        return 0  # No time data available yet
+    try:
+        start = datetime.strptime(start_time.split(".")[0], "%M:%S")
+        end = datetime.strptime(end_time.split(".")[0], "%M:%S")
+        return abs((start - end).total_seconds() / 60)
+    except Exception:
+        return 0
+
+def extract_stints_iterative(df):
+    """
+    The original iterrows() stint loop. It is O(rows x games) and only meant to be run on a
+    sample of games to check extract_stints() against.
+    """
+    df = df.reset_index(drop=True)
+    lineup_stats = []
+
+    def record(row, period, time, team, abbr, lineup, scored, allowed, entry_time, end_time):
+        lineup_stats.append({
+            'GameID': row['GameID'],
+            'Period': period,
+            'Time': time,
+            'Team': team,
+            'Abbr': abbr,
+            'Lineup': lineup,
+            'Points Scored': scored,
+            'Points Allowed': allowed,
+            'Net Impact': scored - allowed,
+            'Minutes Played': calculate_minutes_played(entry_time, end_time)
+        })
+
+    previous_game_id = None
+    previous_period = None
+    row = None
+
+    for index, row in df.iterrows():
+        game_id = row['GameID']
+        current_period = row['Period']
+
+        # If new game starts, reset all tracking variables
+        if game_id != previous_game_id:
+            away_entry_time_for_away = "12:00"
+            home_entry_time_for_home = "12:00"
+
+            first_row = df[df["GameID"] == game_id].iloc[0]
+            current_away_lineup = sort_lineup([first_row[c] for c in AWAY_COLS])
+            current_home_lineup = sort_lineup([first_row[c] for c in HOME_COLS])
+
+            away_score_at_entry_for_away = first_row['AwayScore']
+            home_score_at_entry_for_away = first_row['HomeScore']
+            home_score_at_entry_for_home = first_row['HomeScore']
+            away_score_at_entry_for_home = first_row['AwayScore']
+
+            previous_game_id = game_id
+            previous_period = current_period
+
+        # If new quarter starts in the same game, capture the previous lineups' performance and reset
+        elif current_period != previous_period:
+            away_entry_time_for_away = "12:00"
+            home_entry_time_for_home = "12:00"
+
+            record(row, previous_period, "00:00", 'Away', row['AwayName'], current_away_lineup,
+                   row['AwayScore'] - away_score_at_entry_for_away, row['HomeScore'] - home_score_at_entry_for_away,
+                   away_entry_time_for_away, row['Time'])
+            away_entry_time_for_away = row['Time']
+
+            record(row, previous_period, "00:00", 'Home', row['HomeName'], current_home_lineup,
+                   row['HomeScore'] - home_score_at_entry_for_home, row['AwayScore'] - away_score_at_entry_for_home,
+                   home_entry_time_for_home, row['Time'])
+            home_entry_time_for_home = row['Time']
+
+            first_row_of_period = df[(df["GameID"] == game_id) & (df["Period"] == current_period)].iloc[0]
+            current_away_lineup = sort_lineup([first_row_of_period[c] for c in AWAY_COLS])
+            current_home_lineup = sort_lineup([first_row_of_period[c] for c in HOME_COLS])
+
+            away_score_at_entry_for_away = row['AwayScore']
+            home_score_at_entry_for_away = row['HomeScore']
+            home_score_at_entry_for_home = row['HomeScore']
+            away_score_at_entry_for_home = row['AwayScore']
+
+            previous_period = current_period
+
+        if not pd.isna(row['AwayIn']) or not pd.isna(row['AwayOut']):
+            record(row, row['Period'], row['Time'], 'Away', row['AwayName'], current_away_lineup,
+                   row['AwayScore'] - away_score_at_entry_for_away, row['HomeScore'] - home_score_at_entry_for_away,
+                   away_entry_time_for_away, row['Time'])
+            away_entry_time_for_away = row['Time']
+
+            if not pd.isna(row['AwayIn']):
+                current_players = [row[c] for c in AWAY_COLS if not pd.isna(row[c])]
+                if len(current_players) == 5:
+                    current_away_lineup = tuple(sorted(current_players))
+
+            away_score_at_entry_for_away = row['AwayScore']
+            home_score_at_entry_for_away = row['HomeScore']
+
+        if not pd.isna(row['HomeIn']) or not pd.isna(row['HomeOut']):
+            record(row, row['Period'], row['Time'], 'Home', row['HomeName'], current_home_lineup,
+                   row['HomeScore'] - home_score_at_entry_for_home, row['AwayScore'] - away_score_at_entry_for_home,
+                   home_entry_time_for_home, row['Time'])
+            home_entry_time_for_home = row['Time']
+
+            if not pd.isna(row['HomeIn']):
+                current_players = [row[c] for c in HOME_COLS if not pd.isna(row[c])]
+                if len(current_players) == 5:
+                    current_home_lineup = tuple(sorted(current_players))
+
+            home_score_at_entry_for_home = row['HomeScore']
+            away_score_at_entry_for_home = row['AwayScore']
+
+    # Handle the final lineups of the last game/period
+    if previous_game_id is not None:
+        last_row = df.iloc[-1]
+        record(last_row, last_row['Period'], "00:00", 'Away', row['AwayName'], current_away_lineup,
+               last_row['AwayScore'] - away_score_at_entry_for_away, last_row['HomeScore'] - home_score_at_entry_for_away,
+               away_entry_time_for_away, row['Time'])
+        record(last_row, last_row['Period'], "00:00", 'Home', row['HomeName'], current_home_lineup,
+               last_row['HomeScore'] - home_score_at_entry_for_home, last_row['AwayScore'] - away_score_at_entry_for_home,
+               home_entry_time_for_home, row['Time'])
+
+    return pd.DataFrame(lineup_stats, columns=OUTPUT_COLUMNS)
+
+# ---------------------- Parity Check ----------------------
+
+def check_parity(df, num_games=25, seed=0):
+    """
+    Runs both implementations (on the legacy clock) on a random sample of games and raises an
+    AssertionError if the resulting lineup_performance rows differ. Returns the number of stints compared.
+    """
+    game_ids = df['GameID'].drop_duplicates()
+    sample = game_ids.sample(n=min(num_games, len(game_ids)), random_state=seed)
+    subset = df[df['GameID'].isin(set(sample))]
+
+    expected = extract_stints_iterative(subset)
+    actual = extract_stints(subset, clock='legacy')
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    return len(actual)
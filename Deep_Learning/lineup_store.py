@@ -0,0 +1,267 @@
+"""
+lineup_store.py
+
+Incremental in-season updates of lineup_performance.csv. Next to the CSV, the store keeps:
+- a manifest (.cache/lineup_store-<name>.json) with the GameIDs already processed
+- per-lineup aggregates (.cache/lineup_store-<name>-aggregates.feather, or .pkl without pyarrow):
+  total_minutes, games and starts (games where the lineup was its team's first stint) per lineup
+
+update_lineup_store() extracts stints only for the games of the play-by-play feed that are not in
+the manifest, appends them to the CSV and the columnar cache, and adds their totals to the
+aggregates in place. DL_prediction.py reads the aggregates through stored_aggregates() instead of
+counting them again from every stint.
+
+On the game clock every game ends with its own final stints, so an update only appends. On the
+legacy clock the original loop closes the last lineups of a game only when the data ends, so a full
+rebuild keeps that "end of data" stint pair for the last game alone. To stay identical to a full
+rebuild, a legacy update first truncates the CSV back to before that pair (its byte offset is in the
+manifest), takes the last game's totals back out of the aggregates, and re-adds them without it.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from columnar_cache import (CACHE_DIR, CACHE_FORMAT, LINEUP_COLUMNS, _type_lineup_performance, _write_entry,
+                            load_lineup_performance)
+from lineup_stints import extract_stints
+from player_ids import PlayerIds
+
+MANIFEST_VERSION = 2  # Version 1 game-clock stores lack the final stints of all but their last game
+TAIL_ROWS = 2  # The Away and Home "end of data" stints the legacy clock emits after the last play
+AGGREGATE_COLUMNS = ['total_minutes', 'games', 'starts']
+
+# ---------------------- Store Files ----------------------
+
+def tail_rows(clock):
+    """
+    Number of trailing "end of data" stints that a later extraction would not repeat: TAIL_ROWS on
+    the legacy clock, none on the game clock, where every game is closed on its own.
+    """
+    return TAIL_ROWS if clock == 'legacy' else 0
+
+def _store_paths(output_path):
+    """
+    Manifest and aggregates paths of the store for a lineup_performance CSV.
+    """
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    base = os.path.join(CACHE_DIR, f"lineup_store-{stem}")
+    return base + '.json', base + '-aggregates' + ('.feather' if CACHE_FORMAT == 'feather' else '.pkl')
+
+def load_manifest(output_path):
+    """
+    Returns the store manifest for output_path, or None if there is none (or the CSV has changed
+    size since, e.g. after a rebuild by another tool).
+    """
+    manifest_path, _ = _store_paths(output_path)
+    if not os.path.exists(manifest_path) or not os.path.exists(output_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('manifest_version') != MANIFEST_VERSION or manifest.get('csv_size') != os.path.getsize(output_path):
+        return None
+    return manifest
+
+def _ids_match(manifest, ids):
+    """
+    Whether ids still gives the player IDs the store's aggregates are keyed on the same names.
+    """
+    count = manifest.get('player_ids')
+    return count is not None and count <= len(ids) and manifest.get('player_ids_sha256') == ids.names_hash(count)
+
+def load_aggregates(output_path):
+    """
+    Per-lineup aggregates of the store, indexed by P1..P5 player IDs.
+    """
+    _, aggregates_path = _store_paths(output_path)
+    if CACHE_FORMAT == 'feather':
+        return pd.read_feather(aggregates_path).set_index(LINEUP_COLUMNS)
+    return pd.read_pickle(aggregates_path)
+
+def stored_aggregates(output_path, ids, rows):
+    """
+    The aggregates of the store for output_path when they describe its current CSV of rows stints
+    and are keyed on the IDs of ids; None otherwise (no store, a changed CSV, regenerated IDs).
+    """
+    manifest = load_manifest(output_path)
+    if manifest is None or manifest['rows'] != rows or not _ids_match(manifest, ids):
+        return None
+    return load_aggregates(output_path)
+
+def _save(output_path, manifest, aggregates, ids):
+    manifest_path, aggregates_path = _store_paths(output_path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if CACHE_FORMAT == 'feather':
+        aggregates.reset_index().to_feather(aggregates_path)
+    else:
+        aggregates.to_pickle(aggregates_path)
+    manifest['csv_size'] = os.path.getsize(output_path)
+    manifest['player_ids'], manifest['player_ids_sha256'] = len(ids), ids.names_hash()
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+# ---------------------- Aggregates ----------------------
+
+def starting_rows(stints):
+    """
+    Positions of every game's first Home and first Away stint, for games that have both (the
+    starting lineups as DL_prediction.py counts them).
+    """
+    game = pd.factorize(stints['GameID'], use_na_sentinel=False)[0]
+    team = pd.factorize(stints['Team'], use_na_sentinel=False)[0]
+    first = ~pd.DataFrame({'GameID': game, 'Team': team}).duplicated().to_numpy()
+    rows = np.flatnonzero(first)
+    both = np.bincount(game[rows])[game[rows]] == 2
+    return rows[both]
+
+def lineup_aggregates(stints):
+    """
+    Totals per lineup for a typed lineup_performance frame (P1..P5 columns): Abbr and Team of its
+    first stint, total_minutes, games (distinct GameIDs) and starts.
+    """
+    stints = stints.reset_index(drop=True)
+    groups = stints.groupby(LINEUP_COLUMNS, sort=False, observed=True)
+    aggregates = pd.DataFrame({
+        'Abbr': groups['Abbr'].first().astype(str),
+        'Team': groups['Team'].first().astype(str),
+        'total_minutes': groups['Minutes Played'].sum(),
+    })
+    games = stints.drop_duplicates(LINEUP_COLUMNS + ['GameID']).groupby(LINEUP_COLUMNS, sort=False, observed=True).size()
+    starts = stints.iloc[starting_rows(stints)].groupby(LINEUP_COLUMNS, sort=False, observed=True).size()
+    aggregates['games'] = games.reindex(aggregates.index).to_numpy()
+    aggregates['starts'] = starts.reindex(aggregates.index, fill_value=0).to_numpy()
+    return aggregates
+
+def add_aggregates(aggregates, delta, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) the totals of delta to aggregates, appending lineups that
+    are new and dropping lineups left with no games.
+    """
+    new = delta[~delta.index.isin(aggregates.index)]
+    if len(new):
+        zeros = new.copy()
+        zeros[AGGREGATE_COLUMNS] = 0
+        aggregates = pd.concat([aggregates, zeros])
+    aggregates.loc[delta.index, AGGREGATE_COLUMNS] += sign * delta[AGGREGATE_COLUMNS]
+    return aggregates[aggregates['games'] > 0]
+
+# ---------------------- Build & Update ----------------------
+
+def _write_csv(stints, output_path, append, tail):
+    """
+    Writes stints to the CSV (appending without a header, or replacing it) and returns the byte
+    offset where its last tail ("end of data") stints start.
+    """
+    stints.iloc[:len(stints) - tail].to_csv(output_path, mode='a' if append else 'w', header=not append, index=False)
+    offset = os.path.getsize(output_path)
+    if tail:
+        stints.iloc[len(stints) - tail:].to_csv(output_path, mode='a', header=False, index=False)
+    return offset
+
+def last_play_date(plays):
+    """
+    Date (YYYY-MM-DD) of the last play in a play-by-play frame, or None without dates.
+    """
+    if 'Date' not in plays or len(plays) == 0:
+        return None
+    return pd.to_datetime(plays['Date']).max().strftime('%Y-%m-%d')
+
+def write_lineup_store(stints, game_ids, last_date, output_path, ids=None, clock='game'):
+    """
+    Writes extracted stints to the CSV and its cache entry, and starts the manifest (with the
+    processed GameIDs, the last game Date and the clock the minutes were measured on) and the
+    aggregates. Returns the typed stints.
+    """
+    ids = ids if ids is not None else PlayerIds.load()
+    offset = _write_csv(stints, output_path, append=False, tail=tail_rows(clock))
+    typed = _type_lineup_performance(stints, ids)
+    ids.save()
+    _write_entry(typed, output_path, 'lineup_performance', ids)
+    manifest = {'manifest_version': MANIFEST_VERSION, 'games': list(game_ids), 'last_date': last_date,
+                'clock': clock, 'tail_offset': offset, 'rows': len(typed)}
+    _save(output_path, manifest, lineup_aggregates(typed), ids)
+    return typed
+
+def build_lineup_store(play_by_play, output_path, ids=None, clock='game'):
+    """
+    Extracts every stint of a decoded play-by-play frame and writes the store for output_path.
+    Returns the typed stints.
+    """
+    return write_lineup_store(extract_stints(play_by_play, clock), pd.unique(play_by_play['GameID'].astype(str)),
+                              last_play_date(play_by_play), output_path, ids, clock)
+
+def update_lineup_store(play_by_play, output_path, ids=None, clock='game'):
+    """
+    Appends the stints of the games in play_by_play that the store has not processed yet. Falls back
+    to build_lineup_store() when there is no valid store for output_path, or when the store's
+    minutes were measured on a different clock. Returns the number of new games and the number of
+    stints in the store.
+    """
+    ids = ids if ids is not None else PlayerIds.load()
+    manifest = load_manifest(output_path)
+    if manifest is not None and manifest.get('clock', 'legacy') != clock:
+        print(f"'{output_path}' was built on the {manifest.get('clock', 'legacy')} clock; rebuilding on the {clock} clock")
+        manifest = None
+    elif manifest is not None and not _ids_match(manifest, ids):
+        print(f"'{output_path}' was built with other player IDs; rebuilding it")
+        manifest = None
+    if manifest is None:
+        typed = build_lineup_store(play_by_play, output_path, ids, clock)
+        return play_by_play['GameID'].nunique(), len(typed)
+
+    processed = set(manifest['games'])
+    new_plays = play_by_play[~play_by_play['GameID'].astype(str).isin(processed)]
+    if len(new_plays) == 0:
+        return 0, manifest['rows']
+    first_new = pd.to_datetime(new_plays['Date']).min().strftime('%Y-%m-%d') if 'Date' in new_plays else None
+    if first_new and manifest['last_date'] and first_new < manifest['last_date']:
+        print(f"Warning: new games from {first_new} predate the store's last game ({manifest['last_date']}); "
+              "their stints are appended at the end, not in date order")
+
+    stored = load_lineup_performance(output_path, ids)
+    aggregates = load_aggregates(output_path)
+
+    tail = tail_rows(clock)
+    if tail:
+        # Take back the last game's "end of data" stints, which a full rebuild would not have
+        last_game = stored['GameID'].iloc[-1]
+        last_game_rows = stored[stored['GameID'] == last_game]
+        aggregates = add_aggregates(aggregates, lineup_aggregates(last_game_rows), sign=-1)
+        aggregates = add_aggregates(aggregates, lineup_aggregates(last_game_rows.iloc[:-tail]))
+        with open(output_path, 'r+b') as f:
+            f.truncate(manifest['tail_offset'])
+
+    new_stints = extract_stints(new_plays, clock)
+    offset = _write_csv(new_stints, output_path, append=True, tail=tail)
+    new_typed = _type_lineup_performance(new_stints, ids)
+    ids.save()
+    aggregates = add_aggregates(aggregates, lineup_aggregates(new_typed))
+
+    typed = pd.concat([stored.iloc[:len(stored) - tail].astype({col: object for col in ('GameID', 'Team', 'Abbr')}),
+                       new_typed.astype({col: object for col in ('GameID', 'Team', 'Abbr')})], ignore_index=True)
+    typed = typed.astype({col: 'category' for col in ('GameID', 'Team', 'Abbr')})
+    _write_entry(typed, output_path, 'lineup_performance', ids)
+
+    manifest['games'] += list(pd.unique(new_plays['GameID'].astype(str)))
+    manifest['tail_offset'], manifest['rows'] = offset, len(typed)
+    manifest['last_date'] = max(filter(None, [manifest['last_date'], last_play_date(new_plays)]), default=None)
+    _save(output_path, manifest, aggregates, ids)
+    return new_plays['GameID'].nunique(), len(typed)
+
+def read_new_plays(input_path, output_path, chunksize=200_000, clock='game', ids=None):
+    """
+    Reads only the plays of games the store has not processed from a play-by-play CSV, in chunks,
+    so a daily update does not load or cache the whole season. Every play is read when the store
+    will be rebuilt (no store, one on another clock, or one built with other player IDs).
+    """
+    ids = ids if ids is not None else PlayerIds.load()
+    manifest = load_manifest(output_path)
+    processed = set()
+    if manifest is not None and manifest.get('clock', 'legacy') == clock and _ids_match(manifest, ids):
+        processed = set(manifest['games'])
+    parts = []
+    for chunk in pd.read_csv(input_path, encoding="ISO-8859-1", delimiter=",", chunksize=chunksize):
+        parts.append(chunk[~chunk['GameID'].astype(str).isin(processed)])
+    return pd.concat(parts, ignore_index=True)
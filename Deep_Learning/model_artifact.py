@@ -0,0 +1,110 @@
+"""
+model_artifact.py
+
+Versioned, self-contained artifact for the trained lineup model. One .npz file holds the Net weights
+as plain arrays together with a JSON header carrying the format version, the player vocabulary
+(player name for every embedding index) and the hyperparameters used for training.
+
+Only numpy is needed to read an artifact and run the model, so scoring does not have to import
+torch or pandas.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+
+ARTIFACT_VERSION = 1
+DEFAULT_PATH = "Deep_Learning/models/lineup_net.npz"
+WEIGHT_NAMES = ['embeddings.weight', 'fc1.weight', 'fc1.bias', 'fc2.weight', 'fc2.bias']
+MINUTES_PRIOR = 100  # Minutes of "shrinkage" applied when adjusting per-36 predictions
+LINEUP_SIZE = 5
+
+
+def adjusted_impact(predicted_per_36, total_minutes):
+    """
+    Shrinks per-36 predictions towards zero for lineups with few minutes together.
+    """
+    return predicted_per_36 * (total_minutes / (total_minutes + MINUTES_PRIOR))
+
+
+def save_artifact(path, weights, players, hyperparameters, training_config=None):
+    """
+    Writes the model weights (name -> numpy array), the player vocabulary (players[i] is embedding
+    index i + 1) and the hyperparameters to a single .npz file.
+    """
+    meta = {
+        'artifact_version': ARTIFACT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'players': list(players),
+        'hyperparameters': hyperparameters,
+        'training_config': training_config or {},
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), **{name: np.asarray(weights[name]) for name in WEIGHT_NAMES})
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path):
+    """
+    Reads an artifact written by save_artifact(). Returns (weights, meta).
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        meta = json.loads(str(archive['meta']))
+        if meta.get('artifact_version') != ARTIFACT_VERSION:
+            raise ValueError(f"{path} has artifact version {meta.get('artifact_version')}, expected {ARTIFACT_VERSION}")
+        weights = {name: archive[name] for name in WEIGHT_NAMES}
+    return weights, meta
+
+
+class LineupScorer:
+    """
+    Scores lineups with the weights of an artifact, loading the file on the first query.
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._weights = None
+        self._player_to_index = None
+        self.meta = None
+
+    def _load(self):
+        if self._weights is None:
+            self._weights, self.meta = load_artifact(self.path)
+            self._player_to_index = {player: i + 1 for i, player in enumerate(self.meta['players'])}
+
+    def encode(self, lineup):
+        """
+        Maps player names to embedding indices. Raises ValueError unless the lineup has exactly
+        five distinct players, and KeyError for players the model has not seen.
+        """
+        lineup = list(lineup)
+        if len(lineup) != LINEUP_SIZE or len(set(lineup)) != LINEUP_SIZE:
+            raise ValueError(f"A lineup needs {LINEUP_SIZE} distinct players, got {len(set(lineup))} distinct "
+                             f"out of {len(lineup)}: {', '.join(lineup)}")
+        self._load()
+        unknown = [player for player in lineup if player not in self._player_to_index]
+        if unknown:
+            raise KeyError(f"Unknown players: {', '.join(unknown)}")
+        return [self._player_to_index[player] for player in lineup]
+
+    def score_indices(self, lineups, is_home):
+        """
+        Predicted impact per 36 minutes for an [N, 5] array of embedding indices and N home/away flags.
+        Mirrors Net.forward.
+        """
+        lineups = np.asarray(lineups)
+        if lineups.ndim != 2 or lineups.shape[1] != LINEUP_SIZE:
+            raise ValueError(f"Expected an [N, {LINEUP_SIZE}] array of embedding indices, got shape {lineups.shape}")
+        self._load()
+        w = self._weights
+        embedded = w['embeddings.weight'][lineups].sum(axis=1)
+        combined = np.concatenate([embedded, np.asarray(is_home, dtype=np.float32).reshape(-1, 1)], axis=1)
+        hidden = np.maximum(combined @ w['fc1.weight'].T + w['fc1.bias'], 0)
+        return (hidden @ w['fc2.weight'].T + w['fc2.bias'])[:, 0].astype(np.float64)
+
+    def score(self, lineup, is_home=True):
+        """
+        Predicted impact per 36 minutes for a single lineup given as player names.
+        """
+        return float(self.score_indices([self.encode(lineup)], [int(is_home)])[0])
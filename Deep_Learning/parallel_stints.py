@@ -0,0 +1,125 @@
+"""
+parallel_stints.py
+
+Stint extraction for one or more sorted play-by-play CSVs across a process pool. Every game resets
+the extraction state, so a season can be split into shards of whole games and each shard extracted
+on its own:
+
+- game_shards() cuts a CSV into byte ranges that start and end on GameID boundaries. Only a few
+  lines around each cut point are read to find them.
+- each worker reads just its byte range, parses it and runs lineup_stints.extract_stints() on it.
+  Workers return player names; they never touch player_ids.json, which is only written by the
+  parent process. Each shard is traced as an "extract shard" span.
+- the shards of a file are merged in file order. On the legacy clock only the last shard keeps
+  the "end of data" stints that the original loop emits after the final play (the game clock closes
+  every game on its own), so the merged result is identical to extracting the whole file in one pass.
+
+Shards of every input file go into the same pool, so several seasons run in parallel.
+"""
+
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from lineup_stints import OUTPUT_COLUMNS, extract_stints
+from lineup_store import tail_rows
+import repo_root  # noqa: F401  (puts instrumentation.py on the import path)
+from instrumentation import span
+
+ENCODING = "ISO-8859-1"
+
+# ---------------------- Sharding ----------------------
+
+def _game_at(f, encoding, game_col):
+    """
+    Reads the next full line from f and returns (offset of that line, its GameID), or (None, None)
+    at the end of the file.
+    """
+    offset = f.tell()
+    line = f.readline()
+    if not line:
+        return None, None
+    return offset, next(csv.reader([line.decode(encoding)]))[game_col]
+
+def game_shards(path, num_shards, encoding=ENCODING):
+    """
+    Splits a CSV sorted by GameID into at most num_shards byte ranges [(start, end)] of whole games,
+    after the header line. Returns (header columns, ranges).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        columns = next(csv.reader([header_line.decode(encoding)]))
+        game_col = columns.index('GameID')
+        data_start = f.tell()
+        cuts = [data_start]
+        for i in range(1, num_shards):
+            target = data_start + (size - data_start) * i // num_shards
+            if target <= cuts[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # Skip to the start of the next line
+            offset, game = _game_at(f, encoding, game_col)
+            # Move forward to the first line of the next game
+            while offset is not None:
+                next_offset, next_game = _game_at(f, encoding, game_col)
+                if next_game != game:
+                    offset = next_offset
+                    break
+            if offset is not None and offset > cuts[-1]:
+                cuts.append(offset)
+    cuts.append(size)
+    return columns, [(start, end) for start, end in zip(cuts[:-1], cuts[1:]) if end > start]
+
+# ---------------------- Workers ----------------------
+
+def _extract_shard(task):
+    """
+    Worker: parses one byte range of a play-by-play CSV and extracts its stints. On the legacy clock
+    the trailing "end of data" stints are dropped unless this is the last shard of the file.
+    Returns (stints, GameIDs in order, last Date).
+    """
+    path, columns, start, end, last, clock = task
+    with span("extract shard", file=os.path.basename(path), offset=start) as shard_span:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        plays = pd.read_csv(io.BytesIO(data), header=None, names=columns, encoding=ENCODING, delimiter=",")
+        stints = extract_stints(plays, clock)
+        if not last:
+            stints = stints.iloc[:len(stints) - tail_rows(clock)]
+        shard_span.rows = len(plays)
+        shard_span.fields['stints'] = len(stints)
+    last_date = pd.to_datetime(plays['Date']).max().strftime('%Y-%m-%d') if len(plays) and 'Date' in plays else None
+    return stints, list(pd.unique(plays['GameID'].astype(str))), last_date
+
+def extract_files(paths, workers=None, shards_per_worker=4, clock='game'):
+    """
+    Extracts the stints of every sorted play-by-play CSV in paths with a pool of workers, measuring
+    minutes on the given clock (see lineup_stints.py).
+    Returns [(stints, GameIDs, last Date)] in the order of paths, each identical to running
+    extract_stints() over the whole file.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks, owners = [], []
+    for i, path in enumerate(paths):
+        columns, ranges = game_shards(path, workers * shards_per_worker)
+        for j, (start, end) in enumerate(ranges):
+            tasks.append((path, columns, start, end, j == len(ranges) - 1, clock))
+            owners.append(i)
+
+    if workers == 1:
+        results = list(map(_extract_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_extract_shard, tasks))
+
+    merged = []
+    for i in range(len(paths)):
+        parts = [result for owner, result in zip(owners, results) if owner == i]
+        stints = pd.concat([p[0] for p in parts], ignore_index=True) if parts else pd.DataFrame(columns=OUTPUT_COLUMNS)
+        game_ids = [game for p in parts for game in p[1]]
+        dates = [p[2] for p in parts if p[2]]
+        merged.append((stints, game_ids, max(dates) if dates else None))
+    return merged
@@ -0,0 +1,93 @@
+"""
+player_ids.py
+
+Persistent player name -> integer ID dictionary shared by the Deep_Learning stages. IDs start at 1 so
+0 can stand for "no player", which also lines up with the padding index of the model's embedding.
+Names are only ever appended, so data encoded with an older copy of the dictionary stays valid.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = "Deep_Learning/.cache/player_ids.json"
+
+
+class PlayerIds:
+    """
+    Append-only mapping between player names and integer IDs (names[i - 1] has ID i).
+    """
+    def __init__(self, names=None, path=DEFAULT_PATH):
+        self.names = list(names or [])
+        self.index = {name: i + 1 for i, name in enumerate(self.names)}
+        self.path = path
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """
+        Loads the dictionary from path, or starts an empty one if it does not exist yet.
+        """
+        names = []
+        if os.path.exists(path):
+            with open(path) as f:
+                names = json.load(f)["names"]
+        return cls(names, path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"names": self.names}, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def names_hash(self, count=None):
+        """
+        SHA-256 of the first count names (all of them by default) in ID order, so data encoded with
+        a dictionary can check that this one gives those IDs the same names.
+        """
+        names = self.names if count is None else self.names[:count]
+        return hashlib.sha256(json.dumps(names).encode()).hexdigest()
+
+    def intern(self, name):
+        """
+        Returns the ID for name, assigning the next free ID if it has not been seen before.
+        """
+        player_id = self.index.get(name)
+        if player_id is None:
+            self.names.append(name)
+            player_id = self.index[name] = len(self.names)
+        return player_id
+
+    def encode(self, values):
+        """
+        Encodes an array of names (NaN for no player) into an int32 array of IDs (0 for no player).
+        Each distinct name is looked up once.
+        """
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        lookup = np.array([self.intern(name) for name in uniques] + [0], dtype=np.int32)
+        return lookup[codes]
+
+    def decode(self, ids):
+        """
+        Decodes an array of IDs back into an object array of names (NaN for 0).
+        """
+        lookup = np.array([np.nan] + self.names, dtype=object)
+        return lookup[np.asarray(ids)]
+
+    def encode_lineup_strings(self, lineups):
+        """
+        Parses stringified lineup tuples such as "('a', 'b', 'c', 'd', 'e')" into an int32 [N, 5]
+        array. Every distinct string is parsed only once.
+        """
+        codes, uniques = pd.factorize(pd.Series(lineups, dtype=object))
+        if len(uniques) == 0:
+            return np.zeros((0, 5), dtype=np.int32)
+        parsed = np.array([ast.literal_eval(lineup) for lineup in uniques], dtype=object).reshape(len(uniques), -1)
+        encoded = self.encode(parsed.ravel()).reshape(parsed.shape)
+        return encoded[codes]
@@ -0,0 +1,71 @@
+"""
+score.py
+
+Fast-start scoring entry point for the trained lineup model. Loads the model artifact written by
+DL_prediction.py (weights, player vocabulary and hyperparameters) on the first query and answers
+lineup queries with numpy only, so torch and pandas are never imported.
+
+Examples (from the project root):
+    python Deep_Learning/score.py bogdabo01,capelca01,collijo01,huntede01,youngtr01
+    python Deep_Learning/score.py bogdabo01,capelca01,collijo01,huntede01,youngtr01 --away --minutes 238.8
+    python Deep_Learning/score.py --stdin < lineups.txt
+
+With --stdin every line holds a comma-separated lineup, optionally followed by "home"/"away" and
+the minutes played together.
+"""
+
+import argparse
+import sys
+import time
+from model_artifact import DEFAULT_PATH, LineupScorer, adjusted_impact
+
+
+def format_result(lineup, per36, minutes):
+    """
+    Formats one scored lineup in the same style as lineup_predictions.txt.
+    """
+    if minutes is None:
+        return f"Per 36: {per36:.2f} | Lineup: {', '.join(lineup)}"
+    return f"Adjusted Impact: {adjusted_impact(per36, minutes):.2f} | Per 36: {per36:.2f} | Minutes: {minutes:.1f} | Lineup: {', '.join(lineup)}"
+
+
+def parse_query(line):
+    """
+    Parses a --stdin line into (lineup, is_home, minutes).
+    """
+    tokens = line.split()
+    lineup = [player.strip() for player in tokens[0].split(',')]
+    is_home, minutes = True, None
+    for token in tokens[1:]:
+        if token.lower() in ('home', 'away'):
+            is_home = token.lower() == 'home'
+        else:
+            minutes = float(token)
+    return lineup, is_home, minutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score lineups with a saved lineup model artifact.")
+    parser.add_argument("lineups", nargs="*", help="comma-separated player IDs, five per lineup")
+    parser.add_argument("--artifact", default=DEFAULT_PATH)
+    parser.add_argument("--away", action="store_true", help="score the lineups as the away team")
+    parser.add_argument("--minutes", type=float, help="minutes played together, for the adjusted impact")
+    parser.add_argument("--stdin", action="store_true", help="read one query per line from standard input")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scorer = LineupScorer(args.artifact)
+    queries = [(lineup.split(','), not args.away, args.minutes) for lineup in args.lineups]
+    if args.stdin:
+        queries += [parse_query(line) for line in sys.stdin if line.strip()]
+
+    for lineup, is_home, minutes in queries:
+        try:
+            print(format_result(lineup, scorer.score(lineup, is_home), minutes))
+        except (KeyError, ValueError) as e:
+            print(f"Skipped {', '.join(lineup)}: {e.args[0]}")
+    print(f"Scored {len(queries)} lineups in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
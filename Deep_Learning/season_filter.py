@@ -0,0 +1,177 @@
+"""
+season_filter.py
+
+Streaming season filter for the raw play-by-play export (all_games.csv). The input is read in
+chunks and only rows inside the season window are kept. Dates are parsed only for rows whose year
+can fall in the window. The result is written in Date, GameID, PlayNum order with an external merge
+sort: sorted runs are spilled to disk whenever the buffered rows exceed their share of the memory cap,
+then merged back together in bounded batches.
+
+The memory cap is split between the raw chunk being parsed (a quarter: the chunk size is measured on
+a small first chunk and shrunk to fit) and the buffered rows (a third of the rest, since sorting them
+holds the buffer, its concatenation and the sorted copy at once). It bounds the data the filter
+holds, not pandas' parser buffers or interpreter overhead, so peak RSS can still be somewhat higher.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import pandas as pd
+
+SORT_COLUMNS = ['Date', 'GameID', 'PlayNum']
+DATE_FORMAT = '%m/%d/%Y'
+CHUNK_SHARE = 4     # The raw chunk gets 1/4 of the memory cap
+SORT_OVERHEAD = 3   # Buffer + concatenated copy + sorted copy while sorting a run
+PROBE_ROWS = 10_000  # Rows of the first chunk, used to measure the bytes per raw row
+
+# ---------------------- Season Bounds ----------------------
+
+def season_bounds(season):
+    """
+    Returns the (start, end) dates of an NBA season given as "2021-22", running from the start of
+    September to the end of June. These match the bounds originally hard-coded for 2021-22.
+    """
+    first_year = int(season.split('-')[0])
+    return pd.Timestamp(first_year, 9, 1), pd.Timestamp(first_year + 1, 6, 30)
+
+def filter_chunk(chunk, start, end):
+    """
+    Keeps the rows of a chunk whose Date falls between start and end (inclusive). The year is
+    read from the raw string first so dates are only parsed for rows that can match.
+    """
+    years = pd.to_numeric(chunk['Date'].astype(str).str[-4:], errors='coerce')
+    chunk = chunk[years.between(start.year, end.year)].copy()
+    chunk['Date'] = pd.to_datetime(chunk['Date'], format=DATE_FORMAT, errors='coerce')
+    return chunk[chunk['Date'].between(start, end)]
+
+# ---------------------- External Merge Sort ----------------------
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+def _not_after(df, key):
+    """
+    Boolean mask of rows whose (Date, GameID, PlayNum) key is less than or equal to key.
+    """
+    date, game_id, play_num = key
+    return ((df['Date'] < date) |
+            ((df['Date'] == date) & ((df['GameID'] < game_id) |
+                                     ((df['GameID'] == game_id) & (df['PlayNum'] <= play_num)))))
+
+def _write_run(df, run_dir, part_rows):
+    """
+    Writes an already-sorted frame to run_dir as a sequence of pickled parts of part_rows rows.
+    """
+    os.makedirs(run_dir)
+    for i, start in enumerate(range(0, len(df), part_rows)):
+        df.iloc[start:start + part_rows].to_pickle(os.path.join(run_dir, f"{i:06d}.pkl"))
+    return run_dir
+
+def _read_run(run_dir):
+    """
+    Yields the parts of a spilled run in order.
+    """
+    for name in sorted(os.listdir(run_dir)):
+        with open(os.path.join(run_dir, name), 'rb') as f:
+            yield pickle.load(f)
+
+def _merge_runs(run_dirs):
+    """
+    Merges sorted runs into sorted batches. Each round takes every buffered row up to the smallest
+    "last key" among the runs' current parts, so at most one part per run is held in memory.
+    """
+    readers = [_read_run(d) for d in run_dirs]
+    heads = [next(r, None) for r in readers]
+    while any(h is not None for h in heads):
+        active = [i for i, h in enumerate(heads) if h is not None]
+        bound = min(tuple(heads[i].iloc[-1][SORT_COLUMNS]) for i in active)
+        taken = []
+        for i in active:
+            mask = _not_after(heads[i], bound)
+            taken.append(heads[i][mask])
+            rest = heads[i][~mask]
+            heads[i] = rest if len(rest) else next(readers[i], None)
+        batch = pd.concat(taken)
+        yield batch.sort_values(by=SORT_COLUMNS, kind='stable')
+
+def _append_csv(df, output_path, first):
+    df.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+
+def filter_season(input_path, output_path, start, end, chunksize=200_000, memory_limit_mb=512, tmp_dir=None):
+    """
+    Streams input_path in chunks, keeps the plays between start and end and writes them to
+    output_path sorted by Date, GameID and PlayNum. Chunks are at most chunksize rows and shrunk
+    so a raw chunk fits in a quarter of memory_limit_mb; kept rows are spilled as sorted runs once
+    sorting them could exceed the rest. Returns the number of rows written.
+    """
+    memory_limit = memory_limit_mb * 1024 * 1024
+    chunk_budget = memory_limit // CHUNK_SHARE
+    buffer_limit = (memory_limit - chunk_budget) // SORT_OVERHEAD
+    work_dir = tempfile.mkdtemp(prefix='season_runs_', dir=tmp_dir)
+    runs, buffer, buffered_bytes, part_rows = [], [], 0, chunksize
+
+    def spill():
+        nonlocal buffer, buffered_bytes
+        run = pd.concat(buffer).sort_values(by=SORT_COLUMNS, kind='stable')
+        runs.append(_write_run(run, os.path.join(work_dir, f"run{len(runs):04d}"), part_rows))
+        buffer, buffered_bytes = [], 0
+
+    try:
+        with pd.read_csv(input_path, encoding="ISO-8859-1", delimiter=",", on_bad_lines='skip',
+                         chunksize=chunksize) as reader:
+            size = min(chunksize, PROBE_ROWS)
+            while True:
+                try:
+                    chunk = reader.get_chunk(size)
+                except StopIteration:
+                    break
+                # Rows per chunk that keep a raw chunk within its share of the cap
+                raw_row_bytes = _frame_bytes(chunk) / max(1, len(chunk))
+                size = max(1000, min(chunksize, int(chunk_budget / max(1.0, raw_row_bytes))))
+
+                chunk = filter_chunk(chunk, start, end)
+                if chunk.empty:
+                    continue
+                buffer.append(chunk)
+                buffered_bytes += _frame_bytes(chunk)
+                if buffered_bytes >= buffer_limit:
+                    # Size the run parts so that a part from each of 16 runs fits in the cap while merging
+                    bytes_per_row = buffered_bytes / sum(len(c) for c in buffer)
+                    part_rows = max(1000, int(memory_limit / (32 * bytes_per_row)))
+                    spill()
+
+        if not runs:
+            # Everything fit in the buffer's share of the cap: a single in-memory sort
+            result = pd.concat(buffer) if buffer else pd.DataFrame()
+            if not result.empty:
+                result = result.sort_values(by=SORT_COLUMNS, kind='stable')
+            result.to_csv(output_path, index=False)
+            return len(result)
+
+        if buffer:
+            spill()
+        # Merge in passes so that only a bounded number of run parts are open at once
+        fan_in = max(2, memory_limit // max(1, 2 * part_rows * int(bytes_per_row)))
+        generation = 0
+        while len(runs) > fan_in:
+            merged = []
+            for g in range(0, len(runs), fan_in):
+                group = runs[g:g + fan_in]
+                run_dir = os.path.join(work_dir, f"merge{generation:02d}_{g:04d}")
+                os.makedirs(run_dir)
+                for i, batch in enumerate(_merge_runs(group)):
+                    batch.to_pickle(os.path.join(run_dir, f"{i:06d}.pkl"))
+                for d in group:
+                    shutil.rmtree(d)
+                merged.append(run_dir)
+            runs = merged
+            generation += 1
+
+        written = 0
+        for batch in _merge_runs(runs):
+            _append_csv(batch, output_path, written == 0)
+            written += len(batch)
+        return written
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
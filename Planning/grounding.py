@@ -0,0 +1,128 @@
+"""
+grounding.py
+
+Grounds the actions of the substitution domain (game_simulation_domain.pddl) for one problem.
+Naive grounding of play-time tries every (slot, player) for each of its three court positions,
+(slots x players)^3 combinations, and substitute tries slots^2 x players^2. Two kinds of pruning
+keep the grounded set small:
+
+- symmetry: play-time's three (slot, player) pairs are interchangeable (same preconditions and
+  effects), so only the ordering that follows the problem's court slot order is kept
+- reachability: a relaxed fixpoint over has-player, ignoring deletes, finds which players can ever
+  occupy each court and bench slot. A court player can only leave once they can reach stamina <= 0
+  (stamina <= 0 already, or a positive fatigue rate); a bench player can only come in with
+  stamina >= 1 (their initial stamina, or max-stamina once they have played and been subbed out).
+  Players who can never reach a slot get no groundings for it.
+
+Groundings are cached in memory per problem, keyed on the parsed problem and the domain's actions,
+so repeated solves of the same problem skip grounding.
+
+    grounding = ground_problem(problem, domain, slots, players)
+    grounding['play'][(p_g, p_f, p_c)]      # "(play-time g curry f lebron c embiid)"
+    grounding['substitute'][(c, b, pc, pb)] # "(substitute g b1 curry lillard)"
+"""
+
+import hashlib
+import itertools
+import math
+from pddl import objects_of_type
+
+_CACHE = {}
+
+
+def _slot_roles(problem, slots):
+    court = [i for i, slot in enumerate(slots) if ("court-slot", slot) in problem["facts"]]
+    bench = [i for i, slot in enumerate(slots) if ("bench-slot", slot) in problem["facts"]]
+    return court, bench
+
+
+def play_time_arity(domain):
+    """
+    Number of (slot, player) pairs, one per court slot, that the domain's play-time action takes.
+    """
+    return sum(1 for t in domain["actions"]["play-time"]["parameters"].values() if t == "player")
+
+
+def reachable_occupants(problem, slots, players):
+    """
+    Relaxed reachability of has-player: returns ({slot index: set of player indices}, players who
+    can leave the court, players who can come in from the bench).
+    """
+    index = {player: i for i, player in enumerate(players)}
+    fluents = problem["fluents"]
+    stamina = [fluents.get(("stamina", player), 0) for player in players]
+    max_stamina = [fluents.get(("max-stamina", player), 0) for player in players]
+    fatigue = [fluents.get(("fatigue-rate", player), 0) for player in players]
+    court, bench = _slot_roles(problem, slots)
+
+    occupants = {s: set() for s in range(len(slots))}
+    for fact in problem["facts"]:
+        if fact[0] == "has-player":
+            occupants[slots.index(fact[1])].add(index[fact[2]])
+
+    can_tire = [stamina[p] <= 0 or fatigue[p] > 0 for p in range(len(players))]
+    fresh = [stamina[p] >= 1 for p in range(len(players))]
+    changed = True
+    while changed:
+        changed = False
+        for c in court:
+            leaving = [p for p in occupants[c] if can_tire[p]]
+            for b in bench:
+                incoming = [p for p in occupants[b] if fresh[p]]
+                for pc, pb in itertools.product(leaving, incoming):
+                    if pc == pb:
+                        continue
+                    if pb not in occupants[c] or pc not in occupants[b]:
+                        occupants[c].add(pb)
+                        occupants[b].add(pc)
+                        changed = True
+                    if not fresh[pc] and max_stamina[pc] >= 1:
+                        fresh[pc] = True  # Reset to max-stamina on the way out
+                        changed = True
+    can_leave = {p for p in range(len(players)) if can_tire[p]}
+    can_enter = {p for p in range(len(players)) if fresh[p]}
+    return occupants, can_leave, can_enter
+
+
+def ground_problem(problem, domain, slots, players):
+    """
+    Grounded play-time and substitute actions of a parsed problem, as a dict with:
+    - play: {(player index per court slot, in court slot order): action}
+    - substitute: {(court slot, bench slot, outgoing player, incoming player) indices: action}
+    - reachable: {slot index: sorted player indices that can occupy it}
+    - naive: number of groundings per action before pruning
+    Raises ValueError when the problem does not have one court slot per play-time (slot, player) pair.
+    """
+    key = hashlib.sha256(repr((sorted(problem["facts"]), sorted(problem["fluents"].items()),
+                               list(problem["objects"].items()), domain["actions"])).encode()).hexdigest()
+    if key in _CACHE:
+        return _CACHE[key]
+
+    court, bench = _slot_roles(problem, slots)
+    arity = play_time_arity(domain)
+    if len(court) != arity:
+        raise ValueError(f"play-time takes {arity} court slots, but the problem has {len(court)}")
+    occupants, can_leave, can_enter = reachable_occupants(problem, slots, players)
+
+    play = {}
+    for on_court in itertools.product(*(sorted(occupants[c]) for c in court)):
+        if len(set(on_court)) == len(on_court):
+            play[on_court] = "(play-time " + " ".join(f"{slots[c]} {players[p]}" for c, p in zip(court, on_court)) + ")"
+
+    substitute = {}
+    for c, b in itertools.product(court, bench):
+        leaving = sorted(occupants[c] & can_leave)
+        incoming = sorted(occupants[b] & can_enter)
+        for pc, pb in itertools.product(leaving, incoming):
+            if pc != pb:
+                substitute[(c, b, pc, pb)] = f"(substitute {slots[c]} {slots[b]} {players[pc]} {players[pb]})"
+
+    grounding = {
+        "play": play,
+        "substitute": substitute,
+        "reachable": {s: sorted(occupants[s]) for s in occupants},
+        "naive": {name: math.prod(len(objects_of_type(problem, t)) for t in action["parameters"].values())
+                  for name, action in domain["actions"].items()},
+    }
+    _CACHE[key] = grounding
+    return grounding
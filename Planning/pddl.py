@@ -0,0 +1,147 @@
+"""
+pddl.py
+
+Minimal PDDL reader for the domain and problem files in this folder. Files are parsed into nested
+lists of lowercase tokens (PDDL is case-insensitive), with ';' comments removed. Problems are
+split into their objects, init facts, numeric fluents, goal and metric. Domains are split into
+their actions.
+
+    problem = parse_problem("Planning/Selection Planning/defense_selection.pddl")
+    problem['fluents'][('defense', 'poeltl')]   # 69
+"""
+
+import re
+
+TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+
+
+def parse_sexpr(text):
+    """
+    Parses PDDL text into nested lists of lowercase string tokens.
+    """
+    text = re.sub(r";[^\n]*", "", text).lower()
+    stack = [[]]
+    for token in TOKEN_RE.findall(text):
+        if token == "(":
+            stack.append([])
+        elif token == ")":
+            if len(stack) == 1:
+                raise ValueError("Unbalanced ')' in PDDL text")
+            closed = stack.pop()
+            stack[-1].append(closed)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '(' in PDDL text")
+    if len(stack[0]) != 1:
+        raise ValueError("Expected exactly one top-level (define ...) form")
+    return stack[0][0]
+
+
+def read_pddl(path):
+    """
+    Reads and parses a PDDL file.
+    """
+    with open(path, encoding="utf-8") as f:
+        return parse_sexpr(f.read())
+
+
+def _sections(define):
+    """
+    Maps each ':keyword' section of a (define ...) form to its body (the list after the keyword).
+    """
+    sections = {}
+    for part in define[2:]:
+        if isinstance(part, list) and part and isinstance(part[0], str) and part[0].startswith(":"):
+            sections.setdefault(part[0], []).append(part[1:])
+    return sections
+
+
+def parse_typed_list(tokens):
+    """
+    Parses 'a b - type c - other' into {name: type}. Untyped names get type 'object'.
+    """
+    typed, pending = {}, []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == "-":
+            for name in pending:
+                typed[name] = tokens[i + 1]
+            pending = []
+            i += 2
+        else:
+            pending.append(tokens[i])
+            i += 1
+    for name in pending:
+        typed[name] = "object"
+    return typed
+
+
+def _number(token):
+    value = float(token)
+    return int(value) if value.is_integer() else value
+
+
+def parse_problem(path):
+    """
+    Parses a problem file into a dict with:
+    - name, domain
+    - objects: {name: type}, in file order
+    - facts: set of ground predicate tuples, e.g. ('can-play', 'poeltl', 'c')
+    - fluents: {(function, *args): number}, e.g. {('defense', 'poeltl'): 69, ('time-left',): 20}
+    - goal: the goal expression as nested lists
+    - metric: ('maximize' or 'minimize', expression) or None
+    """
+    define = read_pddl(path)
+    sections = _sections(define)
+    problem = {
+        "name": define[1][1],
+        "domain": sections[":domain"][0][0],
+        "objects": parse_typed_list(sections.get(":objects", [[]])[0]),
+        "facts": set(),
+        "fluents": {},
+        "goal": sections[":goal"][0][0] if ":goal" in sections else None,
+        "metric": tuple(sections[":metric"][0][:2]) if ":metric" in sections else None,
+    }
+    for item in sections.get(":init", [[]])[0]:
+        if item[0] == "=":
+            problem["fluents"][tuple(item[1])] = _number(item[2])
+        else:
+            problem["facts"].add(tuple(item))
+    return problem
+
+
+def parse_domain(path):
+    """
+    Parses a domain file into a dict with name, predicates, functions and actions
+    ({name: {'parameters': {var: type}, 'precondition': expr, 'effect': expr}}).
+    """
+    define = read_pddl(path)
+    domain = {"name": define[1][1], "actions": {}}
+    sections = _sections(define)
+    domain["predicates"] = [p[0] for p in sections.get(":predicates", [[]])[0]]
+    domain["functions"] = [f[0] for f in sections.get(":functions", [[]])[0] if isinstance(f, list)]
+    for body in sections.get(":action", []):
+        fields = dict(zip(body[1::2], body[2::2]))
+        domain["actions"][body[0]] = {
+            "parameters": parse_typed_list(fields.get(":parameters", [])),
+            "precondition": fields.get(":precondition", ["and"]),
+            "effect": fields.get(":effect", ["and"]),
+        }
+    return domain
+
+
+def conjuncts(expr):
+    """
+    The parts of an (and ...) expression, or the expression itself as a single part.
+    """
+    if expr and expr[0] == "and":
+        return expr[1:]
+    return [expr] if expr else []
+
+
+def objects_of_type(problem, type_name):
+    """
+    Object names of one type, in file order.
+    """
+    return [name for name, t in problem["objects"].items() if t == type_name]
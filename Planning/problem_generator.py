@@ -0,0 +1,268 @@
+"""
+problem_generator.py
+
+Generates selection and substitution PDDL problems from the 2021-22 player stats CSV, for every team
+and any roster size from 5 to 15, so the planners can be benchmarked on real rosters at scale.
+
+A team's roster is its top players by total minutes. Player attributes are league percentiles
+(0-100) over players with more than 10 games:
+- shooting: mean percentile of 3P% (weighted towards volume by 3PA), eFG% and FT%
+- defense: mean percentile of per-36 steals + blocks and per-36 defensive rebounds
+- playmaking: percentile of per-36 assists
+- offense: percentile of per-36 points
+- composite-score: offense + defense + playmaking (as in the hand-written problems)
+- height: by position (the CSV has no heights); stamina: minutes per game
+
+Each player can play their listed position(s) and the neighbouring ones (PG-SG-SF-PF-C).
+Substitution problems put the three players with the most minutes on court (slots G, F, C) and the
+rest on the bench. Stamina is minutes per game / 6, and fatigue rate is 1 for players averaging
+28+ minutes and 2 otherwise.
+
+Usage:
+    python Planning/problem_generator.py --sizes 5 10 15                    # all 30 teams
+    python Planning/problem_generator.py --teams BOS MIA --sizes 8 --benchmark
+"""
+
+import argparse
+import os
+import re
+import statistics
+import time
+import unicodedata
+import pandas as pd
+from pddl import parse_domain
+
+STATS_PATH = "CSP/2021-2022 NBA Player Stats - Regular.csv"
+OUTPUT_DIR = "Planning/Generated"
+POSITIONS = ["PG", "SG", "SF", "PF", "C"]
+HEIGHTS = {"PG": 75, "SG": 77, "SF": 79, "PF": 81, "C": 83}
+OBJECTIVES = {
+    "composite": "total-lineup-cost",
+    "shooting": "total-shooting",
+    "defense": "total-defense",
+    "playmaking": "total-playmaking",
+    "offense": "total-offense",
+}
+COURT_SLOTS = ["g", "f", "c"]
+
+
+def load_stats(path=STATS_PATH):
+    """
+    Reads the player stats CSV, without the combined 'TOT' rows of traded players.
+    """
+    stats = pd.read_csv(path, encoding="ISO-8859-1", delimiter=";")
+    return stats[stats["Tm"] != "TOT"].reset_index(drop=True)
+
+
+def player_attributes(stats):
+    """
+    Adds the 0-100 planning attributes (see module docstring) to a copy of the stats table.
+    Percentiles are computed over players with more than 10 games.
+    """
+    stats = stats.copy()
+    qualified = stats["G"] > 10
+    minutes = stats["MP"].where(stats["MP"] > 0)
+
+    def percentile(values):
+        ranks = values.where(qualified).rank(pct=True)
+        return (ranks.fillna(0) * 100).round()
+
+    volume_3p = stats["3P%"].fillna(0) * (stats["3PA"] / (stats["3PA"] + 1))
+    stats["shooting"] = ((percentile(volume_3p) + percentile(stats["eFG%"].fillna(0)) +
+                          percentile(stats["FT%"].fillna(0))) / 3).round().astype(int)
+    stats["defense"] = ((percentile((stats["STL"] + stats["BLK"]) / minutes * 36) +
+                         percentile(stats["DRB"] / minutes * 36)) / 2).round().astype(int)
+    stats["playmaking"] = percentile(stats["AST"] / minutes * 36).astype(int)
+    stats["offense"] = percentile(stats["PTS"] / minutes * 36).astype(int)
+    stats["composite"] = stats["offense"] + stats["defense"] + stats["playmaking"]
+    stats["positions"] = stats["Pos"].str.split("-")
+    stats["height"] = stats["positions"].map(lambda positions: HEIGHTS.get(positions[0], 79))
+    stats["stamina"] = stats["MP"].round().astype(int)
+    return stats
+
+
+def pddl_name(player, taken):
+    """
+    Lowercase ASCII PDDL object name for a player, made unique against the names in taken.
+    """
+    ascii_name = unicodedata.normalize("NFKD", player).encode("ascii", "ignore").decode()
+    name = re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "player"
+    unique, n = name, 2
+    while unique in taken:
+        unique, n = f"{name}-{n}", n + 1
+    taken.add(unique)
+    return unique
+
+
+def team_roster(attributes, team, size):
+    """
+    The size players of a team with the most total minutes, with their PDDL names.
+    """
+    team_rows = attributes[attributes["Tm"] == team]
+    roster = team_rows.assign(total_minutes=team_rows["G"] * team_rows["MP"]) \
+        .sort_values("total_minutes", ascending=False, kind="stable").head(size).copy()
+    taken = set()
+    roster["name"] = [pddl_name(player, taken) for player in roster["Player"]]
+    return roster
+
+
+def eligible_positions(positions):
+    """
+    Listed positions plus their neighbours in PG-SG-SF-PF-C order.
+    """
+    eligible = set()
+    for position in positions:
+        if position in POSITIONS:
+            i = POSITIONS.index(position)
+            eligible.update(POSITIONS[max(i - 1, 0):i + 2])
+    return [position for position in POSITIONS if position in eligible]
+
+# ---------------------- Problem Text ----------------------
+
+def selection_problem(team, roster, objective):
+    """
+    Text of a selection problem that maximizes one objective for a roster.
+    """
+    metric = OBJECTIVES[objective]
+    names = " ".join(roster["name"])
+    lines = [
+        f"(define (problem {team.lower()}-{len(roster)}-{objective}-selection)",
+        "  (:domain basketball-lineup-multi-objective)",
+        "",
+        f"  ;; Generated from 2021-22 stats: select a 5-player {team} lineup that maximizes {metric}.",
+        "",
+        "  (:objects",
+        f"    {names} - player",
+        "    pg sg sf pf c - position",
+        "  )",
+        "",
+        "  (:init",
+        f"    (= ({metric}) 0)",
+        "",
+    ]
+    for row in roster.itertuples(index=False):
+        lines.append(f"    ;; {row.Player} ({row.Pos})")
+        lines.append(f"    (= (height {row.name}) {row.height}) (= (stamina {row.name}) {row.stamina}) (= (shooting {row.name}) {row.shooting})")
+        lines.append(f"    (= (defense {row.name}) {row.defense}) (= (playmaking {row.name}) {row.playmaking}) (= (offense {row.name}) {row.offense})")
+        lines.append(f"    (= (composite-score {row.name}) {row.composite})")
+        lines.append(f"    (available {row.name}) (not-in-lineup {row.name})")
+        lines.append("    " + " ".join(f"(can-play {row.name} {position.lower()})" for position in eligible_positions(row.positions)))
+        lines.append("")
+    lines += ["    " + " ".join(f"(position-available {position.lower()})" for position in POSITIONS), "  )", "",
+              "  (:goal", "    (and"]
+    lines += [f"      (position-filled {position.lower()})" for position in POSITIONS]
+    lines += ["    )", "  )", "", f"  (:metric maximize ({metric}))", ")", ""]
+    return "\n".join(lines)
+
+
+def substitution_problem(team, roster, time_left=20, momentum=5):
+    """
+    Text of a substitution problem: the three players with the most minutes start on court.
+    """
+    bench_slots = [f"b{i}" for i in range(1, len(roster) - len(COURT_SLOTS) + 1)]
+    slots = COURT_SLOTS + bench_slots
+    lines = [
+        f"(define (problem {team.lower()}-{len(roster)}-game)",
+        "  (:domain basketball-stamina)",
+        "",
+        f"  ;; Generated from 2021-22 stats: {team} rotation with {len(roster)} players over {time_left} time units.",
+        "",
+        "  (:objects",
+        "    " + " ".join(roster["name"]) + " - player",
+        "    " + " ".join(COURT_SLOTS) + " - slot",
+        "    " + " ".join(bench_slots) + " - slot",
+        "  )",
+        "",
+        "  (:init",
+    ]
+    for slot, row in zip(slots, roster.itertuples(index=False)):
+        max_stamina = max(int(round(row.MP / 6)), 1)
+        fatigue = 1 if row.MP >= 28 else 2
+        lines.append(f"    (has-player {slot} {row.name}) ;; {row.Player}, {row.MP:.1f} MPG")
+        lines.append(f"    (= (stamina {row.name}) {max_stamina}) (= (max-stamina {row.name}) {max_stamina}) (= (fatigue-rate {row.name}) {fatigue})")
+    lines.append("    " + " ".join(f"(court-slot {slot})" for slot in COURT_SLOTS))
+    lines.append("    " + " ".join(f"(bench-slot {slot})" for slot in bench_slots))
+    lines += [f"    (= (time-left) {time_left})", f"    (= (momentum) {momentum})", "  )", "",
+              "  (:goal", "    (<= (time-left) 0)", "  )", "", "  (:metric maximize (momentum))", ")", ""]
+    return "\n".join(lines)
+
+
+def generate(stats, teams, sizes, output_dir=OUTPUT_DIR, time_left=20):
+    """
+    Writes every selection and substitution problem for the given teams and roster sizes.
+    Returns [(team, size, kind, path)].
+    """
+    attributes = player_attributes(stats)
+    written = []
+    for size in sizes:
+        if not 5 <= size <= 15:
+            raise ValueError(f"Roster size must be between 5 and 15, got {size}")
+        directory = os.path.join(output_dir, f"roster_{size:02d}")
+        os.makedirs(directory, exist_ok=True)
+        for team in teams:
+            roster = team_roster(attributes, team, size)
+            for objective in OBJECTIVES:
+                path = os.path.join(directory, f"{team.lower()}_{objective}_selection.pddl")
+                with open(path, "w") as f:
+                    f.write(selection_problem(team, roster, objective))
+                written.append((team, size, "selection", path))
+            path = os.path.join(directory, f"{team.lower()}_game_problem.pddl")
+            with open(path, "w") as f:
+                f.write(substitution_problem(team, roster, time_left))
+            written.append((team, size, "substitution", path))
+    return written
+
+# ---------------------- Benchmark ----------------------
+
+def benchmark(written, beam_width=8, max_nodes=200_000):
+    """
+    Solves every generated problem and prints solve time statistics per roster size: the selection
+    problems with branch-and-bound, the substitution problems with A* (up to max_nodes expanded)
+    and beam search.
+    """
+    from selection_planner import DOMAIN_PATH as SELECTION_DOMAIN, solve_problem
+    from substitution_sim import DOMAIN_PATH as SUBSTITUTION_DOMAIN, astar, beam_search, load_scenario
+
+    selection_domain, substitution_domain = parse_domain(SELECTION_DOMAIN), parse_domain(SUBSTITUTION_DOMAIN)
+    timings = {}
+    for team, size, kind, path in written:
+        if kind == "selection":
+            result = solve_problem(path, selection_domain)
+            timings.setdefault((size, "selection b&b"), []).append((result["seconds"], result["plan"] is not None))
+        else:
+            scenario = load_scenario(path, substitution_domain)
+            start = time.perf_counter()
+            plan, _, _ = astar(scenario, max_nodes)
+            timings.setdefault((size, "substitution A*"), []).append((time.perf_counter() - start, plan is not None))
+            start = time.perf_counter()
+            plan, _ = beam_search(scenario, beam_width)
+            timings.setdefault((size, "substitution beam"), []).append((time.perf_counter() - start, plan is not None))
+
+    print(f"{'size':>4}  {'solver':<18} {'problems':>8} {'solved':>6} {'median ms':>10} {'max ms':>9}")
+    for (size, solver), results in sorted(timings.items()):
+        seconds = [s for s, _ in results]
+        print(f"{size:>4}  {solver:<18} {len(results):>8} {sum(ok for _, ok in results):>6} "
+              f"{statistics.median(seconds) * 1000:>10.2f} {max(seconds) * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate PDDL planning problems from real roster data.")
+    parser.add_argument("--stats", default=STATS_PATH)
+    parser.add_argument("--teams", nargs="*", help="team abbreviations (default: all 30)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(range(5, 16)), help="roster sizes, 5 to 15")
+    parser.add_argument("--time-left", type=int, default=20, help="time units of the substitution problems")
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--benchmark", action="store_true", help="solve every generated problem and report timings")
+    parser.add_argument("--max-nodes", type=int, default=200_000, help="A* node limit per substitution problem in --benchmark")
+    args = parser.parse_args()
+
+    stats = load_stats(args.stats)
+    teams = args.teams or sorted(stats["Tm"].unique())
+    written = generate(stats, teams, args.sizes, args.output, args.time_left)
+    print(f"Wrote {len(written)} problems for {len(teams)} teams and roster sizes {args.sizes} to {args.output}")
+    if args.benchmark:
+        benchmark(written, max_nodes=args.max_nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+selection_planner.py
+
+Local solver for the lineup selection problems in "Planning/Selection Planning", replacing the manual
+OPTIC web-editor run. A problem is read with pddl.py and turned into an assignment problem:
+
+- the positions to fill come from the (position-filled ?pos) goals
+- a player can take a position when every precondition atom of the domain action that increases the
+  metric fluent holds in :init for that (player, position) pair
+- each player and each position is used once (the action deletes not-in-lineup / position-available)
+- a player's value is the per-player fluent that the action adds to the metric fluent
+
+The best assignment is found with depth-first branch-and-bound: positions with the fewest candidates
+are filled first, candidates are tried best first, and a branch is cut as soon as the value so far
+plus the best candidate of every open position cannot beat the incumbent.
+
+Usage:
+    python Planning/selection_planner.py                          # every *_selection.pddl problem
+    python Planning/selection_planner.py path/to/problem.pddl ... --verify
+"""
+
+import argparse
+import glob
+import itertools
+import os
+import time
+from pddl import conjuncts, objects_of_type, parse_domain, parse_problem
+
+SELECTION_DIR = "Planning/Selection Planning"
+DOMAIN_PATH = os.path.join(SELECTION_DIR, "selection_domain.pddl")
+
+
+def _substitute(atom, binding):
+    return tuple(binding.get(token, token) for token in atom)
+
+
+def load_selection_problem(problem_path, domain=None):
+    """
+    Reads a selection problem into a dict with the action used, metric fluent, positions to fill,
+    candidate players per position ({position: [(value, player)]}, best first) and the initial
+    metric value.
+    """
+    domain = domain or parse_domain(DOMAIN_PATH)
+    problem = parse_problem(problem_path)
+    direction, metric_expr = problem["metric"]
+    if direction != "maximize":
+        raise ValueError(f"{problem_path}: only maximize metrics are supported, got {direction}")
+    metric_fluent = tuple(metric_expr)
+
+    # The action whose effect increases the metric fluent, and the per-player fluent it adds
+    for action_name, action in domain["actions"].items():
+        increases = [e for e in conjuncts(action["effect"]) if e[0] == "increase" and tuple(e[1]) == metric_fluent]
+        if increases:
+            value_expr = increases[0][2]
+            break
+    else:
+        raise ValueError(f"{problem_path}: no action of domain {domain['name']} increases {metric_fluent}")
+
+    (player_var, player_type), (position_var, position_type) = action["parameters"].items()
+    players = objects_of_type(problem, player_type)
+    positions = [goal[1] for goal in conjuncts(problem["goal"]) if goal[0] == "position-filled"]
+    preconditions = [tuple(atom) for atom in conjuncts(action["precondition"])]
+
+    candidates = {}
+    for position in positions:
+        options = []
+        for player in players:
+            binding = {player_var: player, position_var: position}
+            if all(_substitute(atom, binding) in problem["facts"] for atom in preconditions):
+                options.append((problem["fluents"].get(_substitute(value_expr, binding), 0), player))
+        # Best value first; ties keep the object order of the problem file
+        candidates[position] = sorted(options, key=lambda option: -option[0])
+
+    return {
+        "name": problem["name"],
+        "action": action_name,
+        "metric": metric_fluent[0],
+        "initial": problem["fluents"].get(metric_fluent, 0),
+        "positions": positions,
+        "candidates": candidates,
+    }
+
+
+def solve_assignment(positions, candidates):
+    """
+    Branch-and-bound search for the distinct-player assignment of every position with the highest
+    total value. Returns ({position: player} or None when infeasible, total, nodes expanded).
+    """
+    order = sorted(positions, key=lambda position: len(candidates[position]))
+    # bound[i]: best possible value of positions order[i:], ignoring that players must differ
+    bound = [0] * (len(order) + 1)
+    for i in range(len(order) - 1, -1, -1):
+        bound[i] = bound[i + 1] + (candidates[order[i]][0][0] if candidates[order[i]] else float("-inf"))
+
+    best = {"total": float("-inf"), "assignment": None}
+    used = set()
+    chosen = []
+    nodes = 0
+
+    def search(i, total):
+        nonlocal nodes
+        nodes += 1
+        if i == len(order):
+            if total > best["total"]:
+                best["total"], best["assignment"] = total, dict(zip(order, chosen))
+            return
+        for value, player in candidates[order[i]]:
+            if total + value + bound[i + 1] <= best["total"]:
+                break  # Candidates are sorted, so no later one can do better either
+            if player in used:
+                continue
+            used.add(player)
+            chosen.append(player)
+            search(i + 1, total + value)
+            chosen.pop()
+            used.discard(player)
+
+    search(0, 0)
+    if best["assignment"] is None:
+        return None, None, nodes
+    return best["assignment"], best["total"], nodes
+
+
+def brute_force_assignment(positions, candidates):
+    """
+    Exhaustive reference search used by --verify. Returns the best total or None.
+    """
+    best = None
+    for combo in itertools.product(*(candidates[position] for position in positions)):
+        if len({player for _, player in combo}) == len(combo):
+            total = sum(value for value, _ in combo)
+            best = total if best is None else max(best, total)
+    return best
+
+
+def solve_problem(path, domain=None):
+    """
+    Loads and solves one selection problem. Returns a result dict with the plan (one action per
+    position, in goal order), the final metric value, nodes expanded and seconds taken.
+    """
+    start = time.perf_counter()
+    selection = load_selection_problem(path, domain)
+    assignment, total, nodes = solve_assignment(selection["positions"], selection["candidates"])
+    plan = None
+    if assignment is not None:
+        plan = [f"({selection['action']} {assignment[position]} {position})" for position in selection["positions"]]
+    return {
+        **selection,
+        "path": path,
+        "plan": plan,
+        "value": None if total is None else selection["initial"] + total,
+        "nodes": nodes,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve PDDL lineup selection problems locally.")
+    parser.add_argument("problems", nargs="*", help="problem files or directories (default: every *_selection.pddl)")
+    parser.add_argument("--domain", default=DOMAIN_PATH)
+    parser.add_argument("--verify", action="store_true", help="check every optimum against exhaustive search")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary line per problem")
+    args = parser.parse_args()
+
+    paths = []
+    for target in args.problems or [SELECTION_DIR]:
+        if os.path.isdir(target):
+            paths.extend(sorted(glob.glob(os.path.join(target, "*_selection.pddl"))))
+        else:
+            paths.append(target)
+
+    domain = parse_domain(args.domain)
+    start = time.perf_counter()
+    failures = 0
+    for path in paths:
+        result = solve_problem(path, domain)
+        status = "no plan" if result["plan"] is None else f"{result['metric']} = {result['value']}"
+        print(f"{os.path.basename(path)}: {status} ({result['nodes']} nodes, {result['seconds'] * 1000:.2f} ms)")
+        if result["plan"] is not None and not args.quiet:
+            for step in result["plan"]:
+                print(f"    {step}")
+        if args.verify:
+            expected = brute_force_assignment(result["positions"], result["candidates"])
+            found = None if result["plan"] is None else result["value"] - result["initial"]
+            if expected != found:
+                failures += 1
+                print(f"    MISMATCH: exhaustive search found {expected}")
+    print(f"Solved {len(paths)} problems in {time.perf_counter() - start:.3f}s"
+          + (f", {failures} mismatches against exhaustive search" if args.verify else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+substitution_sim.py
+
+Local simulator and planner for the stamina/momentum scenarios in "Planning/Substitution Planning",
+replacing the manual OPTIC web-editor run. A problem is read with pddl.py into arrays:
+
+- occupant[s]: player index in slot s (-1 when empty); court and bench slots are index lists
+- stamina, max_stamina, fatigue: float arrays over players
+- time_left, momentum, and the momentum gained per play-time / lost per substitute (read from the domain)
+
+Following game_simulation_domain.pddl, play-time needs every court player at stamina >= 1, and a
+court player can only be substituted once at stamina <= 0, for a bench player at stamina >= 1 (the
+outgoing player is reset to max-stamina). Every plan plays time_left units, so the final momentum is
+fixed apart from the number of substitutions, and the choices that matter are which bench player
+replaces a tired one.
+
+The search runs on the grounded actions from grounding.py (cached per problem, without symmetric
+or unreachable groundings). Players with the same max-stamina and fatigue rate are interchangeable,
+so search states are compared by the (class, stamina) of the court and bench players rather than by
+who they are, and only one of several interchangeable substitutions is expanded.
+
+Three ways to evaluate a scenario:
+- astar(): optimal plan (fewest substitutions). The heuristic counts court players who cannot last
+  the remaining time, each of whom needs at least one more substitution.
+- beam_search(): keeps the best `width` states per time unit.
+- rollouts(): batched Monte Carlo over thousands of substitution schedules at once, with every rollout
+  as one row of numpy arrays.
+
+Usage:
+    python Planning/substitution_sim.py                     # every *problem*.pddl scenario
+    python Planning/substitution_sim.py late_game_problem.pddl --plan --rollouts 20000
+"""
+
+import argparse
+import glob
+import heapq
+import itertools
+import math
+import os
+import time
+import numpy as np
+from grounding import ground_problem, play_time_arity
+from pddl import conjuncts, objects_of_type, parse_domain, parse_problem
+
+SUBSTITUTION_DIR = "Planning/Substitution Planning"
+DOMAIN_PATH = os.path.join(SUBSTITUTION_DIR, "game_simulation_domain.pddl")
+
+
+class Scenario:
+    """
+    Array form of one substitution problem.
+    """
+    def __init__(self, name, players, slots, court, bench, occupant, stamina, max_stamina, fatigue,
+                 time_left, momentum, play_gain, sub_cost, grounding=None):
+        self.name = name
+        self.players = players
+        self.slots = slots
+        self.court = court
+        self.bench = bench
+        self.occupant = occupant
+        self.stamina = stamina
+        self.max_stamina = max_stamina
+        self.fatigue = fatigue
+        self.time_left = time_left
+        self.momentum = momentum
+        self.play_gain = play_gain
+        self.sub_cost = sub_cost
+        self.grounding = grounding
+        # Players with equal max-stamina and fatigue rate share a class and are interchangeable
+        classes = {}
+        self.player_class = [classes.setdefault((max_stamina[p], fatigue[p]), len(classes)) for p in range(len(players))]
+        self.interchangeable = len(classes) < len(players)
+
+    def final_momentum(self, substitutions):
+        """
+        Momentum at the end of a complete plan with the given number of substitutions.
+        """
+        return self.momentum + self.play_gain * self.time_left - self.sub_cost * substitutions
+
+
+def _momentum_change(action):
+    """
+    Net change an action's effect applies to (momentum).
+    """
+    change = 0
+    for effect in conjuncts(action["effect"]):
+        if effect[0] in ("increase", "decrease") and effect[1] == ["momentum"]:
+            change += float(effect[2]) if effect[0] == "increase" else -float(effect[2])
+    return change
+
+
+def load_scenario(problem_path, domain=None):
+    """
+    Reads a substitution problem into a Scenario.
+    """
+    domain = domain or parse_domain(DOMAIN_PATH)
+    problem = parse_problem(problem_path)
+    players = objects_of_type(problem, "player")
+    slots = objects_of_type(problem, "slot")
+    player_index = {player: i for i, player in enumerate(players)}
+    facts, fluents = problem["facts"], problem["fluents"]
+
+    occupant = np.full(len(slots), -1, dtype=np.int64)
+    for fact in facts:
+        if fact[0] == "has-player":
+            occupant[slots.index(fact[1])] = player_index[fact[2]]
+
+    def player_values(function):
+        return np.array([fluents.get((function, player), 0) for player in players], dtype=np.float64)
+
+    play_arity = play_time_arity(domain)
+    court = [i for i, slot in enumerate(slots) if ("court-slot", slot) in facts]
+    bench = [i for i, slot in enumerate(slots) if ("bench-slot", slot) in facts]
+    if len(court) != play_arity:
+        raise ValueError(f"{problem_path}: play-time needs {play_arity} court slots, found {len(court)}")
+
+    return Scenario(
+        name=os.path.basename(problem_path), players=players, slots=slots, court=court, bench=bench,
+        occupant=occupant, stamina=player_values("stamina"), max_stamina=player_values("max-stamina"),
+        fatigue=player_values("fatigue-rate"), time_left=int(fluents[("time-left",)]),
+        momentum=fluents[("momentum",)],
+        play_gain=_momentum_change(domain["actions"]["play-time"]),
+        sub_cost=-_momentum_change(domain["actions"]["substitute"]),
+        grounding=ground_problem(problem, domain, slots, players),
+    )
+
+# ---------------------- Search ----------------------
+
+def _subs_needed(scenario, occupant, stamina, time_left):
+    """
+    Lower bound on the substitutions still needed: court players who cannot play the remaining time.
+    """
+    needed = 0
+    for s in scenario.court:
+        p = occupant[s]
+        fatigue = scenario.fatigue[p]
+        lasts = math.inf if fatigue <= 0 else math.ceil(stamina[p] / fatigue)
+        if stamina[p] < 1 or lasts < time_left:
+            needed += 1
+    return needed
+
+
+def _successors(scenario, occupant, stamina, time_left):
+    """
+    Yields (action, occupant, stamina, time_left, substitutions added) for every applicable grounded
+    action, skipping substitutions that are interchangeable with one already yielded.
+    """
+    tired = [s for s in scenario.court if stamina[occupant[s]] <= 0]
+    if all(stamina[occupant[s]] >= 1 for s in scenario.court):
+        new_stamina = list(stamina)
+        for s in scenario.court:
+            new_stamina[occupant[s]] -= scenario.fatigue[occupant[s]]
+        action = scenario.grounding["play"][tuple(occupant[s] for s in scenario.court)]
+        yield action, occupant, tuple(new_stamina), time_left - 1, 0
+        return
+    if any(0 < stamina[occupant[s]] < 1 for s in scenario.court):
+        return  # That player can neither play-time nor be substituted, so there is no way forward
+    substitutes = scenario.grounding["substitute"]
+    player_class = scenario.player_class
+    seen = set()
+    for c, b in itertools.product(tired, scenario.bench):
+        outgoing, incoming = occupant[c], occupant[b]
+        action = substitutes.get((c, b, outgoing, incoming))
+        if action is None or stamina[incoming] < 1:
+            continue
+        swap = (player_class[outgoing], stamina[outgoing], player_class[incoming], stamina[incoming])
+        if swap in seen:
+            continue
+        seen.add(swap)
+        new_occupant = list(occupant)
+        new_occupant[c], new_occupant[b] = incoming, outgoing
+        new_stamina = list(stamina)
+        new_stamina[outgoing] = scenario.max_stamina[outgoing]
+        yield action, tuple(new_occupant), tuple(new_stamina), time_left, 1
+
+
+def _state_key(scenario, occupant, stamina, time_left):
+    # Which slot a player sits in, and which of several interchangeable players it is, does not
+    # change what can happen next
+    player_class = scenario.player_class
+    if not scenario.interchangeable:
+        return frozenset(occupant[s] for s in scenario.court), stamina, time_left
+    court = sorted((player_class[occupant[s]], stamina[occupant[s]]) for s in scenario.court)
+    bench = sorted((player_class[occupant[s]], stamina[occupant[s]]) for s in scenario.bench if occupant[s] >= 0)
+    return tuple(court), tuple(bench), time_left
+
+
+def astar(scenario, max_nodes=None):
+    """
+    Finds a plan with the fewest substitutions. Returns (plan actions or None, substitutions, nodes expanded).
+    With max_nodes, gives up (returning no plan) after expanding that many nodes.
+    """
+    start = (tuple(scenario.occupant), tuple(scenario.stamina), scenario.time_left)
+    counter = itertools.count()
+    frontier = [(_subs_needed(scenario, *start), 0, next(counter), start, None)]
+    best_cost = {_state_key(scenario, *start): 0}
+    parents = {}
+    nodes = 0
+    while frontier:
+        _, cost, node_id, state, parent = heapq.heappop(frontier)
+        if best_cost.get(_state_key(scenario, *state), math.inf) < cost:
+            continue
+        nodes += 1
+        if max_nodes is not None and nodes > max_nodes:
+            break
+        if state[2] <= 0:
+            plan = []
+            while parent is not None:
+                action, node_id = parent
+                plan.append(action)
+                parent = parents[node_id]
+            return plan[::-1], cost, nodes
+        parents[node_id] = parent
+        for action, occupant, stamina, time_left, added in _successors(scenario, *state):
+            new_cost = cost + added
+            key = _state_key(scenario, occupant, stamina, time_left)
+            if new_cost < best_cost.get(key, math.inf):
+                best_cost[key] = new_cost
+                estimate = new_cost + _subs_needed(scenario, occupant, stamina, time_left)
+                heapq.heappush(frontier, (estimate, new_cost, next(counter), (occupant, stamina, time_left), (action, node_id)))
+    return None, None, nodes
+
+
+def beam_search(scenario, width=8):
+    """
+    Keeps the `width` most promising states (fewest substitutions plus remaining lower bound, then
+    most stamina left) after every play-time. Returns (plan actions or None, substitutions).
+    """
+    beam = [((tuple(scenario.occupant), tuple(scenario.stamina), scenario.time_left), 0, [])]
+    while beam and beam[0][0][2] > 0:
+        played = {}
+        pending = beam
+        while pending:
+            # Apply substitutions until each state can play, then play one unit of time
+            next_pending = []
+            for state, cost, plan in pending:
+                for action, occupant, stamina, time_left, added in _successors(scenario, *state):
+                    entry = ((occupant, stamina, time_left), cost + added, plan + [action])
+                    if added:
+                        next_pending.append(entry)
+                    else:
+                        key = _state_key(scenario, occupant, stamina, time_left)
+                        if key not in played or played[key][1] > entry[1]:
+                            played[key] = entry
+            pending = next_pending
+        beam = sorted(played.values(), key=lambda entry: (entry[1] + _subs_needed(scenario, *entry[0]), -sum(entry[0][1])))[:width]
+    if not beam:
+        return None, None
+    return beam[0][2], beam[0][1]
+
+# ---------------------- Monte Carlo ----------------------
+
+def rollouts(scenario, n, rng=None, policy="random"):
+    """
+    Plays n substitution schedules at once. When a court player is out of stamina, the incoming bench
+    player is picked at random among those with stamina >= 1 ("random"), or the one with the most
+    stamina ("greedy"). Returns (final momentum per rollout, nan where the schedule got stuck,
+    substitutions per rollout).
+    """
+    rng = rng or np.random.default_rng()
+    rows = np.arange(n)
+    occupant = np.tile(scenario.occupant, (n, 1))
+    stamina = np.tile(scenario.stamina, (n, 1))
+    alive = np.ones(n, dtype=bool)
+    substitutions = np.zeros(n, dtype=np.int64)
+    bench = np.array(scenario.bench)
+
+    for _ in range(scenario.time_left):
+        for c in scenario.court:
+            outgoing = occupant[:, c]
+            tired = alive & (stamina[rows, outgoing] <= 0)
+            if not tired.any():
+                continue
+            incoming = occupant[:, bench]
+            eligible = (incoming >= 0) & (stamina[rows[:, None], np.maximum(incoming, 0)] >= 1)
+            if policy == "greedy":
+                scores = stamina[rows[:, None], np.maximum(incoming, 0)] + rng.random(eligible.shape) * 1e-3
+            else:
+                scores = rng.random(eligible.shape)
+            scores = np.where(eligible, scores, -np.inf)
+            pick = scores.argmax(axis=1)
+            alive &= ~tired | eligible.any(axis=1)
+            swap = tired & alive
+            b = bench[pick[swap]]
+            rows_swap = rows[swap]
+            out_players = outgoing[swap]
+            occupant[rows_swap, c] = occupant[rows_swap, b]
+            occupant[rows_swap, b] = out_players
+            stamina[rows_swap, out_players] = scenario.max_stamina[out_players]
+            substitutions += swap
+
+        court_players = occupant[:, scenario.court]
+        # play-time needs every court player at stamina >= 1; between 0 and 1 nobody can be subbed either
+        alive &= (stamina[rows[:, None], court_players] >= 1).all(axis=1)
+        stamina[rows[:, None], court_players] -= np.where(alive[:, None], scenario.fatigue[court_players], 0)
+
+    momentum = scenario.final_momentum(substitutions).astype(np.float64)
+    momentum[~alive] = np.nan
+    return momentum, substitutions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate and plan the substitution scenarios locally.")
+    parser.add_argument("problems", nargs="*", help="problem files or directories (default: every scenario)")
+    parser.add_argument("--domain", default=DOMAIN_PATH)
+    parser.add_argument("--rollouts", type=int, default=5000, help="Monte Carlo schedules per scenario and policy")
+    parser.add_argument("--beam-width", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plan", action="store_true", help="print the optimal plan of every scenario")
+    args = parser.parse_args()
+
+    paths = []
+    for target in args.problems or [SUBSTITUTION_DIR]:
+        if os.path.isdir(target):
+            paths.extend(sorted(glob.glob(os.path.join(target, "*problem*.pddl"))))
+        elif not os.path.exists(target) and os.path.exists(os.path.join(SUBSTITUTION_DIR, target)):
+            paths.append(os.path.join(SUBSTITUTION_DIR, target))
+        else:
+            paths.append(target)
+
+    domain = parse_domain(args.domain)
+    rng = np.random.default_rng(args.seed)
+    total_start = time.perf_counter()
+    for path in paths:
+        scenario = load_scenario(path, domain)
+        grounded = len(scenario.grounding["play"]) + len(scenario.grounding["substitute"])
+        print(f"{scenario.name} ({len(scenario.players)} players, {scenario.time_left} time units, "
+              f"{grounded} of {sum(scenario.grounding['naive'].values())} groundings)")
+
+        start = time.perf_counter()
+        plan, subs, nodes = astar(scenario)
+        elapsed = (time.perf_counter() - start) * 1000
+        if plan is None:
+            print(f"    A*:    no plan ({nodes} nodes, {elapsed:.2f} ms)")
+        else:
+            print(f"    A*:    momentum {scenario.final_momentum(subs):g} with {subs} substitutions ({nodes} nodes, {elapsed:.2f} ms)")
+
+        start = time.perf_counter()
+        beam_plan, beam_subs = beam_search(scenario, args.beam_width)
+        elapsed = (time.perf_counter() - start) * 1000
+        beam_result = "no plan" if beam_plan is None else f"momentum {scenario.final_momentum(beam_subs):g} with {beam_subs} substitutions"
+        print(f"    beam:  {beam_result} (width {args.beam_width}, {elapsed:.2f} ms)")
+
+        for policy in ("random", "greedy"):
+            start = time.perf_counter()
+            momentum, _ = rollouts(scenario, args.rollouts, rng, policy)
+            elapsed = (time.perf_counter() - start) * 1000
+            finished = ~np.isnan(momentum)
+            summary = (f"best {np.nanmax(momentum):g}, mean {np.nanmean(momentum):.2f}" if finished.any() else "no schedule finished")
+            print(f"    {policy + ':':<7}{args.rollouts} rollouts, {finished.mean() * 100:.1f}% finished, {summary} ({elapsed:.2f} ms)")
+
+        if args.plan and plan is not None:
+            for step in plan:
+                print(f"        {step}")
+    print(f"Evaluated {len(paths)} scenarios in {time.perf_counter() - total_start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+run_benchmarks.py
+
+Times the pipeline's hot paths on synthetic data (synthetic.py) and keeps a history of the results.
+Each stage runs the real script as a separate process in a scratch copy of the repository layout:
+
+- filter:  Deep_Learning/filter_to_2021-22.py on a raw all_games.csv
+- lineups: Deep_Learning/from_sorted_filtered_to_lineups.py on the filtered season
+- csp:     CSP/CSP_all_teams.py on a synthetic player stats CSV
+- train:   Deep_Learning/DL_prediction.py on the lineups from the lineups stage
+
+For every stage the wall time, peak RSS of the process and rows/sec are recorded (rows are raw plays
+for filter, season plays for lineups, players for csp, and stints x epochs for train). Each run is
+appended to the JSON history file. A stage is flagged as a regression when its time or peak memory
+is more than --threshold above the median of the last --baseline-runs runs with the same
+parameters.
+
+Usage:
+    python benchmarks/run_benchmarks.py --games 300 --roster-size 13 --epochs 5
+    python benchmarks/run_benchmarks.py --stages lineups csp --fail-on-regression
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import pandas as pd
+import synthetic
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join(REPO_ROOT, "benchmarks", "history.json")
+STAGES = ["filter", "lineups", "csp", "train"]
+STATS_FILE = "CSP/2021-2022 NBA Player Stats - Regular.csv"
+
+
+def prepare_workdir(workdir):
+    """
+    Copies the scripts (not the data) of CSP/ and Deep_Learning/, and instrumentation.py, into a
+    scratch directory, since the scripts read and write paths relative to the repository root.
+    """
+    shutil.copy(os.path.join(REPO_ROOT, "instrumentation.py"), workdir)
+    for folder, patterns in (("CSP", ("*.py", "*.json")), ("Deep_Learning", ("*.py",))):
+        os.makedirs(os.path.join(workdir, folder), exist_ok=True)
+        for pattern in patterns:
+            for path in glob.glob(os.path.join(REPO_ROOT, folder, pattern)):
+                shutil.copy(path, os.path.join(workdir, folder))
+
+
+def run_stage(command, workdir, rows):
+    """
+    Runs one stage's command and returns its measurements. Peak RSS comes from the resource usage
+    of the finished child process.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)  # Reaped by wait4, so record it for Popen
+    result = {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KB on Linux
+        "rows": rows,
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "ok": process.returncode == 0,
+    }
+    if process.returncode != 0:
+        result["error"] = output.decode(errors="replace").strip().splitlines()[-1:]
+    return result
+
+
+def run(args, workdir):
+    """
+    Generates the inputs and runs the selected stages. Returns {stage: measurements}.
+    """
+    python = sys.executable
+    raw_path = os.path.join(workdir, "Deep_Learning", "all_games.csv")
+    season_path = os.path.join(workdir, "Deep_Learning", "sorted_filtered_2021_22_season.csv")
+    lineups_path = os.path.join(workdir, "Deep_Learning", "lineup_performance.csv")
+    results = {}
+
+    raw = synthetic.play_by_play(args.games, args.roster_size, args.seed)
+    raw.to_csv(raw_path, index=False)
+    season_rows = int(pd.to_datetime(raw["Date"], format="%m/%d/%Y").between("2021-09-01", "2022-06-30").sum())
+
+    if "filter" in args.stages or not os.path.exists(season_path):
+        results["filter"] = run_stage([python, "Deep_Learning/filter_to_2021-22.py"], workdir, len(raw))
+    if "lineups" in args.stages or ("train" in args.stages and not os.path.exists(lineups_path)):
+        results["lineups"] = run_stage([python, "Deep_Learning/from_sorted_filtered_to_lineups.py"],
+                                       workdir, season_rows)
+    if "csp" in args.stages:
+        stats = synthetic.player_stats(args.roster_size, args.seed)
+        synthetic.write_player_stats(stats, os.path.join(workdir, STATS_FILE))
+        results["csp"] = run_stage([python, "CSP/CSP_all_teams.py", "--workers", str(args.workers)],
+                                   workdir, len(stats))
+    if "train" in args.stages:
+        with open(lineups_path) as f:
+            stints = sum(1 for _ in f) - 1
+        results["train"] = run_stage([python, "Deep_Learning/DL_prediction.py", "--epochs", str(args.epochs),
+                                               "--workers", "0", "--seed", str(args.seed)],
+                                     workdir, stints * args.epochs)
+    return {stage: results[stage] for stage in STAGES if stage in results}
+
+# ---------------------- History ----------------------
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def find_regressions(history, params, stages, threshold, baseline_runs):
+    """
+    Compares each stage against the median of the last baseline_runs earlier runs with the same
+    parameters. Returns [(stage, metric, value, baseline)] for values above baseline x (1 + threshold).
+    """
+    previous = [entry for entry in history if entry["params"] == params]
+    regressions = []
+    for stage, result in stages.items():
+        if not result["ok"]:
+            continue
+        earlier = [entry["stages"][stage] for entry in previous if entry["stages"].get(stage, {}).get("ok")][-baseline_runs:]
+        for metric in ("seconds", "peak_rss_mb"):
+            if not earlier:
+                break
+            baseline = statistics.median(r[metric] for r in earlier)
+            if result[metric] > baseline * (1 + threshold):
+                regressions.append((stage, metric, result[metric], baseline))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL, CSP and training stages on synthetic data.")
+    parser.add_argument("--games", type=int, default=300, help="2021-22 games in the synthetic play-by-play")
+    parser.add_argument("--roster-size", type=int, default=13, help="players per team (play-by-play and stats)")
+    parser.add_argument("--epochs", type=int, default=5, help="training epochs for the train stage")
+    parser.add_argument("--workers", type=int, default=1, help="CSP worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON file the results are appended to")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown or memory growth flagged as a regression")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="earlier runs the median baseline is taken over")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 when a regression is flagged")
+    parser.add_argument("--keep", help="run in this directory and keep it, instead of a temporary one")
+    args = parser.parse_args()
+
+    params = {"games": args.games, "roster_size": args.roster_size, "epochs": args.epochs,
+              "workers": args.workers, "seed": args.seed}
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        prepare_workdir(args.keep)
+        stages = run(args, args.keep)
+    else:
+        with tempfile.TemporaryDirectory(prefix="lineup-bench-") as workdir:
+            prepare_workdir(workdir)
+            stages = run(args, workdir)
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, params, stages, args.threshold, args.baseline_runs)
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "stages": stages,
+        "regressions": [{"stage": s, "metric": m, "value": v, "baseline": b} for s, m, v, b in regressions],
+    }
+    save_history(history + [entry], args.history)
+
+    print(f"{'stage':<8} {'seconds':>9} {'peak MB':>9} {'rows':>10} {'rows/sec':>12}")
+    for stage, result in stages.items():
+        if result["ok"]:
+            print(f"{stage:<8} {result['seconds']:>9.2f} {result['peak_rss_mb']:>9.1f} {result['rows']:>10} {result['rows_per_sec']:>12.1f}")
+        else:
+            print(f"{stage:<8} FAILED: {' '.join(result['error'])}")
+    for stage, metric, value, baseline in regressions:
+        print(f"REGRESSION: {stage} {metric} {value} vs baseline {baseline} (+{(value / baseline - 1) * 100:.0f}%)")
+    print(f"Results appended to {args.history}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
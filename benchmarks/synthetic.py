@@ -0,0 +1,104 @@
+"""
+synthetic.py
+
+Synthetic inputs for the benchmarks, written in the same schemas as the real CSVs:
+
+- play_by_play(): raw play-by-play rows like all_games.csv (Date as MM/DD/YYYY, GameID, PlayNum,
+  Period, Time, AwayName/HomeName, scores, AwayIn/AwayOut/HomeIn/HomeOut, A1-A5/H1-H5), unsorted,
+  with the requested number of 2021-22 games plus games from the season before for the filter
+  to drop. The plays of each game come from tests/synthetic_games.py, with the same edge cases
+  (missing starters and clocks, substitutions on a period's first play, overtime)
+- player_stats(): per-player season stats like "2021-2022 NBA Player Stats - Regular.csv"
+  (Rk, Player, Pos, Age, Tm, G, ... PTS), written with ';' and ISO-8859-1
+
+Everything is driven by one seed, so a benchmark run with the same parameters sees the same data.
+"""
+
+import os
+import random
+import sys
+import numpy as np
+import pandas as pd
+
+# The games themselves come from the tests' generator, so the benchmarks and the tests share one copy
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from synthetic_games import game_plays, player_name  # noqa: E402
+
+TEAMS = ["ATL", "BOS", "BRK", "CHO", "CHI", "CLE", "DAL", "DEN", "DET", "GSW", "HOU", "IND",
+         "LAC", "LAL", "MEM", "MIA", "MIL", "MIN", "NOP", "NYK", "OKC", "ORL", "PHI", "PHO",
+         "POR", "SAC", "SAS", "TOR", "UTA", "WAS"]
+POSITIONS = ["PG", "SG", "SF", "PF", "C", "SG-SF", "PF-C"]
+STATS_COLUMNS = ["Rk", "Player", "Pos", "Age", "Tm", "G", "GS", "MP", "FG", "FGA", "FG%", "3P", "3PA", "3P%",
+                 "2P", "2PA", "2P%", "eFG%", "FT", "FTA", "FT%", "ORB", "DRB", "TRB", "AST", "STL", "BLK",
+                 "TOV", "PF", "PTS"]
+PBP_COLUMNS = ["Date", "GameID", "PlayNum", "Period", "Time", "AwayName", "HomeName", "AwayScore", "HomeScore",
+               "AwayIn", "AwayOut", "HomeIn", "HomeOut", "A1", "A2", "A3", "A4", "A5", "H1", "H2", "H3", "H4", "H5"]
+
+
+# ---------------------- Play-by-Play ----------------------
+
+def play_by_play(n_games, roster_size=13, seed=0, other_season_fraction=0.25):
+    """
+    Raw play-by-play for n_games 2021-22 games, plus other_season_fraction as many 2020-21 games,
+    in shuffled game order like the unsorted all_games.csv.
+    """
+    rng = random.Random(seed)
+    games = []
+    for season_start, count in ((2021, n_games), (2020, int(n_games * other_season_fraction))):
+        days = pd.date_range(f"{season_start}-10-19", f"{season_start + 1}-04-10")
+        for g in range(count):
+            away, home = rng.sample(TEAMS, 2)
+            date = days[g * len(days) // max(count, 1)]
+            games.append((date.strftime("%m/%d/%Y"), f"{date:%Y%m%d}{g:04d}{home}", away, home))
+    rng.shuffle(games)
+    rows = []
+    for game in games:
+        rows.extend(game_plays(rng, *game, roster_size))
+    return pd.DataFrame(rows, columns=PBP_COLUMNS)
+
+# ---------------------- Player Stats ----------------------
+
+def player_stats(roster_size=15, seed=0, teams=TEAMS):
+    """
+    Per-game season stats for roster_size players on each team.
+    """
+    rng = np.random.default_rng(seed)
+    n = roster_size * len(teams)
+    games = rng.integers(1, 83, n)
+    minutes = np.round(rng.uniform(5, 38, n), 1)
+    fga = np.round(minutes * rng.uniform(0.2, 0.6, n), 1)
+    fg_pct = np.round(rng.uniform(0.38, 0.6, n), 3)
+    three_pa = np.round(fga * rng.uniform(0, 0.6, n), 1)
+    three_pct = np.round(rng.uniform(0.25, 0.42, n), 3)
+    fta = np.round(fga * rng.uniform(0.1, 0.4, n), 1)
+    ft_pct = np.round(rng.uniform(0.6, 0.92, n), 3)
+    fg, three, ft = np.round(fga * fg_pct, 1), np.round(three_pa * three_pct, 1), np.round(fta * ft_pct, 1)
+    orb, drb = np.round(minutes * rng.uniform(0, 0.12, n), 1), np.round(minutes * rng.uniform(0.05, 0.3, n), 1)
+    stats = pd.DataFrame({
+        "Rk": np.arange(1, n + 1),
+        "Player": [player_name(team, i) for team in teams for i in range(roster_size)],
+        "Pos": rng.choice(POSITIONS, n),
+        "Age": rng.integers(19, 38, n),
+        "Tm": np.repeat(teams, roster_size),
+        "G": games,
+        "GS": (games * rng.uniform(0, 1, n)).astype(int),
+        "MP": minutes,
+        "FG": fg, "FGA": fga, "FG%": fg_pct,
+        "3P": three, "3PA": three_pa, "3P%": three_pct,
+        "2P": np.round(fg - three, 1), "2PA": np.round(fga - three_pa, 1),
+        "2P%": np.round((fg - three) / np.maximum(fga - three_pa, 0.1), 3),
+        "eFG%": np.round((fg + 0.5 * three) / np.maximum(fga, 0.1), 3),
+        "FT": ft, "FTA": fta, "FT%": ft_pct,
+        "ORB": orb, "DRB": drb, "TRB": np.round(orb + drb, 1),
+        "AST": np.round(minutes * rng.uniform(0.02, 0.3, n), 1),
+        "STL": np.round(minutes * rng.uniform(0, 0.06, n), 1),
+        "BLK": np.round(minutes * rng.uniform(0, 0.06, n), 1),
+        "TOV": np.round(minutes * rng.uniform(0.02, 0.1, n), 1),
+        "PF": np.round(minutes * rng.uniform(0.03, 0.1, n), 1),
+        "PTS": np.round(2 * fg + three + ft, 1),
+    })
+    return stats[STATS_COLUMNS]
+
+
+def write_player_stats(stats, path):
+    stats.to_csv(path, sep=";", index=False, encoding="ISO-8859-1")
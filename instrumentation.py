@@ -0,0 +1,208 @@
+"""
+instrumentation.py
+
+Timing spans shared by the CSP, ETL and Deep Learning scripts. Each script wraps its stages in
+named spans (load CSV, detect starters, build tensors, train epoch, inference, solve team, write
+output, ...) and, when tracing is on, every finished span is written as one JSON line:
+
+    {"ts": "2026-10-17T02:14:05", "run": "3f9c0a1b2d4e", "script": "DL_prediction", "pid": 4121,
+     "span": "train epoch", "parent": "train", "seconds": 0.8421, "rows": 55012,
+     "peak_rss_mb": 412.3, "epoch": 7}
+
+- rows is the number of rows (plays, stints, players, lineups) the span handled, when it has one
+- peak_rss_mb is the process's peak resident memory when the span ended
+- extra fields (epoch, team, ...) are whatever the script passed to span()
+
+Tracing is off unless the script gets --trace FILE ('-' for stderr) or LINEUP_TRACE is set, so
+spans cost a timer call otherwise. The settings are passed on through the environment, so worker
+processes (CSP teams, stint shards) append their spans to the same file under the same run id.
+
+--profile FILE runs the whole script under cProfile and writes the stats to FILE (read them with
+python -m pstats FILE, or snakeviz). For sampling instead, run the script under py-spy unchanged
+(py-spy record -o profile.svg -- python Deep_Learning/DL_prediction.py); the first line of every
+run records the pid, so py-spy dump --pid can also attach to a long run.
+
+    python instrumentation.py trace.jsonl    # time per span of the last run in the file
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_ENV = "LINEUP_TRACE"
+RUN_ENV = "LINEUP_TRACE_RUN"
+SCRIPT_ENV = "LINEUP_TRACE_SCRIPT"
+
+_stack = []
+_sink = None
+
+# ---------------------- Measurements ----------------------
+
+def peak_rss_mb(who=None):
+    """
+    Peak resident memory of this process (or of its finished children, with who=RUSAGE_CHILDREN)
+    in MB, or None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+# ---------------------- Emitting ----------------------
+
+def enabled():
+    return bool(os.environ.get(TRACE_ENV))
+
+
+def emit(record):
+    """
+    Writes one record as a JSON line to the trace, with the run id, script name and pid added.
+    Does nothing when tracing is off.
+    """
+    global _sink
+    target = os.environ.get(TRACE_ENV)
+    if not target:
+        return
+    if _sink is None:
+        # Line buffered in append mode, so lines from several processes do not interleave
+        _sink = sys.stderr if target == "-" else open(target, "a", buffering=1)
+    line = {"ts": _now(), "run": os.environ.get(RUN_ENV), "script": os.environ.get(SCRIPT_ENV), "pid": os.getpid()}
+    line.update(record)
+    _sink.write(json.dumps(line, default=str) + "\n")
+
+
+class Span:
+    """
+    A running span. Set its rows (or add to its fields) before it ends:
+
+        with span("load CSV") as s:
+            data = pd.read_csv(path)
+            s.rows = len(data)
+    """
+
+    def __init__(self, rows, fields):
+        self.rows = rows
+        self.fields = fields
+
+
+@contextmanager
+def span(name, rows=None, **fields):
+    """
+    Times the enclosed block as a span called name and emits it when the block ends (also when it
+    raises, with "error" set to the exception type).
+    """
+    current = Span(rows, fields)
+    parent = _stack[-1] if _stack else None
+    _stack.append(name)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _stack.pop()
+        if enabled():
+            record = {"span": name, "parent": parent, "seconds": round(seconds, 4), "rows": current.rows,
+                      "peak_rss_mb": peak_rss_mb()}
+            record.update(current.fields)
+            if error:
+                record["error"] = error
+            emit(record)
+
+# ---------------------- Script Setup ----------------------
+
+def add_arguments(parser):
+    """
+    Adds --trace and --profile to a script's argument parser.
+    """
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--trace", metavar="FILE",
+                       help=f"append timing spans as JSON lines to FILE ('-' for stderr; default ${TRACE_ENV})")
+    group.add_argument("--profile", metavar="FILE", help="run under cProfile and write the stats to FILE")
+
+
+def start_run(script, args=None):
+    """
+    Starts instrumenting a script run: turns tracing on for --trace, starts cProfile for --profile,
+    and emits a "start" line with the arguments. At exit, a final "run" span with the total time and
+    the peak memory of the process and its workers is emitted and the profile is written.
+    """
+    trace = getattr(args, "trace", None)
+    if trace:
+        os.environ[TRACE_ENV] = trace
+    os.environ[RUN_ENV] = uuid.uuid4().hex[:12]
+    os.environ[SCRIPT_ENV] = script
+    emit({"span": "start", "argv": sys.argv[1:]})
+
+    profile_path = getattr(args, "profile", None)
+    profiler = cProfile.Profile() if profile_path else None
+    start = time.perf_counter()
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        emit({"span": "run", "parent": None, "seconds": round(time.perf_counter() - start, 4),
+              "peak_rss_mb": peak_rss_mb(),
+              "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None})
+
+    atexit.register(finish)
+    if profiler is not None:
+        profiler.enable()
+
+# ---------------------- Trace Summary ----------------------
+
+def summarize(path, run=None):
+    """
+    Prints the total seconds, count, rows and peak memory per span of one run in a trace file (the
+    last run by default), slowest first.
+    """
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        print(f"No spans in {path}")
+        return
+    run = run or records[-1]["run"]
+    records = [r for r in records if r["run"] == run and r.get("span") not in ("start", None)]
+    totals = defaultdict(lambda: {"seconds": 0.0, "count": 0, "rows": 0, "peak_rss_mb": 0.0})
+    for r in records:
+        total = totals[(r.get("script"), r["span"])]
+        total["seconds"] += r.get("seconds") or 0
+        total["count"] += 1
+        total["rows"] += r.get("rows") or 0
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], r.get("peak_rss_mb") or 0)
+
+    print(f"Run {run}")
+    print(f"{'script':<32} {'span':<24} {'count':>6} {'seconds':>10} {'rows':>10} {'peak MB':>9}")
+    for (script, name), total in sorted(totals.items(), key=lambda item: -item[1]["seconds"]):
+        print(f"{script or '':<32} {name:<24} {total['count']:>6} {total['seconds']:>10.3f} "
+              f"{total['rows']:>10} {total['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize a JSON lines trace written with --trace.")
+    parser.add_argument("trace")
+    parser.add_argument("--run", help="run id to summarize (defaults to the last run in the file)")
+    args = parser.parse_args()
+    summarize(args.trace, args.run)
@@ -0,0 +1,13 @@
+"""
+Puts the script folders on the import path the way running a script from them does, so the tests
+can import lineup_stints, lineup_csp, grounding, ... by module name.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("", "Deep_Learning", "CSP", "Planning"):
+    path = os.path.join(REPO_ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
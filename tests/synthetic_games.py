@@ -0,0 +1,86 @@
+"""
+Small play-by-play frames (sorted like sorted_filtered_2021_22_season.csv) with the awkward cases
+the stint extractors have to agree on: substitutions on the first play of a period, lineup
+changes between periods, missing starters, missing clocks and overtime.
+"""
+
+import random
+import numpy as np
+import pandas as pd
+
+TEAMS = ["ATL", "BOS", "TOR", "LAL", "GSW", "MIA"]
+
+
+def player_name(team, i):
+    return f"{team.lower()}pl{i:02d}"
+
+
+def play_by_play(n_games=12, seed=0, first_date="2021-10-19"):
+    """
+    n_games games between random pairs of TEAMS, one per day from first_date.
+    """
+    rng = random.Random(seed)
+    start = pd.Timestamp(first_date)
+    rows = []
+    for g in range(n_games):
+        away, home = rng.sample(TEAMS, 2)
+        date = (start + pd.Timedelta(days=g)).strftime("%Y-%m-%d")
+        rows.extend(game_plays(rng, date, f"{date.replace('-', '')}0{home}", away, home))
+    return pd.DataFrame(rows)
+
+
+def game_plays(rng, date, game_id, away, home, roster_size=12):
+    """
+    Plays of one game as a list of row dicts: 4 quarters (5-minute overtime 30% of the time), a play
+    every 3-40 seconds, substitutions on about 10% of plays per side and scoring on about 40%.
+    rng is a random.Random, shared across games so a seed fixes the whole season.
+    """
+    away_roster = [player_name(away, i) for i in range(roster_size)]
+    home_roster = [player_name(home, i) for i in range(roster_size)]
+    away_on, home_on = away_roster[:5], home_roster[:5]
+    away_score = home_score = play = 0
+    rows = []
+    for period in range(1, 5 + (rng.random() < 0.3)):
+        clock = 720 if period <= 4 else 300
+        first = True
+        # Lineup changes between periods, without a substitution row
+        if rng.random() < 0.5:
+            away_on = rng.sample(away_roster, 5)
+        if rng.random() < 0.5:
+            home_on = rng.sample(home_roster, 5)
+        while clock > 0:
+            play += 1
+            subs = {"AwayIn": np.nan, "AwayOut": np.nan, "HomeIn": np.nan, "HomeOut": np.nan}
+            if not first and rng.random() < 0.1:
+                out_player = rng.choice(away_on)
+                in_player = rng.choice([p for p in away_roster if p not in away_on])
+                away_on = [in_player if p == out_player else p for p in away_on]
+                subs["AwayIn"], subs["AwayOut"] = in_player, out_player
+                if rng.random() < 0.1:
+                    subs["AwayIn"] = np.nan  # Substitution logged without the incoming player
+            # Home substitutions can fall on the first play of a period
+            if rng.random() < 0.1:
+                out_player = rng.choice(home_on)
+                in_player = rng.choice([p for p in home_roster if p not in home_on])
+                home_on = [in_player if p == out_player else p for p in home_on]
+                subs["HomeIn"], subs["HomeOut"] = in_player, out_player
+            r = rng.random()
+            if r < 0.2:
+                away_score += rng.choice([1, 2, 3])
+            elif r < 0.4:
+                home_score += rng.choice([1, 2, 3])
+            a, h = list(away_on), list(home_on)
+            if rng.random() < 0.03:
+                a[2] = np.nan  # Missing player, also on the first play (missing starter)
+            if rng.random() < 0.02:
+                h[4] = np.nan
+            time = f"{clock // 60}:{clock % 60:02d}.{rng.randint(0, 9)}"
+            if not first and rng.random() < 0.005:
+                time = np.nan
+            rows.append({"Date": date, "GameID": game_id, "PlayNum": play, "Period": period, "Time": time,
+                         "AwayName": away, "HomeName": home, "AwayScore": away_score, "HomeScore": home_score,
+                         **subs, **dict(zip(["A1", "A2", "A3", "A4", "A5"], a)),
+                         **dict(zip(["H1", "H2", "H3", "H4", "H5"], h))})
+            first = False
+            clock -= rng.randint(3, 40)
+    return rows
@@ -0,0 +1,43 @@
+"""
+Cache entries are only reused with a player dictionary that gives their IDs the same names.
+"""
+
+import pandas as pd
+from columnar_cache import lineup_tuples, load_lineup_performance
+from player_ids import PlayerIds
+
+LINEUPS = pd.DataFrame({
+    'GameID': ['g1', 'g1'], 'Period': [1, 1], 'Time': ['00:00', '00:00'], 'Team': ['Away', 'Home'],
+    'Abbr': ['BOS', 'NYK'], 'Lineup': [str(('a', 'b', 'c', 'd', 'e')), str(('f', 'g', 'h', 'i', 'j'))],
+    'Points Scored': [2, 0], 'Points Allowed': [0, 2], 'Net Impact': [2, -2], 'Minutes Played': [12.0, 12.0],
+})
+
+
+def test_regenerated_player_ids_rebuild_the_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The cache lives under Deep_Learning/.cache
+    LINEUPS.to_csv("lineups.csv", index=False)
+    expected = [('a', 'b', 'c', 'd', 'e'), ('f', 'g', 'h', 'i', 'j')]
+
+    ids = PlayerIds.load()
+    assert list(lineup_tuples(load_lineup_performance("lineups.csv", ids), ids)) == expected
+    reloaded = PlayerIds.load()
+    assert list(lineup_tuples(load_lineup_performance("lineups.csv", reloaded), reloaded)) == expected
+
+    # Same number of names, assigned to different IDs
+    regenerated = PlayerIds(reversed(ids.names), path=ids.path)
+    regenerated.save()
+    cached = load_lineup_performance("lineups.csv", regenerated)
+    assert list(lineup_tuples(cached, regenerated)) == expected
+    assert cached['P1'].iloc[0] == regenerated.index['a'] != ids.index['a']
+
+
+def test_appended_names_keep_the_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    LINEUPS.to_csv("lineups.csv", index=False)
+    ids = PlayerIds.load()
+    load_lineup_performance("lineups.csv", ids)
+    ids.intern('k')
+    calls = []
+    monkeypatch.setattr(pd, 'read_csv', lambda *args, **kwargs: calls.append(args))
+    load_lineup_performance("lineups.csv", ids)
+    assert not calls
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from DL_prediction import encode_lineup_keys, ingest_lineups
+from player_ids import PlayerIds
+
+
+def test_ingest_lineups_keeps_missing_players_at_padding_index():
+    ids = PlayerIds(["cc", "aa", "bb", "dd", "ee", "ff"])
+    data = pd.DataFrame({'P1': [2, 2], 'P2': [3, 3], 'P3': [1, 1], 'P4': [4, 4], 'P5': [5, 0],
+                         'Team': ['Home', 'Away']})
+    lineups, is_home, index_to_player = ingest_lineups(data, ids)
+    assert list(index_to_player) == [None, "aa", "bb", "cc", "dd", "ee"]
+    assert lineups.tolist() == [[1, 2, 3, 4, 5], [1, 2, 3, 4, 0]]
+    assert is_home.tolist() == [1, 0]
+
+
+def test_grouping_matches_a_per_row_count(tmp_path, monkeypatch):
+    from collections import Counter, defaultdict
+    from columnar_cache import load_lineup_performance
+    from DL_prediction import lineup_totals
+    from lineup_stints import extract_stints
+    from lineup_store import starting_rows
+    from synthetic_games import play_by_play
+
+    monkeypatch.chdir(tmp_path)  # The columnar cache lives under Deep_Learning/.cache
+    (tmp_path / "Deep_Learning").mkdir()
+    stints = extract_stints(play_by_play(n_games=12, seed=9))
+    stints.to_csv("lineups.csv", index=False)
+    ids = PlayerIds()
+    data = load_lineup_performance("lineups.csv", ids)
+
+    lineups, _, _ = ingest_lineups(data, ids)
+    codes, first_rows = encode_lineup_keys(lineups)
+    starts = np.bincount(codes[starting_rows(data)], minlength=len(first_rows))
+    total_games, total_minutes = lineup_totals(data, codes, len(first_rows))
+
+    # The same totals, one row at a time, keyed on the extracted lineup tuples
+    names = list(stints['Lineup'])
+    expected_minutes, expected_games, expected_starts, first = Counter(), defaultdict(set), Counter(), {}
+    for name, game, minutes in zip(names, stints['GameID'], stints['Minutes Played']):
+        expected_minutes[name] += minutes
+        expected_games[name].add(game)
+    for game, plays in stints.groupby('GameID', sort=False):
+        firsts = {team: plays.index[plays['Team'] == team][0] for team in plays['Team'].unique()}
+        if len(firsts) == 2:
+            for row in firsts.values():
+                expected_starts[names[row]] += 1
+    for row, name in enumerate(names):
+        first.setdefault(name, row)
+
+    lineup_names = [names[row] for row in first_rows]
+    assert first_rows.tolist() == list(first.values())
+    assert names == [lineup_names[code] for code in codes]
+    assert total_games.tolist() == [len(expected_games[name]) for name in lineup_names]
+    np.testing.assert_allclose(total_minutes, [expected_minutes[name] for name in lineup_names])
+    assert starts.tolist() == [expected_starts[name] for name in lineup_names]
+    assert starts.sum() > 0 and (total_games > 1).any()
+
+
+def test_encode_lineup_keys_without_packing():
+    lineups = np.array([[1, 2, 3, 4, 5], [9, 2, 3, 4, 5], [1, 2, 3, 4, 5], [1, 2, 3, 4, 0]], dtype=np.int64)
+    wide = lineups * 2 ** 20  # Too many players to pack five indices into an int64
+    for array in (lineups, wide):
+        codes, first_rows = encode_lineup_keys(array)
+        assert codes.tolist() == [0, 1, 0, 2] and first_rows.tolist() == [0, 1, 3]
+
+
+def test_stored_totals_match_the_counted_totals(tmp_path, monkeypatch):
+    from columnar_cache import load_lineup_performance
+    from DL_prediction import lineup_totals, stored_totals
+    from lineup_store import starting_rows, stored_aggregates, update_lineup_store
+    from synthetic_games import play_by_play
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Deep_Learning").mkdir()
+    plays = play_by_play(n_games=10, seed=10)
+    games = list(pd.unique(plays['GameID']))
+    update_lineup_store(plays[plays['GameID'].isin(games[:6])], "lineups.csv")
+    update_lineup_store(plays, "lineups.csv")  # Aggregates updated in place for the last 4 games
+
+    ids = PlayerIds.load()
+    data = load_lineup_performance("lineups.csv", ids)
+    codes, first_rows = encode_lineup_keys(ingest_lineups(data, ids)[0])
+    starts, games_played, minutes = stored_totals(stored_aggregates("lineups.csv", ids, len(data)), data, first_rows)
+    assert starts.tolist() == np.bincount(codes[starting_rows(data)], minlength=len(first_rows)).tolist()
+    total_games, total_minutes = lineup_totals(data, codes, len(first_rows))
+    assert games_played.tolist() == total_games.tolist()
+    np.testing.assert_allclose(minutes, total_minutes)
+
+    # A store that does not describe the loaded stints, or uses other player IDs, is not used
+    assert stored_aggregates("lineups.csv", ids, len(data) - 1) is None
+    assert stored_aggregates("lineups.csv", PlayerIds(reversed(ids.names)), len(data)) is None
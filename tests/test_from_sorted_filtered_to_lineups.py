@@ -0,0 +1,20 @@
+"""
+Option combinations that from_sorted_filtered_to_lineups.py refuses instead of ignoring.
+"""
+
+import sys
+import pytest
+import from_sorted_filtered_to_lineups as script
+
+
+@pytest.mark.parametrize("argv", [
+    ["--incremental", "--workers", "2"],
+    ["--incremental", "--check-parity", "5"],
+    ["--workers", "2", "--check-parity", "5"],
+])
+def test_rejects_options_a_mode_would_ignore(monkeypatch, capsys, argv):
+    monkeypatch.setattr(sys, "argv", ["from_sorted_filtered_to_lineups.py"] + argv)
+    with pytest.raises(SystemExit) as exit_info:
+        script.main()
+    assert exit_info.value.code == 2
+    assert "cannot be combined" in capsys.readouterr().err
@@ -0,0 +1,26 @@
+"""
+Court slot validation in ground_problem.
+"""
+
+import pytest
+from grounding import ground_problem
+from pddl import objects_of_type, parse_domain, parse_problem
+
+DOMAIN = "Planning/Substitution Planning/game_simulation_domain.pddl"
+PROBLEM = "Planning/Substitution Planning/game_situation_problem.pddl"
+
+
+def grounded(drop_court_slots=0):
+    domain, problem = parse_domain(DOMAIN), parse_problem(PROBLEM)
+    for fact in sorted(f for f in problem["facts"] if f[0] == "court-slot")[:drop_court_slots]:
+        problem["facts"].discard(fact)
+    return ground_problem(problem, domain, objects_of_type(problem, "slot"), objects_of_type(problem, "player"))
+
+
+def test_play_time_has_one_player_per_court_slot():
+    assert all(len(key) == 3 for key in grounded()["play"])
+
+
+def test_rejects_a_problem_with_too_few_court_slots():
+    with pytest.raises(ValueError, match="play-time takes 3 court slots, but the problem has 2"):
+        grounded(drop_court_slots=1)
@@ -0,0 +1,43 @@
+"""
+Queries of LineupIndex on a small hand-built index with tied totals.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from lineup_index import FEATURE_COLUMNS, LineupIndex
+
+
+def tied_index(n_lineups=40):
+    """
+    One team of seven players and n_lineups lineups whose PTS totals only take four values.
+    """
+    players = pd.DataFrame({"Player": [f"P{i}" for i in range(7)], "Tm": "BOS", "Pos": "G"})
+    for column in FEATURE_COLUMNS:
+        players[column] = 0.0
+    rng = np.random.default_rng(0)
+    lineups = np.array([np.sort(rng.choice(7, 5, replace=False)) for _ in range(n_lineups)], dtype=np.int32)
+    metrics = np.zeros((n_lineups, 4), dtype=np.int32)
+    metrics[:, 0] = rng.integers(0, 4, n_lineups) * 10
+    return LineupIndex(["BOS"], players, lineups, np.zeros(n_lineups, dtype=np.int16), metrics)
+
+
+@pytest.mark.parametrize("n", [1, 3, 7, 40, 50])
+def test_top_breaks_ties_by_index_position(n):
+    index = tied_index()
+    values = index.metrics[:, 0]
+    expected = np.lexsort((np.arange(len(values)), -values))[:n]
+    assert index.top("PTS", n=n) == index.describe(expected)
+
+
+def test_top_is_the_same_for_a_shuffled_candidate_order(monkeypatch):
+    index = tied_index()
+    expected = index.top("PTS", n=5)
+    original = index.select
+    monkeypatch.setattr(index, "select", lambda *args: original(*args)[::-1].copy())
+    assert index.top("PTS", n=5) == expected
+
+
+def test_select_names_an_unknown_team():
+    with pytest.raises(ValueError, match="'NYK'"):
+        tied_index().select(team="NYK")
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from lineup_stints import check_parity, extract_stints, extract_stints_iterative, period_bounds
+from synthetic_games import play_by_play
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorized_matches_iterative(seed):
+    df = play_by_play(n_games=8, seed=seed)
+    expected = extract_stints_iterative(df)
+    actual = extract_stints(df, clock='legacy')
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_covers_period_boundary_subs_and_missing_starters():
+    df = play_by_play(n_games=8, seed=0)
+    period_start = (df['Period'] != df['Period'].shift()) & (df['GameID'] == df['GameID'].shift())
+    assert df.loc[period_start, 'HomeIn'].notna().any()
+    game_start = df['GameID'] != df['GameID'].shift()
+    assert df.loc[game_start | period_start, ['A1', 'A2', 'A3', 'A4', 'A5', 'H1', 'H2', 'H3', 'H4', 'H5']].isna().any().any()
+
+
+def test_single_game_and_empty_frame():
+    df = play_by_play(n_games=1, seed=3)
+    pd.testing.assert_frame_equal(extract_stints(df, clock='legacy'), extract_stints_iterative(df), check_dtype=False)
+    assert len(extract_stints(df.iloc[:0])) == 0
+
+
+def test_check_parity_samples_games():
+    df = play_by_play(n_games=10, seed=4)
+    assert check_parity(df, num_games=4) > 0
+
+
+def test_unknown_clock():
+    with pytest.raises(ValueError):
+        extract_stints(play_by_play(n_games=1), clock='wall')
+
+
+def test_missing_players_sort_last_and_encode_as_no_player():
+    from player_ids import PlayerIds
+    stints = extract_stints(play_by_play(n_games=8, seed=0), clock='legacy')
+    partial = stints[stints['Lineup'].map(lambda lineup: None in lineup)]
+    assert len(partial)
+    assert all(lineup[-1] is None and list(lineup[:4]) == sorted(lineup[:4]) for lineup in partial['Lineup'])
+    encoded = PlayerIds().encode_lineup_strings(partial['Lineup'].astype(str))
+    assert (encoded[:, -1] == 0).all() and (encoded[:, 0] > 0).all()
+
+
+def test_game_clock_minutes_add_up_to_every_game_length():
+    df = play_by_play(n_games=8, seed=5)
+    df = df[df['Time'].notna()]  # Unparseable clocks leave gaps in the minutes
+    stints = extract_stints(df)
+    minutes = stints.groupby(['GameID', 'Team'])['Minutes Played'].sum()
+    last_period = df.groupby('GameID')['Period'].max()
+    expected = period_bounds(last_period.to_numpy())[1] / 60  # 48, or 53 with one overtime
+    assert (last_period > 4).any()
+    for team in ('Away', 'Home'):
+        np.testing.assert_allclose(minutes.xs(team, level='Team').reindex(last_period.index), expected)
+
+
+def test_only_the_legacy_clock_drops_final_stints_before_the_last_game():
+    df = play_by_play(n_games=6, seed=1)
+    game_clock, legacy = extract_stints(df), extract_stints(df, clock='legacy')
+    last_game = df['GameID'].iloc[-1]
+    final_pairs = game_clock.groupby('GameID', sort=False).tail(2)
+    assert (final_pairs['Time'] == "00:00").all() and list(final_pairs['Team'].iloc[:2]) == ['Away', 'Home']
+    kept = game_clock.drop(final_pairs[final_pairs['GameID'] != last_game].index)
+    columns = ['GameID', 'Period', 'Time', 'Team', 'Lineup', 'Points Scored', 'Points Allowed']
+    pd.testing.assert_frame_equal(kept[columns].reset_index(drop=True), legacy[columns], check_dtype=False)
+
+
+def test_game_clock_with_game_seconds_does_not_parse_time(monkeypatch):
+    import lineup_stints
+    df = play_by_play(n_games=4, seed=2)
+    expected = extract_stints(df)
+    df['GameSeconds'] = lineup_stints.game_seconds(df['Period'], df['Time'])
+
+    def unexpected(*args):
+        raise AssertionError("Time was parsed")
+    monkeypatch.setattr(lineup_stints, 'clock_to_seconds', unexpected)
+    monkeypatch.setattr(lineup_stints, 'game_seconds', unexpected)
+    pd.testing.assert_frame_equal(extract_stints(df), expected)
@@ -0,0 +1,28 @@
+"""
+Incremental lineup store updates against a full rebuild over the same games.
+"""
+
+import pandas as pd
+import pytest
+from lineup_store import load_aggregates, load_manifest, update_lineup_store
+from synthetic_games import play_by_play
+
+
+@pytest.mark.parametrize("clock", ["game", "legacy"])
+def test_incremental_updates_match_a_full_build(tmp_path, monkeypatch, clock):
+    monkeypatch.chdir(tmp_path)  # The store cache lives under Deep_Learning/.cache
+    (tmp_path / "Deep_Learning").mkdir()
+    plays = play_by_play(n_games=10, seed=6)
+    games = list(pd.unique(plays['GameID']))
+
+    update_lineup_store(plays[plays['GameID'].isin(games[:4])], "incremental.csv", clock=clock)
+    assert update_lineup_store(plays[plays['GameID'].isin(games[:7])], "incremental.csv", clock=clock)[0] == 3
+    new_games, rows = update_lineup_store(plays, "incremental.csv", clock=clock)
+    assert new_games == 3
+    update_lineup_store(plays, "full.csv", clock=clock)
+
+    with open("incremental.csv") as incremental, open("full.csv") as full:
+        assert incremental.read() == full.read()
+    assert rows == load_manifest("full.csv")['rows']
+    pd.testing.assert_frame_equal(load_aggregates("incremental.csv").sort_index(),
+                                  load_aggregates("full.csv").sort_index(), check_dtype=False)
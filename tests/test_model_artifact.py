@@ -0,0 +1,45 @@
+"""
+Lineup validation in LineupScorer, on a small random artifact.
+"""
+
+import numpy as np
+import pytest
+from model_artifact import LineupScorer, save_artifact
+
+PLAYERS = [f"player{i:02d}" for i in range(8)]
+
+
+@pytest.fixture
+def scorer(tmp_path):
+    rng = np.random.default_rng(0)
+    weights = {
+        'embeddings.weight': rng.normal(size=(len(PLAYERS) + 1, 4)).astype(np.float32),
+        'fc1.weight': rng.normal(size=(3, 5)).astype(np.float32),
+        'fc1.bias': rng.normal(size=3).astype(np.float32),
+        'fc2.weight': rng.normal(size=(1, 3)).astype(np.float32),
+        'fc2.bias': rng.normal(size=1).astype(np.float32),
+    }
+    path = str(tmp_path / "net.npz")
+    save_artifact(path, weights, PLAYERS, {'embedding_dim': 4, 'hidden_dim': 3})
+    return LineupScorer(path)
+
+
+def test_scores_a_full_lineup(scorer):
+    assert scorer.encode(PLAYERS[:5]) == [1, 2, 3, 4, 5]
+    assert np.isfinite(scorer.score(PLAYERS[:5]))
+
+
+@pytest.mark.parametrize("lineup", [PLAYERS[:4], PLAYERS[:6], PLAYERS[:4] + [PLAYERS[0]]])
+def test_rejects_lineups_without_five_distinct_players(scorer, lineup):
+    with pytest.raises(ValueError, match="5 distinct players"):
+        scorer.score(lineup)
+
+
+def test_rejects_index_arrays_of_the_wrong_width(scorer):
+    with pytest.raises(ValueError, match=r"\[N, 5\]"):
+        scorer.score_indices([[1, 2, 3, 4]], [1])
+
+
+def test_unknown_players_still_raise_key_error(scorer):
+    with pytest.raises(KeyError, match="nobody"):
+        scorer.encode(PLAYERS[:4] + ["nobody"])
@@ -0,0 +1,27 @@
+"""
+Sharded stint extraction against a single pass over the whole file.
+"""
+
+import pandas as pd
+import pytest
+from lineup_stints import extract_stints
+from parallel_stints import extract_files, game_shards
+from synthetic_games import play_by_play
+
+
+@pytest.mark.parametrize("clock", ["game", "legacy"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_shards_match_one_pass(tmp_path, clock, workers):
+    paths = []
+    for seed in (7, 8):
+        path = tmp_path / f"season{seed}.csv"
+        play_by_play(n_games=9, seed=seed).to_csv(path, index=False)
+        paths.append(str(path))
+    assert len(game_shards(paths[0], 6)[1]) > 2
+
+    results = extract_files(paths, workers=workers, shards_per_worker=6 // workers, clock=clock)
+    for path, (stints, game_ids, last_date) in zip(paths, results):
+        plays = pd.read_csv(path)
+        pd.testing.assert_frame_equal(stints, extract_stints(plays, clock), check_dtype=False)
+        assert game_ids == list(pd.unique(plays['GameID'].astype(str)))
+        assert last_date == plays['Date'].max()
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+import season_filter
+from season_filter import SORT_COLUMNS, filter_season, season_bounds
+from synthetic_games import play_by_play
+
+
+@pytest.fixture
+def raw_games(tmp_path):
+    """
+    An unsorted all_games.csv with two seasons of games.
+    """
+    games = pd.concat([play_by_play(n_games=20, seed=0, first_date="2021-10-19"),
+                       play_by_play(n_games=10, seed=1, first_date="2020-12-22")])
+    games['Date'] = pd.to_datetime(games['Date']).dt.strftime('%m/%d/%Y')
+    path = tmp_path / "all_games.csv"
+    games.sample(frac=1, random_state=0).to_csv(path, index=False)
+    return path
+
+
+def expected_season(path):
+    games = pd.read_csv(path)
+    games['Date'] = pd.to_datetime(games['Date'], format='%m/%d/%Y')
+    start, end = season_bounds("2021-22")
+    return games[games['Date'].between(start, end)].sort_values(SORT_COLUMNS, kind='stable')
+
+
+@pytest.mark.parametrize("memory_limit_mb", [512, 1])
+def test_filter_season_matches_in_memory_sort(raw_games, tmp_path, monkeypatch, memory_limit_mb):
+    spilled = []
+    write_run = season_filter._write_run
+    monkeypatch.setattr(season_filter, "_write_run", lambda *args: spilled.append(1) or write_run(*args))
+    output = tmp_path / "season.csv"
+    start, end = season_bounds("2021-22")
+    rows = filter_season(raw_games, output, start, end, chunksize=500, memory_limit_mb=memory_limit_mb,
+                         tmp_dir=tmp_path)
+    expected = expected_season(raw_games)
+    actual = pd.read_csv(output, parse_dates=['Date'])
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+    # A 1 MB cap cannot hold the season's rows, so they go through spilled runs
+    assert (len(spilled) > 1) == (memory_limit_mb == 1)
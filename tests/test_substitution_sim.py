@@ -0,0 +1,47 @@
+"""
+The simulator follows the domain's stamina >= 1 precondition on play-time, also for fractional stamina.
+"""
+
+import numpy as np
+import pytest
+from substitution_sim import astar, beam_search, load_scenario, rollouts
+
+PROBLEM = """(define (problem fractional-stamina)
+  (:domain basketball-stamina)
+  (:objects pa pb pc pd - player G F C b1 - slot)
+  (:init
+    (has-player G pa) (has-player F pb) (has-player C pc) (has-player b1 pd)
+    (court-slot G) (court-slot F) (court-slot C) (bench-slot b1)
+    (= (stamina pa) {stamina_a}) (= (stamina pb) 5) (= (stamina pc) 5) (= (stamina pd) 5)
+    (= (max-stamina pa) 5) (= (max-stamina pb) 5) (= (max-stamina pc) 5) (= (max-stamina pd) 5)
+    (= (fatigue-rate pa) 1) (= (fatigue-rate pb) 1) (= (fatigue-rate pc) 1) (= (fatigue-rate pd) 1)
+    (= (time-left) 3)
+    (= (momentum) 0)
+  )
+  (:goal (<= (time-left) 0))
+  (:metric maximize (momentum))
+)
+"""
+
+
+def scenario(tmp_path, stamina_a):
+    path = tmp_path / "fractional_problem.pddl"
+    path.write_text(PROBLEM.format(stamina_a=stamina_a))
+    return load_scenario(str(path))
+
+
+def test_stamina_between_zero_and_one_is_a_dead_end(tmp_path):
+    # After one play-time, pa is at 0.5: too tired to play and not tired enough to be substituted
+    stuck = scenario(tmp_path, 1.5)
+    assert astar(stuck)[0] is None
+    assert beam_search(stuck)[0] is None
+    assert np.isnan(rollouts(stuck, 50, np.random.default_rng(0))[0]).all()
+
+
+@pytest.mark.parametrize("stamina_a", [1, 2])
+def test_whole_stamina_reaches_zero_and_is_substituted(tmp_path, stamina_a):
+    ready = scenario(tmp_path, stamina_a)
+    plan, substitutions, _ = astar(ready)
+    assert substitutions == 1 and sum(action.startswith("(play-time") for action in plan) == 3
+    assert beam_search(ready)[1] == 1
+    assert not np.isnan(rollouts(ready, 50, np.random.default_rng(0))[0]).any()
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import torch
+from lineup_model import Net
+from training import train_model
+
+
+def small_problem(seed=0, rows=400, players=30):
+    rng = np.random.default_rng(seed)
+    lineups = np.sort(np.stack([rng.choice(np.arange(1, players + 1), 5, replace=False) for _ in range(rows)]), axis=1)
+    X = torch.from_numpy(np.column_stack([lineups, rng.integers(0, 2, rows)]).astype(np.int64))
+    y = torch.from_numpy(rng.normal(size=(rows, 1)).astype(np.float32))
+    return X, y, np.repeat(np.arange(rows // 10), 10), players + 1
+
+
+def test_resume_continues_from_checkpoint(tmp_path):
+    X, y, games, size = small_problem()
+    checkpoint = str(tmp_path / "net.pt")
+    config = {'epochs': 2, 'batch_size': 64, 'patience': 100}
+    _, history = train_model(Net(size, 4, 8, 1), X, y, games, config, checkpoint_path=checkpoint)
+    assert len(history) == 2
+    _, history = train_model(Net(size, 4, 8, 1), X, y, games, {**config, 'epochs': 4}, checkpoint_path=checkpoint,
+                             resume=True)
+    assert [epoch for epoch, _, _ in history] == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("change", [{'lr': 0.01}, {'batch_size': 32}, {'val_fraction': 0.2}])
+def test_resume_refuses_changed_settings(tmp_path, change):
+    X, y, games, size = small_problem()
+    checkpoint = str(tmp_path / "net.pt")
+    config = {'epochs': 1, 'batch_size': 64}
+    train_model(Net(size, 4, 8, 1), X, y, games, config, checkpoint_path=checkpoint)
+    with pytest.raises(ValueError, match=next(iter(change))):
+        train_model(Net(size, 4, 8, 1), X, y, games, {**config, 'epochs': 2, **change}, checkpoint_path=checkpoint,
+                    resume=True)